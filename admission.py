@@ -0,0 +1,205 @@
+"""
+Admission Control — per-client rate limits and a bounded write gate
+Two checks run before a request reaches its handler:
+
+* Rate limits: a token bucket per (route, client). Each route can have its
+  own rate and burst; a client that runs its bucket dry gets a 429 with
+  ``Retry-After`` set to when the next token arrives. Buckets live in memory
+  by default (:class:`MemoryBuckets`, one set per worker process) or in an
+  SQLite file every worker shares (:class:`SQLiteBuckets`); anything with the
+  same ``take`` method can stand in for either.
+* Write gate: at most ``limit`` POST/PUT/DELETE requests run at once per
+  process. Further writers wait up to ``max_wait`` seconds for a slot and are
+  then turned away with a 503, so a flood of writes is refused quickly
+  instead of queuing behind the store's write lock and starving readers.
+
+Limits are written like ``POST /students=50/s:100`` (50 per second, bursts
+of up to 100), comma-separated, with routes named as in the metrics labels.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_RATE_LIMITS = ("POST /students=50/s:100, PUT /students/<student_id>=50/s:100, "
+                       "DELETE /students/<student_id>=50/s:100, POST /students/_bulk=2/s:5")
+WRITE_METHODS = frozenset(["POST", "PUT", "PATCH", "DELETE"])
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+class Limit:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    __slots__ = ("rate", "burst")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+
+    def __repr__(self):
+        return f"Limit({self.rate:g}/s, burst={self.burst:g})"
+
+
+def parse_limits(text):
+    """``{(method, route): Limit}`` from a spec like ``"POST /students=50/s:100, ..."``; "off" or "" is none."""
+    limits = {}
+    if not text or text.strip().lower() == "off":
+        return limits
+    for rule in text.split(","):
+        target, _, spec = rule.partition("=")
+        method, _, route = target.strip().partition(" ")
+        rate, _, burst = spec.strip().partition(":")
+        count, _, unit = rate.partition("/")
+        usage = f"Invalid rate limit {rule.strip()!r}: expected 'METHOD /route=N/s[:burst]'"
+        try:
+            per_second = float(count) / UNITS[unit.strip() or "s"]
+            limit = Limit(per_second, float(burst) if burst else max(1.0, per_second))
+        except (KeyError, ValueError):
+            raise ValueError(usage) from None
+        if not route.strip() or limit.rate <= 0 or limit.burst < 1:
+            raise ValueError(usage)
+        limits[(method.upper(), route.strip())] = limit
+    return limits
+
+
+def client_key(remote_addr, forwarded_for=None, trust_proxy=False):
+    """Who a request counts against: the peer address, or the first X-Forwarded-For hop behind a proxy."""
+    if trust_proxy and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return remote_addr or "unknown"
+
+
+def retry_after(seconds):
+    """A ``Retry-After`` header value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
+
+
+# ── Bucket storage ───────────────────────────────────────────────────────────
+
+def _refill(tokens, updated, now, limit, cost):
+    """``(tokens left, seconds to wait)`` after trying to take ``cost`` tokens at ``now``."""
+    tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / limit.rate
+
+
+class MemoryBuckets:
+    """Token buckets in a dict, for one process; the least recently used are dropped past ``max_keys``."""
+
+    in_memory = True   # take() never waits on I/O, so async servers may call it on the event loop
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, cost=1):
+        """Take ``cost`` tokens from ``key``'s bucket. Returns 0.0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.burst, now))
+            tokens, wait = _refill(tokens, updated, now, limit, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """Token buckets in an SQLite table, so every worker process on the host shares one budget per client.
+
+    Each :meth:`take` is one ``BEGIN IMMEDIATE`` transaction. Buckets idle
+    for longer than ``idle_expiry`` seconds are full again and get deleted.
+    """
+
+    in_memory = False
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+    SELECT = "SELECT tokens, updated FROM buckets WHERE key = ?"
+    UPSERT = "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)"
+    EXPIRE = "DELETE FROM buckets WHERE updated < ?"
+
+    def __init__(self, path, timeout=5.0, idle_expiry=3600, expire_every=1000):
+        self.path = path
+        self.timeout = timeout
+        self.idle_expiry = idle_expiry
+        self.expire_every = expire_every
+        self._local = threading.local()
+        self._takes = 0
+        self._conn().execute(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")   # losing the last few refills in a crash is harmless
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, limit, cost=1):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(self.SELECT, (key,)).fetchone()
+            tokens, wait = _refill(*(row or (limit.burst, now)), now, limit, cost)
+            conn.execute(self.UPSERT, (key, tokens, now))
+            self._takes += 1
+            if self._takes % self.expire_every == 0:
+                conn.execute(self.EXPIRE, (now - self.idle_expiry,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+# ── Write gate ───────────────────────────────────────────────────────────────
+
+class WriteGate:
+    """At most ``limit`` writes in flight; a writer waits up to ``max_wait`` seconds for a slot."""
+
+    def __init__(self, limit, max_wait):
+        self.limit = limit
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def enter(self, blocking=True):
+        """Take a slot; False if none freed up in time (or at once, without ``blocking``)."""
+        acquired = self._slots.acquire(timeout=self.max_wait) if blocking else self._slots.acquire(blocking=False)
+        if not acquired:
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class Admission:
+    """The rate limits and write gate for one app; see the module docstring."""
+
+    def __init__(self, limits, buckets, gate, trust_proxy=False):
+        self.limits = limits
+        self.buckets = buckets
+        self.gate = gate
+        self.trust_proxy = trust_proxy
+
+    def rate_wait(self, method, route, client):
+        """Seconds ``client`` must wait before ``method route`` is allowed; 0.0 if it may go now."""
+        limit = self.limits.get((method, route))
+        if limit is None:
+            return 0.0
+        return self.buckets.take(f"{method} {route}|{client}", limit)
@@ -0,0 +1,442 @@
+"""
+ASGI App — async serving mode for the Student API
+The same routes and response bodies as flask_api.py, as async Starlette
+handlers. Validation, paging, bulk and export logic, the storage backend and
+the response cache are shared with flask_api.py; every storage call runs in a
+worker thread so a slow fsync or SQLite lock never blocks the event loop.
+
+Run it with serve.py, or directly:
+    uvicorn asgi_app:app --workers 4
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags
+
+import flask_api as api
+import metrics
+from admission import WRITE_METHODS, client_key, retry_after
+from change_feed import SSE_HEARTBEAT, ChangeFeed, format_sse
+from response_cache import dumps
+from student_schema import ValidationError, validate_student, validate_update
+from student_store import PreconditionFailed, StudentExists, StudentNotFound
+
+# Threads available for storage calls; each in-flight request holds one while
+# it waits on the store.
+STORE_THREADS = int(os.environ.get("ASGI_STORE_THREADS", 64))
+
+# The request this task serves, as keyed in the slow-request profiler.
+profiled_request = contextvars.ContextVar("profiled_request", default=None)
+
+
+async def run_in_threadpool(func, *args):
+    """Starlette's ``run_in_threadpool``; with SLOW_REQUEST_PROFILE_MS the worker thread
+    is sampled as part of the current request, since that is where its work runs."""
+    key = profiled_request.get()
+    if key is None:
+        return await starlette_run_in_threadpool(func, *args)
+
+    def sampled():
+        api.profiler.attach(key)
+        try:
+            return func(*args)
+        finally:
+            api.profiler.detach(key)
+    return await starlette_run_in_threadpool(sampled)
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status_code=status, media_type="application/json")
+
+
+def error(message, status):
+    return json_response({"status": "error", "message": message}, status)
+
+
+def invalid(e):
+    """400 for a :class:`ValidationError`, with its per-field ``errors``."""
+    return json_response({"status": "error", "message": str(e), "errors": e.errors}, 400)
+
+
+def with_validators(response, etag, last_modified):
+    response.headers["ETag"] = f'"{etag}"'
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def is_not_modified(request, etag, last_modified):
+    """True if the client's If-None-Match / If-Modified-Since still matches."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag)
+    since = parse_date(request.headers.get("if-modified-since"))
+    return since is not None and last_modified is not None and last_modified <= since.timestamp()
+
+
+def not_modified(etag, last_modified):
+    return with_validators(Response(status_code=304), etag, last_modified)
+
+
+def if_match_version(request, student_id):
+    """Same contract as :func:`flask_api.if_match_version`; call from a worker thread."""
+    if_match = parse_etags(request.headers.get("if-match"))
+    if not if_match or if_match.star_tag:
+        return None, True
+    generation, version = api.record_validators(student_id)
+    if version is None:
+        return None, True
+    return version, if_match.contains(api.record_etag(generation, version))
+
+
+def cached_json(request, etag, last_modified, build):
+    """Response-cache lookup shared with the Flask app; call from a worker thread."""
+    key = (request.url.path, request.url.query.encode(), etag)
+    entry = api.response_cache.get(key)
+    if entry is None:
+        payload = build()
+        if payload is None:
+            return None
+        with metrics.phase("serialize"):
+            entry = api.response_cache.put(key, payload)
+    body, encoding = entry.encoded(parse_accept_header(request.headers.get("accept-encoding")))
+    response = Response(body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return with_validators(response, etag, last_modified)
+
+
+async def wait_for_changes(since, timeout):
+    """:meth:`ChangeFeed.wait` for the event loop: sleeps on an asyncio.Event, not a worker thread."""
+    await run_in_threadpool(api.store.refresh)
+    loop = asyncio.get_running_loop()
+    woken = asyncio.Event()
+    unwatch = api.change_feed.watch(lambda: loop.call_soon_threadsafe(woken.set))
+    try:
+        deadline = loop.time() + timeout
+        while True:
+            woken.clear()
+            events, version, reset = api.change_feed.changes_since(since)
+            remaining = deadline - loop.time()
+            if events or reset or remaining <= 0:
+                return events, version, reset
+            try:
+                await asyncio.wait_for(woken.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        unwatch()
+
+
+async def sse_messages(since):
+    """Async counterpart of :meth:`ChangeFeed.sse_messages`."""
+    since = api.change_feed.version if since is None else since
+    yield format_sse("ready", {"version": since})
+    while True:
+        events, version, reset = await wait_for_changes(since, api.SSE_HEARTBEAT)
+        since, messages = ChangeFeed.messages(events, version, reset, since)
+        for message in messages or [SSE_HEARTBEAT]:
+            yield message
+
+
+async def admitted(request, label, handler):
+    """Run ``handler`` past the route's rate limit and, for writes, inside a write-gate slot.
+
+    Same rules as the Flask app's ``admit_request``; waiting for a slot
+    happens in a worker thread, never on the event loop.
+    """
+    admission = api.admission
+    client = client_key(request.client.host if request.client else None,
+                        request.headers.get("x-forwarded-for"), admission.trust_proxy)
+    if getattr(admission.buckets, "in_memory", False):
+        wait = admission.rate_wait(request.method, label, client)
+    else:
+        wait = await run_in_threadpool(admission.rate_wait, request.method, label, client)
+    if wait:
+        response = json_response(api.rate_limited_payload(request.method, label, wait), 429)
+        response.headers["Retry-After"] = retry_after(wait)
+        return response
+    if request.method not in WRITE_METHODS:
+        return await handler(request)
+    if not (admission.gate.enter(blocking=False) or await run_in_threadpool(admission.gate.enter)):
+        response = json_response(api.OVERLOADED_PAYLOAD, 503)
+        response.headers["Retry-After"] = retry_after(admission.gate.max_wait)
+        return response
+    try:
+        return await handler(request)
+    finally:
+        admission.gate.leave()
+
+
+async def read_lines(request, limit):
+    """The body's lines, read from the stream only until ``limit`` non-blank ones have arrived."""
+    lines, rest, count = [], b"", 0
+    async for chunk in request.stream():
+        *complete, rest = (rest + chunk).split(b"\n")
+        lines += complete
+        count += sum(1 for line in complete if line.strip())
+        if count >= limit:
+            return lines
+    return lines + [rest]
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+# ── Routes ───────────────────────────────────────────────────────────────────
+
+routes = []
+
+
+def route(path, methods):
+    """Register an async handler, admitted and timed under the same route label as the Flask app."""
+    label = path.replace("{", "<").replace("}", ">")
+
+    def decorate(handler):
+        async def endpoint(request):
+            metrics.current_route.set(label)
+            started = time.perf_counter()
+            if api.profiler:
+                key = object()
+                token = profiled_request.set(key)
+                api.profiler.start(f"{request.method} {request.url.path}?{request.url.query}", key)
+                try:
+                    response = await admitted(request, label, handler)
+                finally:
+                    api.profiler.finish(key)
+                    profiled_request.reset(token)
+            else:
+                response = await admitted(request, label, handler)
+            streamed = isinstance(response, StreamingResponse)
+            metrics.record_request(request.method, label, response.status_code, time.perf_counter() - started,
+                                   int(request.headers.get("content-length") or 0),
+                                   None if streamed else len(response.body))
+            return response
+        routes.append(Route(path, endpoint, methods=methods))
+        return handler
+    return decorate
+
+
+@route("/students", methods=["GET"])
+async def get_all_students(request):
+    try:
+        query, limit, fields = api.parse_list_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    def respond():
+        etag, last_modified = api.collection_etag(request.url.query.encode()), api.http_last_modified()
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        def build():
+            students, next_cursor = api.list_students(query, limit, fields)
+            return {"status": "success", "count": len(students), "data": students, "next_cursor": next_cursor}
+        return cached_json(request, etag, last_modified, build)
+    return await run_in_threadpool(respond)
+
+
+@route("/students/search", methods=["GET"])
+async def search_students(request):
+    try:
+        text, limit = api.parse_search_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    def respond():
+        etag, last_modified = api.collection_etag(request.url.query.encode()), api.http_last_modified()
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        def build():
+            results = api.run_search(text, limit)
+            return {"status": "success", "count": len(results), "data": results}
+        return cached_json(request, etag, last_modified, build)
+    return await run_in_threadpool(respond)
+
+
+@route("/students/stats", methods=["GET"])
+async def get_stats(request):
+    try:
+        options = api.parse_stats_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    def respond():
+        etag, last_modified = api.collection_etag(request.url.query.encode()), api.http_last_modified()
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        def build():
+            with metrics.phase("aggregate"):
+                return {"status": "success", "data": api.roster_stats.stats(**options)}
+        return cached_json(request, etag, last_modified, build)
+    return await run_in_threadpool(respond)
+
+
+@route("/students/changes", methods=["GET"])
+async def get_changes(request):
+    try:
+        since, timeout = api.parse_changes_args(request.query_params, request.headers.get("last-event-id"))
+    except ValueError as e:
+        return error(str(e), 400)
+
+    if parse_accept_header(request.headers.get("accept"), MIMEAccept).best == "text/event-stream":
+        return StreamingResponse(sse_messages(since), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    if since is None:
+        return json_response(api.changes_payload([], api.change_feed.version, False))
+    return json_response(api.changes_payload(*await wait_for_changes(since, timeout)))
+
+
+@route("/students/export", methods=["GET"])
+async def export_students(request):
+    fmt = request.query_params.get("format", "ndjson")
+    if fmt not in api.EXPORT_FORMATS:
+        return error(f"'format' must be one of {list(api.EXPORT_FORMATS)}", 400)
+    try:
+        query, _, fields = api.parse_list_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+    # A sync iterator: Starlette pulls each chunk in a worker thread.
+    return StreamingResponse(
+        api.export_chunks(api.iter_students(query, fields), fmt, fields),
+        media_type=api.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=students.{fmt}"},
+    )
+
+
+@route("/students/_bulk", methods=["POST"])
+async def bulk_students(request):
+    if request.headers.get("content-type", "").split(";")[0] in ("application/x-ndjson", "application/jsonl"):
+        items = api.read_ndjson(await read_lines(request, api.MAX_BULK_ITEMS + 1), api.MAX_BULK_ITEMS)
+    else:
+        items = await read_json(request)
+        if not isinstance(items, list):
+            return error("Request body must be a JSON array or NDJSON", 400)
+    if len(items) > api.MAX_BULK_ITEMS:
+        return error(f"At most {api.MAX_BULK_ITEMS} operations per request", 413)
+
+    results = await run_in_threadpool(api.run_bulk, items)
+    succeeded = sum(1 for r in results if r["status"] < 300)
+    return json_response({
+        "status": "success", "count": len(results),
+        "succeeded": succeeded, "failed": len(results) - succeeded,
+        "results": results,
+    })
+
+
+@route("/students/{student_id}", methods=["GET"])
+async def get_student(request):
+    student_id = request.path_params["student_id"]
+
+    def respond():
+        generation, version = api.record_validators(student_id)
+        if version is None:
+            return None
+        etag, last_modified = api.record_etag(generation, version), api.http_last_modified()
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        def build():
+            student = api.store.get(student_id)
+            return {"status": "success", "data": student} if student else None
+        return cached_json(request, etag, last_modified, build)
+
+    response = await run_in_threadpool(respond)
+    if response is None:
+        return error(f"Student '{student_id}' not found", 404)
+    return response
+
+
+@route("/students", methods=["POST"])
+async def create_student(request):
+    try:
+        new_student = validate_student(await read_json(request))
+    except ValidationError as e:
+        return invalid(e)
+    try:
+        await run_in_threadpool(api.store.create, new_student)
+    except StudentExists as e:
+        return error(str(e), 409)
+    return json_response({"status": "success", "message": "Student created", "data": new_student}, 201)
+
+
+@route("/students/{student_id}", methods=["PUT"])
+async def update_student(request):
+    student_id = request.path_params["student_id"]
+    if not await run_in_threadpool(api.store.get, student_id):
+        return error(f"Student '{student_id}' not found", 404)
+
+    try:
+        fields = validate_update(await read_json(request))
+    except ValidationError as e:
+        return invalid(e)
+
+    if_version, matched = await run_in_threadpool(if_match_version, request, student_id)
+    if not matched:
+        return error(f"Student '{student_id}' was modified by someone else", 412)
+    try:
+        student = await run_in_threadpool(api.store.update, student_id, fields, if_version)
+    except StudentNotFound as e:
+        return error(str(e), 404)
+    except PreconditionFailed as e:
+        return error(str(e), 412)
+    return json_response({"status": "success", "message": "Student updated", "data": student})
+
+
+@route("/students/{student_id}", methods=["DELETE"])
+async def delete_student(request):
+    student_id = request.path_params["student_id"]
+    if_version, matched = await run_in_threadpool(if_match_version, request, student_id)
+    if not matched:
+        return error(f"Student '{student_id}' was modified by someone else", 412)
+    try:
+        await run_in_threadpool(api.store.delete, student_id, if_version)
+    except StudentNotFound as e:
+        return error(str(e), 404)
+    except PreconditionFailed as e:
+        return error(str(e), 412)
+    return json_response({"status": "success", "message": f"Student '{student_id}' deleted"})
+
+
+@route("/health", methods=["GET"])
+async def health(request):
+    return json_response({"status": "ok", "message": "Flask API is running"})
+
+
+@route("/metrics", methods=["GET"])
+async def get_metrics(request):
+    body = await run_in_threadpool(metrics.registry.render)
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+
+@route("/metrics/slow", methods=["GET"])
+async def get_slow_requests(request):
+    if not api.profiler:
+        return error("Slow-request profiler is off; set SLOW_REQUEST_PROFILE_MS", 404)
+    return json_response({"status": "success", "data": list(api.profiler.profiles)})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = STORE_THREADS
+    yield
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,394 @@
+"""
+API benchmark — throughput and latency of every Student API route
+Seeds synthetic rosters (1k, 100k and 1M students by default), then runs a
+weighted mix of requests from many threads, either in-process through the
+Flask test client or over HTTP against a locally launched server. Reports
+requests/second and p50/p95/p99 latency per route, saves the results as JSON,
+and compares them with a stored baseline.
+
+Usage:
+    python bench_api.py [--sizes 1k,100k,1M] [--mode client|server|both] [--backend json|sqlite|columnar|shared]
+                        [--server dev|asgi|wsgi] [--server-workers 1]
+                        [--concurrency 8] [--duration 10] [--mix get_one=60,get_all=10,...]
+                        [--output bench_results.json] [--baseline bench_baseline.json]
+                        [--save-baseline] [--tolerance 0.15]
+
+Exits with status 1 if a baseline was given and any route regressed by more
+than the tolerance (p95 latency up, or throughput down).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+COMPANIES = ["Infosys", "TCS", "Wipro", "Accenture", "Google", "Microsoft", "Amazon", "Zoho",
+             "Freshworks", "HCL", "Cognizant", "Capgemini", "IBM", "Oracle", "SAP", "Adobe"]
+DEFAULT_MIX = "get_one=55,get_all=15,post=10,put=10,delete=5,health=5"
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op not in OPERATIONS:
+            raise SystemExit(f"unknown operation in --mix: {op!r} (choose from {sorted(OPERATIONS)})")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def student_id(n):
+    return f"STU{n:07d}"
+
+
+def seed_roster(path, size):
+    """Write a students.json with ``size`` synthetic students, streaming so 1M stays cheap."""
+    with open(path, "w") as f:
+        f.write("[\n")
+        for n in range(1, size + 1):
+            f.write(json.dumps({
+                "student_id": student_id(n),
+                "student_name": f"Student {n}",
+                "years_of_experience": n % 40,
+                "company_name": COMPANIES[n % len(COMPANIES)],
+            }))
+            f.write(",\n" if n < size else "\n")
+        f.write("]\n")
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# ── Operations ──────────────────────────────────────────────────────────────
+# Each takes (call, state) and returns whether the API answered as expected.
+# ``call(method, path, body=None)`` returns the status code from the client under test.
+
+def op_get_one(call, state):
+    return call("GET", f"/students/{student_id(state.rng.randint(1, state.size))}") == 200
+
+
+def op_get_all(call, state):
+    if state.rng.random() < 0.5:
+        return call("GET", f"/students?limit={state.page_size}") == 200
+    company = state.rng.choice(COMPANIES)
+    return call("GET", f"/students?limit={state.page_size}&company_name={company}") == 200
+
+
+def op_post(call, state):
+    sid = f"B{state.worker}N{state.counter}"
+    state.counter += 1
+    ok = call("POST", "/students", {"student_id": sid, "student_name": "Bench", "years_of_experience": 3,
+                                    "company_name": state.rng.choice(COMPANIES)}) == 201
+    if ok:
+        state.created.append(sid)
+    return ok
+
+
+def op_put(call, state):
+    sid = student_id(state.rng.randint(1, state.size))
+    return call("PUT", f"/students/{sid}", {"years_of_experience": state.rng.randint(0, 40)}) == 200
+
+
+def op_delete(call, state):
+    if not state.created:
+        return op_post(call, state)
+    return call("DELETE", f"/students/{state.created.pop()}") == 200
+
+
+def op_health(call, state):
+    return call("GET", "/health") == 200
+
+
+OPERATIONS = {"get_one": op_get_one, "get_all": op_get_all, "post": op_post,
+              "put": op_put, "delete": op_delete, "health": op_health}
+
+
+class WorkerState:
+    def __init__(self, worker, size, page_size, seed):
+        self.worker = worker
+        self.size = size
+        self.page_size = page_size
+        self.rng = random.Random(seed + worker)
+        self.counter = 0
+        self.created = []
+
+
+# ── Clients ──────────────────────────────────────────────────────────────────
+
+def test_client_factory():
+    import flask_api
+    app = flask_api.app
+
+    def factory():
+        client = app.test_client()
+
+        def call(method, path, body=None):
+            return client.open(path, method=method, json=body).status_code
+        return call
+    return factory
+
+
+def http_client_factory(base_url):
+    from student_client import StudentClient
+
+    def factory():
+        # No retries: a failed request should show up as an error, not as latency.
+        client = StudentClient(base_url, timeout=30, retries=0, pool_size=1)
+
+        def call(method, path, body=None):
+            return client.request(method, path, json=body).status
+        return call
+    return factory
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env, port, server="dev", workers=1):
+    """Launch the API: Flask's dev server, or serve.py in asgi / wsgi mode."""
+    if server == "dev":
+        command = [sys.executable, "-c", f"import flask_api; flask_api.app.run(port={port}, threaded=True)"]
+    else:
+        command = [sys.executable, "serve.py", "--mode", server, "--host", "127.0.0.1",
+                   "--port", str(port), "--workers", str(workers)]
+    proc = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    import requests
+    deadline = time.time() + 600  # loading 1M students takes a while
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def run_load(factory, size, args, mix):
+    """Drive the mix from ``args.concurrency`` threads; returns the scenario summary."""
+    ops, weights = list(mix), list(mix.values())
+    latencies = {op: [] for op in ops}
+    errors = {op: 0 for op in ops}
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.concurrency + 1)
+
+    def worker(n):
+        call = factory()
+        state = WorkerState(n, size, args.page_size, args.seed)
+        local = {op: [] for op in ops}
+        local_errors = {op: 0 for op in ops}
+        warm_until = time.perf_counter() + args.warmup
+        while time.perf_counter() < warm_until:
+            OPERATIONS[state.rng.choices(ops, weights)[0]](call, state)
+        start_gate.wait()
+        stop_at = time.perf_counter() + args.duration
+        while True:
+            op = state.rng.choices(ops, weights)[0]
+            t0 = time.perf_counter()
+            if t0 >= stop_at:
+                break
+            ok = OPERATIONS[op](call, state)
+            local[op].append(time.perf_counter() - t0)
+            if not ok:
+                local_errors[op] += 1
+        with lock:
+            for op in ops:
+                latencies[op].extend(local[op])
+                errors[op] += local_errors[op]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    def summarize(samples, failed):
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "errors": failed,
+            "throughput": round(len(ordered) / elapsed, 1),
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p50_ms": round(1000 * percentile(ordered, 0.50), 3),
+            "p95_ms": round(1000 * percentile(ordered, 0.95), 3),
+            "p99_ms": round(1000 * percentile(ordered, 0.99), 3),
+        }
+
+    routes = {op: summarize(latencies[op], errors[op]) for op in ops}
+    routes["total"] = summarize([x for op in ops for x in latencies[op]], sum(errors.values()))
+    return routes
+
+
+def scenario_files(roster, workdir, name):
+    """Fresh copy of the seeded roster for one scenario, so writes don't leak between runs."""
+    os.makedirs(os.path.join(workdir, name))
+    data_file = os.path.join(workdir, name, "students.json")
+    shutil.copy(roster, data_file)
+    return data_file, os.path.join(workdir, name, "students.db")
+
+
+def run_size(size, args, mix, workdir):
+    roster = os.path.join(workdir, f"roster-{size}.json")
+    t0 = time.perf_counter()
+    seed_roster(roster, size)
+    print(f"  seeded {size:,} students in {time.perf_counter() - t0:.1f}s")
+
+    scenarios = {}
+    if args.mode in ("client", "both"):
+        data_file, db_file = scenario_files(roster, workdir, f"client-{size}")
+        env = dict(os.environ, STUDENT_STORAGE=args.backend, STUDENT_DATA_FILE=data_file, STUDENT_DB_FILE=db_file)
+        os.environ.update(env)
+        t0 = time.perf_counter()
+        if "flask_api" in sys.modules:
+            import flask_api
+            import metrics
+            from student_store import open_store
+            flask_api.store = metrics.TimedStore(open_store(args.backend, data_file, db_file))
+            flask_api.response_cache.clear()
+        else:
+            import flask_api  # first import opens the store from the environment
+        len(flask_api.store)  # force the initial load
+        load_s = time.perf_counter() - t0
+        scenarios[f"client/{size}"] = {"load_s": round(load_s, 3),
+                                       "routes": run_load(test_client_factory(), size, args, mix)}
+    if args.mode in ("server", "both"):
+        data_file, db_file = scenario_files(roster, workdir, f"server-{size}")
+        env = dict(os.environ, STUDENT_STORAGE=args.backend, STUDENT_DATA_FILE=data_file, STUDENT_DB_FILE=db_file)
+        port = free_port()
+        t0 = time.perf_counter()
+        proc = start_server(env, port, args.server, args.server_workers)
+        load_s = time.perf_counter() - t0
+        try:
+            routes = run_load(http_client_factory(f"http://127.0.0.1:{port}"), size, args, mix)
+        finally:
+            proc.terminate()
+            proc.wait()
+        scenarios[f"server-{args.server}/{size}"] = {"load_s": round(load_s, 3), "routes": routes}
+    return scenarios
+
+
+def print_scenario(name, scenario):
+    print(f"\n{name}  (startup {scenario['load_s']}s)")
+    print(f"  {'route':<8} {'count':>8} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op, r in scenario["routes"].items():
+        print(f"  {op:<8} {r['count']:>8} {r['errors']:>5} {r['throughput']:>9} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def compare(results, baseline, tolerance):
+    """List of regression messages for routes present in both runs."""
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for op, r in scenario["routes"].items():
+            b = base["routes"].get(op)
+            if not b or not b["count"] or not r["count"]:
+                continue
+            if r["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} {op}: p95 {b['p95_ms']} -> {r['p95_ms']} ms")
+            if r["throughput"] < b["throughput"] * (1 - tolerance):
+                regressions.append(f"{name} {op}: throughput {b['throughput']} -> {r['throughput']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,100k,1M", help="comma-separated roster sizes")
+    parser.add_argument("--mode", choices=["client", "server", "both"], default="both")
+    parser.add_argument("--backend", choices=["json", "sqlite", "columnar", "shared"], default="json")
+    parser.add_argument("--server", choices=["dev", "asgi", "wsgi"], default="dev",
+                        help="what --mode server launches: Flask's dev server or serve.py")
+    parser.add_argument("--server-workers", type=int, default=1, help="worker processes for asgi / wsgi")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds per thread first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route weights, e.g. get_one=80,put=20")
+    parser.add_argument("--page-size", type=int, default=100, help="limit= used by get_all")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    sys.path.insert(0, HERE)
+    # Every request comes from this one client, far past the default per-client
+    # write limits; set RATE_LIMITS to benchmark with limits on.
+    os.environ.setdefault("RATE_LIMITS", "off")
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "backend": args.backend, "server": args.server, "concurrency": args.concurrency,
+            "duration": args.duration, "mix": mix, "page_size": args.page_size,
+        },
+        "scenarios": {},
+    }
+    workdir = tempfile.mkdtemp(prefix="student-bench-")
+    try:
+        for size in sizes:
+            print(f"roster of {size:,} students ({args.backend})")
+            for name, scenario in run_size(size, args, mix, workdir).items():
+                results["scenarios"][name] = scenario
+                print_scenario(name, scenario)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+    elif args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+            return
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"REGRESSIONS (> {args.tolerance:.0%}):")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
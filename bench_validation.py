@@ -0,0 +1,99 @@
+"""
+Validation benchmark — per-record cost of the student schema
+Times the compiled validators in student_schema.py on synthetic payloads,
+without a server or a store: single creates and updates, bulk items, invalid
+records (the error path), and the whole NDJSON ingestion step of
+POST /students/_bulk (decode + validate). Reports microseconds per record,
+records/second, and what validating a full bulk request costs.
+
+Usage:
+    python bench_validation.py [--records 100000] [--repeat 5] [--batch 10000]
+                               [--output validation_results.json]
+"""
+
+import argparse
+import json
+import time
+
+from student_schema import validate_operation, validate_student, validate_update
+
+COMPANIES = ["Infosys", "TCS", "Wipro", "Accenture", "Google", "Microsoft", "Amazon", "Zoho"]
+
+
+def make_payloads(count):
+    """Payloads for each case, shaped like real requests (a share of string-typed years, as CSV uploads send)."""
+    students = [{
+        "student_id": f"STU{n:07d}",
+        "student_name": f"Student {n}",
+        "years_of_experience": n % 40 if n % 5 else str(n % 40),
+        "company_name": COMPANIES[n % len(COMPANIES)],
+    } for n in range(count)]
+    updates = [{"company_name": COMPANIES[n % len(COMPANIES)], "years_of_experience": n % 40} for n in range(count)]
+    invalid = [{
+        "student_id": f"STU {n}",
+        "student_name": "",
+        "years_of_experience": "many",
+        "company_name": COMPANIES[n % len(COMPANIES)],
+    } for n in range(count)]
+    bulk = [{"op": "create", "data": s} if n % 2 else {"op": "update", "student_id": s["student_id"], "data": u}
+            for n, (s, u) in enumerate(zip(students, updates))]
+    ndjson = [json.dumps(item).encode() for item in bulk]
+    return {"create": students, "update": updates, "invalid": invalid, "bulk_item": bulk, "ndjson_line": ndjson}
+
+
+def reject(validate):
+    def run(payload):
+        try:
+            validate(payload)
+        except ValueError:
+            pass
+    return run
+
+
+CASES = {
+    "create": validate_student,
+    "update": validate_update,
+    "invalid": reject(validate_student),
+    "bulk_item": validate_operation,
+    "ndjson_line": lambda line: validate_operation(json.loads(line)),
+}
+
+
+def time_case(run, payloads, repeat):
+    """Best of ``repeat`` passes over ``payloads``, in seconds per record."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for payload in payloads:
+            run(payload)
+        best = min(best, time.perf_counter() - started)
+    return best / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000, help="payloads per case")
+    parser.add_argument("--repeat", type=int, default=5, help="passes per case; the fastest counts")
+    parser.add_argument("--batch", type=int, default=10_000,
+                        help="items in one bulk request (the API's MAX_BULK_ITEMS)")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.records)
+    results = {}
+    print(f"{'case':<12} {'µs/record':>10} {'records/s':>12} {'per bulk request':>17}")
+    for name, run in CASES.items():
+        per_record = time_case(run, payloads[name], args.repeat)
+        results[name] = {"us_per_record": per_record * 1e6, "records_per_second": 1 / per_record,
+                         "ms_per_bulk_request": per_record * args.batch * 1e3}
+        print(f"{name:<12} {per_record * 1e6:>10.2f} {1 / per_record:>12,.0f} "
+              f"{per_record * args.batch * 1e3:>14.1f} ms")
+    print(f"(a bulk request of {args.batch:,} items)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"records": args.records, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
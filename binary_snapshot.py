@@ -0,0 +1,421 @@
+"""
+Binary Snapshot — students.snap, a memory-mappable copy of students.json
+Parsing a large indented students.json dominates startup. A binary snapshot
+holds the same records in a layout that needs no parsing: a fixed header,
+an offset table per string column and the UTF-8 text packed in pools, with
+records sorted by ``student_id``. It can be mmapped and searched by ID in
+place, or copied straight into the columnar store's arrays.
+
+The header records the size and modification time of the students.json it
+was made from; the stores load it instead of the JSON only while those still
+match, and compaction rewrites it whenever it rewrites the JSON.
+
+Version 2 files may also carry the row order for each sortable field, and
+the source of the snapshot they replaced with the IDs that differ from it,
+so a process holding the old file can tell what changed without comparing
+every record (see shared_store.py). Version 1 files are still read.
+
+    python binary_snapshot.py to-binary students.json            # -> students.snap
+    python binary_snapshot.py to-json students.snap students.json
+    python binary_snapshot.py info students.snap
+    python binary_snapshot.py get students.snap STU001
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import repeat
+from operator import add
+
+from columnar_store import StringColumn, StudentColumns, _bisect
+from student_store import encode_snapshot, replace_file
+
+MAGIC = b"STUSNAP1"
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+# magic, source mtime_ns, source size, students, companies, id/name/company pool
+# bytes, years typecode, byte order, format version, padding.
+HEADER = struct.Struct("<8sqQQQQQQccH4x")
+# Version 2, right after the header: previous source mtime_ns and size, changed
+# IDs, changed ID pool bytes, and whether the sort orders are included.
+EXTENSION = struct.Struct("<qQQQ?7x")
+SOURCE = struct.Struct("<qQ")  # the source fields, which sit right after the magic
+ORDERED_FIELDS = ("student_name", "years_of_experience", "company_name")  # student_id order is the row order
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+ITER_CHUNK = 10000  # records decoded per batch when iterating
+
+
+class SnapshotError(ValueError):
+    """The file is not a binary snapshot this version can read."""
+
+
+def binary_path_for(json_path):
+    """Where the binary snapshot of ``json_path`` lives: ``students.json`` -> ``students.snap``."""
+    return os.path.splitext(json_path)[0] + ".snap"
+
+
+def source_of(json_path):
+    """``(mtime_ns, size)`` of a JSON snapshot, as recorded in the header; None if it is missing."""
+    try:
+        st = os.stat(json_path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _layout(count, companies, pools, years_typecode, extension=None):
+    """``[(section, typecode, offset, length in items)]`` after the header, each section 8-byte aligned.
+
+    ``extension`` is ``(changed IDs, changed pool bytes, has orders)`` for a
+    version 2 file, None for version 1.
+    """
+    sections = [
+        ("id_offsets", "Q", count), ("id_lengths", "I", count),
+        ("name_offsets", "Q", count), ("name_lengths", "I", count),
+        ("company_offsets", "Q", companies), ("company_lengths", "I", companies),
+        ("codes", "I", count), ("years", years_typecode, count),
+        ("id_pool", "B", pools[0]), ("name_pool", "B", pools[1]), ("company_pool", "B", pools[2]),
+    ]
+    offset = HEADER.size
+    if extension is not None:
+        changed, changed_pool, has_orders = extension
+        sections += [(f"order_{field}", "I", count if has_orders else 0) for field in ORDERED_FIELDS]
+        sections += [("changed_offsets", "Q", changed), ("changed_lengths", "I", changed),
+                     ("changed_pool", "B", changed_pool)]
+        offset += EXTENSION.size
+    layout = []
+    for name, typecode, length in sections:
+        layout.append((name, typecode, offset, length))
+        offset += -(-array(typecode).itemsize * length // 8) * 8
+    return layout
+
+
+# ── Writing ──────────────────────────────────────────────────────────────────
+
+def encode(records, source=(0, 0), previous=None, changed=(), sort_orders=False):
+    """The binary snapshot of ``records`` as bytes.
+
+    ``records`` is a store's record map (a dict keyed by ``student_id``, a
+    :class:`StudentColumns`, or anything else with ``values()``) or any
+    iterable of student dicts. ``source`` is the ``(mtime_ns, size)`` of the
+    JSON file it stands for; see :func:`restamp` to set it once that file has
+    been written. ``previous`` is the source of the snapshot this one replaces
+    and ``changed`` the IDs whose records differ from it; ``sort_orders``
+    stores the row order of every sortable field.
+    """
+    if isinstance(records, StudentColumns):
+        columns = records
+    else:
+        columns = StudentColumns(records.values() if hasattr(records, "values") else records)
+    order = columns.by_id
+    ids, names = columns.ids.take(order), columns.names.take(order)
+    table = StringColumn()
+    for company_name in columns.companies:
+        table.append(company_name)
+    codes = array("I", map(columns.company.__getitem__, order))
+    years = array(columns.years.typecode, map(columns.years.__getitem__, order))
+    changed_ids = StringColumn()
+    for student_id in sorted(changed):
+        changed_ids.append(student_id)
+    parts = {
+        "id_offsets": ids.offsets, "id_lengths": ids.lengths,
+        "name_offsets": names.offsets, "name_lengths": names.lengths,
+        "company_offsets": table.offsets, "company_lengths": table.lengths,
+        "codes": codes, "years": years,
+        "id_pool": ids.pool, "name_pool": names.pool, "company_pool": table.pool,
+        "changed_offsets": changed_ids.offsets, "changed_lengths": changed_ids.lengths,
+        "changed_pool": changed_ids.pool,
+    }
+    if sort_orders:
+        rank = array("I", bytes(4 * len(columns.alive)))  # columns row -> snapshot row
+        for position, row in enumerate(order):
+            rank[row] = position
+        for field in ORDERED_FIELDS:
+            parts[f"order_{field}"] = array("I", map(rank.__getitem__, columns.order(field)))
+    else:
+        parts.update((f"order_{field}", b"") for field in ORDERED_FIELDS)
+    header = HEADER.pack(MAGIC, source[0], source[1], len(order), len(columns.companies),
+                         len(ids.pool), len(names.pool), len(table.pool),
+                         years.typecode.encode(), BYTE_ORDER, FORMAT_VERSION)
+    header += EXTENSION.pack(*(previous or (0, 0)), len(changed_ids), len(changed_ids.pool), sort_orders)
+    chunks, position = [header], len(header)
+    for name, _, offset, _ in _layout(len(order), len(columns.companies),
+                                      (len(ids.pool), len(names.pool), len(table.pool)), years.typecode,
+                                      (len(changed_ids), len(changed_ids.pool), sort_orders)):
+        data = bytes(parts[name])
+        chunks += [b"\0" * (offset - position), data]
+        position = offset + len(data)
+    return b"".join(chunks)
+
+
+def restamp(data, source):
+    """Encoded snapshot ``data`` with its header pointing at a different JSON ``(mtime_ns, size)``."""
+    return data[:len(MAGIC)] + SOURCE.pack(*source) + data[len(MAGIC) + SOURCE.size:]
+
+
+def write(path, records, source=(0, 0), **options):
+    """Encode ``records`` (see :func:`encode` for ``options``) and replace ``path`` with them atomically."""
+    replace_file(path, encode(records, source, **options))
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────
+
+class BinarySnapshot:
+    """A binary snapshot file, mmapped read-only.
+
+    :meth:`get` binary-searches the ID column in place, so looking up one
+    student reads a handful of pages, however large the file. Iterating
+    decodes records one at a time, in ``student_id`` order. Close it (or use
+    it as a context manager) to release the mapping.
+
+    Rows are numbered in ``student_id`` order. :attr:`company` (codes into
+    :attr:`companies`) and :attr:`years` are the columns as arrays over the
+    mapping, and :meth:`order` the rows sorted by a field, as in
+    :class:`StudentColumns`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise SnapshotError(f"{path} is empty") from None
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self):
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{self.path} is too short for a snapshot header")
+        (magic, mtime_ns, size, self.count, companies, id_pool, name_pool, company_pool,
+         years_typecode, byte_order, version) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            raise SnapshotError(f"{self.path} is not a version {FORMAT_VERSION} student snapshot")
+        if byte_order != BYTE_ORDER:
+            raise SnapshotError(f"{self.path} was written on a machine with the other byte order")
+        self.version = version
+        self.nbytes = len(self._map)
+        self.source = (mtime_ns, size)
+        self.previous, extension, has_orders = None, None, False
+        if version >= 2:
+            if len(self._map) < HEADER.size + EXTENSION.size:
+                raise SnapshotError(f"{self.path} is truncated")
+            previous_mtime_ns, previous_size, changed, changed_pool, has_orders = \
+                EXTENSION.unpack_from(self._map, HEADER.size)
+            if previous_mtime_ns or previous_size:
+                self.previous = (previous_mtime_ns, previous_size)
+            extension = (changed, changed_pool, has_orders)
+        layout = _layout(self.count, companies, (id_pool, name_pool, company_pool), years_typecode.decode(),
+                         extension)
+        name, typecode, offset, length = layout[-1]
+        if offset + length > len(self._map):
+            raise SnapshotError(f"{self.path} is truncated")
+        self._view = memoryview(self._map)
+        self._sections = {name: self._view[offset:offset + array(typecode).itemsize * length].cast(typecode)
+                          for name, typecode, offset, length in layout}
+        self.years_typecode = years_typecode.decode()
+        self.companies = [self._text("company", code).decode() for code in range(companies)]
+        self.company_codes = {name: code for code, name in enumerate(self.companies)}
+        self.company, self.years = self._sections["codes"], self._sections["years"]
+        self.orders = {field: self._sections[f"order_{field}"] for field in ORDERED_FIELDS} if has_orders else {}
+
+    def close(self):
+        for section in getattr(self, "_sections", {}).values():
+            section.release()
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_fresh(self, json_path):
+        """True if ``json_path`` is still the file this snapshot was made from."""
+        return source_of(json_path) == self.source
+
+    def _text(self, column, index):
+        offset = self._sections[column + "_offsets"][index]
+        return bytes(self._sections[column + "_pool"][offset:offset + self._sections[column + "_lengths"][index]])
+
+    def record(self, index):
+        return {
+            "student_id": self._text("id", index).decode(),
+            "student_name": self._text("name", index).decode(),
+            "years_of_experience": self._sections["years"][index],
+            "company_name": self.companies[self._sections["codes"][index]],
+        }
+
+    def __len__(self):
+        return self.count
+
+    def _texts(self, column, start, stop):
+        """Decoded strings ``start:stop`` of a column, sliced and decoded in bulk."""
+        offsets = self._sections[column + "_offsets"][start:stop]
+        ends = map(add, offsets, self._sections[column + "_lengths"][start:stop])
+        return map(str, map(self._sections[column + "_pool"].__getitem__, map(slice, offsets, ends)),
+                   repeat("utf-8"))
+
+    def __iter__(self):
+        years, codes = self._sections["years"], self._sections["codes"]
+        for start in range(0, self.count, ITER_CHUNK):
+            stop = min(start + ITER_CHUNK, self.count)
+            for student_id, student_name, years_of_experience, company_name in zip(
+                    self._texts("id", start, stop), self._texts("name", start, stop), years[start:stop],
+                    map(self.companies.__getitem__, codes[start:stop])):
+                yield {"student_id": student_id, "student_name": student_name,
+                       "years_of_experience": years_of_experience, "company_name": company_name}
+
+    def find(self, student_id):
+        """The row of ``student_id``, or None, found without decoding the rest of the file."""
+        key = str(student_id).encode()  # UTF-8 byte order is code point order
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._text("id", middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._text("id", low) == key:
+            return low
+        return None
+
+    def get(self, student_id):
+        """The student with ``student_id``, or None."""
+        row = self.find(student_id)
+        return None if row is None else self.record(row)
+
+    def student_id(self, row):
+        return self._text("id", row).decode()
+
+    def changed_ids(self):
+        """IDs whose records differ from the snapshot this one replaced (see :attr:`previous`)."""
+        count = len(self._sections.get("changed_lengths", ()))
+        return [self._text("changed", index).decode() for index in range(count)]
+
+    # ── Sort orders ──────────────────────────────────────────────────────────
+
+    def sort_value(self, field):
+        """``row -> value`` of ``field``, as compared when sorting."""
+        if field == "student_id":
+            return self.student_id
+        if field == "student_name":
+            return lambda row: self._text("name", row).decode()
+        if field == "years_of_experience":
+            return self.years.__getitem__
+        companies, codes = self.companies, self.company
+        return lambda row: companies[codes[row]]
+
+    def order_key(self, field):
+        """``row -> sort_key(record, field)``."""
+        if field == "student_id":
+            return self.student_id
+        value, student_id = self.sort_value(field), self.student_id
+        return lambda row: (value(row), student_id(row))
+
+    def order(self, field):
+        """Rows sorted by ``(field, student_id)``; KeyError for a field whose order was not stored."""
+        if field == "student_id":
+            return range(self.count)
+        return self.orders[field]
+
+    def position(self, field, after, right=False):
+        """Where sort key ``after`` falls in :meth:`order` (bisect_left, or bisect_right)."""
+        return _bisect(self.order(field), after, self.order_key(field), right)
+
+    def columns(self):
+        """The whole snapshot as a :class:`StudentColumns`, copied array by array."""
+        def string_column(column):
+            strings = StringColumn()
+            strings.pool = bytearray(self._sections[column + "_pool"])
+            strings.offsets.frombytes(self._sections[column + "_offsets"].cast("B"))
+            strings.lengths.frombytes(self._sections[column + "_lengths"].cast("B"))
+            return strings
+
+        codes, years = array("I"), array(self.years_typecode)
+        codes.frombytes(self._sections["codes"].cast("B"))
+        years.frombytes(self._sections["years"].cast("B"))
+        return StudentColumns.from_arrays(string_column("id"), string_column("name"),
+                                          list(self.companies), codes, years)
+
+
+def open_fresh(path, source):
+    """The snapshot at ``path`` if it exists, is readable and was made from JSON ``source``; else None."""
+    try:
+        snapshot = BinarySnapshot(path)
+    except (FileNotFoundError, SnapshotError):
+        return None
+    if snapshot.source != source:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+# ── Converters ───────────────────────────────────────────────────────────────
+
+def json_to_binary(json_path, binary_path=None):
+    """Write the binary snapshot of ``json_path`` (next to it by default); returns its path."""
+    binary_path = binary_path or binary_path_for(json_path)
+    source = source_of(json_path)
+    with open(json_path, "r") as f:
+        students = json.load(f)
+    if source_of(json_path) != source:
+        raise RuntimeError(f"{json_path} changed while it was being converted; try again")
+    write(binary_path, students, source)
+    return binary_path
+
+
+def binary_to_json(binary_path, json_path):
+    """Write the records of a binary snapshot as a students.json array."""
+    with BinarySnapshot(binary_path) as snapshot:
+        replace_file(json_path, encode_snapshot(snapshot))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    to_binary = commands.add_parser("to-binary", help="students.json -> students.snap")
+    to_binary.add_argument("json_path")
+    to_binary.add_argument("binary_path", nargs="?")
+    to_json = commands.add_parser("to-json", help="students.snap -> students.json")
+    to_json.add_argument("binary_path")
+    to_json.add_argument("json_path")
+    info = commands.add_parser("info", help="header of a snapshot, and whether it is fresh")
+    info.add_argument("binary_path")
+    info.add_argument("json_path", nargs="?")
+    get = commands.add_parser("get", help="look one student up in a snapshot")
+    get.add_argument("binary_path")
+    get.add_argument("student_id")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        print(json_to_binary(args.json_path, args.binary_path))
+    elif args.command == "to-json":
+        binary_to_json(args.binary_path, args.json_path)
+    elif args.command == "info":
+        json_path = args.json_path or os.path.splitext(args.binary_path)[0] + ".json"
+        with BinarySnapshot(args.binary_path) as snapshot:
+            print(json.dumps({"students": len(snapshot), "companies": len(snapshot.companies),
+                              "bytes": os.path.getsize(args.binary_path), "source": json_path,
+                              "fresh": snapshot.is_fresh(json_path), "format_version": snapshot.version,
+                              "sort_orders": sorted(snapshot.orders),
+                              "changed_since_previous": len(snapshot.changed_ids())}, indent=2))
+    else:
+        with BinarySnapshot(args.binary_path) as snapshot:
+            student = snapshot.get(args.student_id)
+        if student is None:
+            sys.exit(f"Student '{args.student_id}' not found")
+        print(json.dumps(student, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Change Feed — recent student mutations for GET /students/changes
+Follows the store's change events and keeps the most recent ones in a
+bounded ring buffer, so clients can ask "what changed since version N?"
+instead of re-reading the roster: either as a Server-Sent Events stream or by
+long-polling with ``since=N``. A client that falls further behind than the
+buffer reaches gets a ``reset`` and reloads.
+
+While anyone is following, a background thread calls ``store.refresh()``
+every ``poll_interval`` seconds so writes made by other worker processes are
+picked up too.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+
+def format_sse(event, data, event_id=None):
+    """One Server-Sent Events message."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+SSE_HEARTBEAT = ": keep-alive\n\n"
+
+log = logging.getLogger("student_api.change_feed")
+
+
+class ChangeFeed:
+    """The last ``capacity`` mutations of a store, with blocking and callback-based waits.
+
+    Each entry is ``{"version", "op", "student_id", "data"}`` where ``data``
+    is the record after the change (``None`` for a delete). Entries are in
+    version order; versions after :attr:`floor` are all present.
+    """
+
+    def __init__(self, store, capacity=10000, poll_interval=1.0):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.version = store.version
+        self.floor = self.version
+        self._events = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._watchers = set()
+        self._followers = 0
+        self._polling = False
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event):
+        with self._cond:
+            if event["op"] == "reset" or event["version"] < self.version:
+                # Versions restarted or events were lost: nobody can catch up from the buffer.
+                self._events.clear()
+                self.floor = event["version"]
+            else:
+                if len(self._events) == self._events.maxlen:
+                    self.floor = self._events[0]["version"]
+                self._events.append({"version": event["version"], "op": event["op"],
+                                     "student_id": event["student_id"], "data": event["new"]})
+            self.version = event["version"]
+            self._cond.notify_all()
+            for wake in self._watchers:
+                wake()
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def changes_since(self, since):
+        """``(events, version, reset)``: the changes after version ``since``.
+
+        ``reset`` is True when they are no longer all buffered (or ``since``
+        is from before a restart); the client must then reload and continue
+        from ``version``.
+        """
+        with self._cond:
+            return self._since(since)
+
+    def _since(self, since):
+        if since < self.floor or since > self.version:
+            return [], self.version, True
+        events = []
+        for event in reversed(self._events):
+            if event["version"] <= since:
+                break
+            events.append(event)
+        events.reverse()
+        return events, self.version, False
+
+    def wait(self, since, timeout):
+        """Like :meth:`changes_since`, but blocks up to ``timeout`` seconds for something to report."""
+        deadline = time.monotonic() + timeout
+        self.store.refresh()
+        with self._cond:
+            self._follow()
+            try:
+                while True:
+                    events, version, reset = self._since(since)
+                    remaining = deadline - time.monotonic()
+                    if events or reset or remaining <= 0:
+                        return events, version, reset
+                    self._cond.wait(remaining)
+            finally:
+                self._followers -= 1
+
+    def watch(self, wake):
+        """Call ``wake()`` (quickly, from a writer's thread) after every change, until unwatched.
+
+        For async servers, which cannot block in :meth:`wait`; call
+        ``store.refresh()`` first, as :meth:`wait` does. Returns the function
+        that stops watching.
+        """
+        with self._cond:
+            self._watchers.add(wake)
+            self._follow()
+
+        def unwatch():
+            with self._cond:
+                self._watchers.discard(wake)
+                self._followers -= 1
+        return unwatch
+
+    def sse_messages(self, since, heartbeat):
+        """Blocking generator of SSE messages after ``since`` (None: from now), for threaded servers."""
+        since = self.version if since is None else since
+        yield format_sse("ready", {"version": since})
+        while True:
+            events, version, reset = self.wait(since, heartbeat)
+            since, messages = self.messages(events, version, reset, since)
+            yield from messages or [SSE_HEARTBEAT]
+
+    @staticmethod
+    def messages(events, version, reset, since):
+        """``(new since, SSE messages)`` for one :meth:`changes_since` result."""
+        if reset:
+            return version, [format_sse("reset", {"version": version}, version)]
+        if not events:
+            return since, []
+        return events[-1]["version"], [format_sse("change", e, e["version"]) for e in events]
+
+    # ── Cross-process polling ────────────────────────────────────────────────
+
+    def _follow(self):
+        """Count a follower and make sure the poller runs. Caller holds ``_cond``."""
+        self._followers += 1
+        if not self._polling:
+            self._polling = True
+            threading.Thread(target=self._poll, name="change-feed-poller", daemon=True).start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._cond:
+                if not self._followers:
+                    self._polling = False
+                    return
+            try:
+                self.store.refresh()  # delivers other processes' writes to _on_change
+            except Exception:
+                log.exception("change feed refresh failed")
@@ -0,0 +1,533 @@
+"""
+Columnar Store — compact in-memory layout for very large rosters
+The JSON backend (same students.json snapshot, write-ahead log, locking and
+group commit) with the records held as columns instead of one dict per
+student: IDs and names packed end to end in UTF-8 byte pools, company names
+interned into a table and stored as codes, years of experience in an
+``array('H')``. Sort orders are arrays of row numbers. A record becomes a dict
+only when it is read, so a million students take roughly a tenth of the
+memory of the JSON backend.
+
+Filters and aggregates run over whole columns with NumPy when it is installed,
+and fall back to scanning the arrays in Python otherwise.
+
+    STUDENT_STORAGE=columnar python flask_api.py
+"""
+
+import sys
+from array import array
+from collections import Counter
+from itertools import compress
+
+from student_store import JSONStudentStore
+
+try:
+    import numpy
+except ImportError:  # optional: the pure-Python scans give the same answers
+    numpy = None
+
+FIELDS = ("student_id", "student_name", "years_of_experience", "company_name")
+VACUUM_MIN_ROWS = 4096       # dead rows tolerated before a vacuum, however small the roster
+VACUUM_MIN_BYTES = 1 << 20   # overwritten text tolerated likewise
+
+
+def _bisect(rows, target, key, right=False):
+    """Position of ``target`` among ``rows`` ordered by ``key(row)`` (bisect_left, or bisect_right)."""
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        value = key(rows[middle])
+        if value < target or (right and value == target):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class StringColumn:
+    """Strings packed end to end as UTF-8 in one bytearray; row ``i`` is ``(offsets[i], lengths[i])``.
+
+    Overwriting a row appends the new text; the old bytes stay in the pool as
+    :attr:`garbage` until the column is rebuilt with :meth:`take`.
+    """
+
+    __slots__ = ("pool", "offsets", "lengths", "garbage")
+
+    def __init__(self):
+        self.pool = bytearray()
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.garbage = 0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, row):
+        offset = self.offsets[row]
+        return self.pool[offset:offset + self.lengths[row]].decode()
+
+    def append(self, text):
+        data = str(text).encode()
+        self.offsets.append(len(self.pool))
+        self.lengths.append(len(data))
+        self.pool += data
+
+    def __setitem__(self, row, text):
+        data = str(text).encode()
+        self.garbage += self.lengths[row]
+        self.offsets[row] = len(self.pool)
+        self.lengths[row] = len(data)
+        self.pool += data
+
+    def copy(self):
+        column = StringColumn()
+        column.pool, column.garbage = bytearray(self.pool), self.garbage
+        column.offsets, column.lengths = array("Q", self.offsets), array("I", self.lengths)
+        return column
+
+    def take(self, rows):
+        """A new column holding ``rows``, in that order, without garbage."""
+        column = StringColumn()
+        pool, offsets, lengths = self.pool, self.offsets, self.lengths
+        chunks = [pool[offsets[row]:offsets[row] + lengths[row]] for row in rows]
+        column.lengths = array("I", map(len, chunks))
+        position = 0
+        for length in column.lengths:
+            column.offsets.append(position)
+            position += length
+        column.pool = bytearray().join(chunks)
+        return column
+
+    def nbytes(self):
+        return len(self.pool) + self.offsets.itemsize * len(self.offsets) + self.lengths.itemsize * len(self.lengths)
+
+
+class StudentRow:
+    """Read-only view of one row, indexable like a record dict (``row["company_name"]``).
+
+    Only valid while the columns it points into do not change: use it on a
+    :class:`ColumnSnapshot`, or call :meth:`record` for a dict.
+    """
+
+    __slots__ = ("columns", "row")
+
+    def __init__(self, columns, row):
+        self.columns = columns
+        self.row = row
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in FIELDS else default
+
+    @property
+    def student_id(self):
+        return self.columns.ids[self.row]
+
+    @property
+    def student_name(self):
+        return self.columns.names[self.row]
+
+    @property
+    def years_of_experience(self):
+        return self.columns.years[self.row]
+
+    @property
+    def company_name(self):
+        return self.columns.companies[self.columns.company[self.row]]
+
+    def record(self):
+        return self.columns.record(self.row)
+
+
+class StudentColumns:
+    """Students stored column by column, behind the mapping interface the JSON store uses.
+
+    Rows are numbered in insertion order; a delete only marks its row dead
+    (:attr:`alive`), and dead rows are dropped by a vacuum once they make up a
+    quarter of the table. :attr:`by_id` lists the live rows in ``student_id``
+    order, which is how IDs are looked up (binary search). Sort orders for the
+    other fields are built on first use and then kept up to date.
+    """
+
+    def __init__(self, students=()):
+        self.ids = StringColumn()
+        self.names = StringColumn()
+        self.companies = []  # code -> company name
+        self._company_codes = {}  # company name -> code
+        self.company = array("I")  # row -> code
+        self.years = array("H")  # widened to array('q') if a value does not fit
+        self.alive = bytearray()
+        self.count = 0
+        self.by_id = array("I")
+        self._orders = {}  # field -> live rows sorted by (field, student_id)
+        # Duplicate IDs in a snapshot: the last one wins, as in a dict.
+        for student in {s["student_id"]: s for s in students}.values():
+            self._append(student)
+        self.by_id = array("I", sorted(range(len(self.alive)), key=self.ids.__getitem__))
+
+    @classmethod
+    def from_arrays(cls, ids, names, companies, company, years):
+        """Columns over ready-made arrays, with rows already in ``student_id`` order (no duplicates)."""
+        columns = cls()
+        columns.ids, columns.names = ids, names
+        columns.companies = companies
+        columns._company_codes = {name: code for code, name in enumerate(companies)}
+        columns.company, columns.years = company, years
+        columns.count = len(company)
+        columns.alive = bytearray(b"\x01") * columns.count
+        columns.by_id = array("I", range(columns.count))
+        return columns
+
+    # ── Rows ─────────────────────────────────────────────────────────────────
+
+    def record(self, row):
+        return {
+            "student_id": self.ids[row],
+            "student_name": self.names[row],
+            "years_of_experience": self.years[row],
+            "company_name": self.companies[self.company[row]],
+        }
+
+    def _code(self, company_name):
+        company_name = str(company_name)
+        code = self._company_codes.get(company_name)
+        if code is None:
+            code = self._company_codes[company_name] = len(self.companies)
+            self.companies.append(company_name)
+        return code
+
+    def _set_years(self, row, years):
+        try:
+            if row == len(self.years):
+                self.years.append(years)
+            else:
+                self.years[row] = years
+        except OverflowError:
+            self.years = array("q", self.years)
+            self._set_years(row, years)
+
+    def _append(self, student):
+        row = len(self.alive)
+        self.ids.append(student["student_id"])
+        self.names.append(student["student_name"])
+        self.company.append(self._code(student["company_name"]))
+        self._set_years(row, student["years_of_experience"])
+        self.alive.append(1)
+        self.count += 1
+        return row
+
+    def _find(self, student_id):
+        student_id = str(student_id)
+        position = _bisect(self.by_id, student_id, self.ids.__getitem__)
+        if position < len(self.by_id) and self.ids[self.by_id[position]] == student_id:
+            return position
+        return None
+
+    # ── Sort orders ──────────────────────────────────────────────────────────
+
+    def sort_value(self, field):
+        """``row -> value`` of ``field``, as compared when sorting."""
+        if field == "student_id":
+            return self.ids.__getitem__
+        if field == "student_name":
+            return self.names.__getitem__
+        if field == "years_of_experience":
+            return self.years.__getitem__
+        companies, codes = self.companies, self.company
+        return lambda row: companies[codes[row]]
+
+    def _order_key(self, field):
+        if field == "student_id":
+            return self.ids.__getitem__
+        value, ids = self.sort_value(field), self.ids
+        return lambda row: (value(row), ids[row])
+
+    def order(self, field):
+        """Live rows sorted by ``(field, student_id)``."""
+        if field == "student_id":
+            return self.by_id
+        rows = self._orders.get(field)
+        if rows is None:
+            # by_id is already in ID order, so a stable sort on the field alone breaks ties by ID.
+            if numpy is not None and field == "years_of_experience":
+                by_id = numpy.frombuffer(self.by_id, dtype=numpy.uint32)
+                years = numpy.frombuffer(self.years, dtype=self.years.typecode)[by_id]
+                rows = array("I", by_id[numpy.argsort(years, kind="stable")].tobytes())
+            else:
+                rows = array("I", sorted(self.by_id, key=self.sort_value(field)))
+            self._orders[field] = rows
+        return rows
+
+    def _unlink(self, row):
+        """Take ``row`` out of every sort order, using its current values."""
+        for field, rows in (("student_id", self.by_id), *self._orders.items()):
+            key = self._order_key(field)
+            del rows[_bisect(rows, key(row), key)]
+
+    def _link(self, row):
+        for field, rows in (("student_id", self.by_id), *self._orders.items()):
+            key = self._order_key(field)
+            rows.insert(_bisect(rows, key(row), key), row)
+
+    # ── Mapping interface (used by JSONStudentStore) ─────────────────────────
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, student_id):
+        return self._find(student_id) is not None
+
+    def __iter__(self):
+        ids = self.ids
+        return (ids[row] for row in compress(range(len(self.alive)), self.alive))
+
+    def get(self, student_id, default=None):
+        position = self._find(student_id)
+        return default if position is None else self.record(self.by_id[position])
+
+    def __getitem__(self, student_id):
+        student = self.get(student_id)
+        if student is None:
+            raise KeyError(student_id)
+        return student
+
+    def values(self):
+        """Every record, in row (insertion) order."""
+        return (self.record(row) for row in compress(range(len(self.alive)), self.alive))
+
+    def items(self):
+        return ((student["student_id"], student) for student in self.values())
+
+    def __setitem__(self, student_id, student):
+        position = self._find(student_id)
+        if position is None:
+            self._link(self._append(student))
+            return
+        row = self.by_id[position]
+        self._unlink(row)
+        self.names[row] = student["student_name"]
+        self.company[row] = self._code(student["company_name"])
+        self._set_years(row, student["years_of_experience"])
+        self._link(row)
+        self._maybe_vacuum()
+
+    def pop(self, student_id, default=None):
+        position = self._find(student_id)
+        if position is None:
+            return default
+        row = self.by_id[position]
+        student = self.record(row)
+        self._unlink(row)
+        self.alive[row] = 0
+        self.count -= 1
+        self._maybe_vacuum()
+        return student
+
+    def copy(self):
+        """Point-in-time copy of the columns (sort orders other than by ID are not copied)."""
+        copy = StudentColumns.__new__(StudentColumns)
+        copy.ids, copy.names = self.ids.copy(), self.names.copy()
+        copy.companies, copy._company_codes = list(self.companies), dict(self._company_codes)
+        copy.company = array(self.company.typecode, self.company)
+        copy.years = array(self.years.typecode, self.years)
+        copy.alive, copy.count = bytearray(self.alive), self.count
+        copy.by_id, copy._orders = array("I", self.by_id), {}
+        return copy
+
+    # ── Vacuum ───────────────────────────────────────────────────────────────
+
+    def _maybe_vacuum(self):
+        dead = len(self.alive) - self.count
+        garbage = self.ids.garbage + self.names.garbage
+        pooled = len(self.ids.pool) + len(self.names.pool)
+        if dead > max(VACUUM_MIN_ROWS, self.count // 4) or garbage > max(VACUUM_MIN_BYTES, pooled // 2):
+            self.vacuum()
+
+    def vacuum(self):
+        """Drop dead rows and overwritten text, renumbering the live rows (insertion order is kept)."""
+        live = list(compress(range(len(self.alive)), self.alive))
+        renumber = array("I", bytes(4 * len(self.alive)))
+        for new, old in enumerate(live):
+            renumber[old] = new
+        self.ids, self.names = self.ids.take(live), self.names.take(live)
+        self.company = array(self.company.typecode, map(self.company.__getitem__, live))
+        self.years = array(self.years.typecode, map(self.years.__getitem__, live))
+        self.alive = bytearray(b"\x01") * len(live)
+        self.by_id = array("I", map(renumber.__getitem__, self.by_id))
+        self._orders = {field: array("I", map(renumber.__getitem__, rows)) for field, rows in self._orders.items()}
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        """:meth:`BaseStudentStore.query` over the columns."""
+        rows = self.order(sort)
+        if after is None:
+            start, end = 0, len(rows)
+        elif descending:
+            start, end = 0, _bisect(rows, after, self._order_key(sort))
+        else:
+            start, end = _bisect(rows, after, self._order_key(sort), right=True), len(rows)
+
+        if company_name is None and min_experience is None and max_experience is None:
+            if descending:
+                window = rows[start if limit is None else max(start, end - limit):end][::-1]
+            else:
+                window = rows[start:end if limit is None else min(end, start + limit)]
+        elif numpy is not None:
+            candidates = numpy.frombuffer(rows, dtype=numpy.uint32)[start:end]
+            mask = self._mask(company_name, min_experience, max_experience)
+            matched = candidates[mask[candidates]]
+            if descending:
+                matched = matched[::-1]
+            window = (matched if limit is None else matched[:limit]).tolist()
+        else:
+            window = self._scan(rows, start, end, descending, limit,
+                                company_name, min_experience, max_experience)
+        return [self.record(row) for row in window]
+
+    def _mask(self, company_name, min_experience, max_experience):
+        """NumPy boolean array over all rows: True where a row passes every filter."""
+        mask = numpy.ones(len(self.alive), dtype=bool)
+        if company_name is not None:
+            code = self._company_codes.get(company_name)
+            if code is None:
+                return numpy.zeros(len(self.alive), dtype=bool)
+            mask &= numpy.frombuffer(self.company, dtype=numpy.uint32) == code
+        years = numpy.frombuffer(self.years, dtype=self.years.typecode)
+        if min_experience is not None:
+            mask &= years >= min_experience
+        if max_experience is not None:
+            mask &= years <= max_experience
+        return mask
+
+    def _scan(self, rows, start, end, descending, limit, company_name, min_experience, max_experience):
+        code = None
+        if company_name is not None:
+            code = self._company_codes.get(company_name)
+            if code is None:
+                return []
+        low = float("-inf") if min_experience is None else min_experience
+        high = float("inf") if max_experience is None else max_experience
+        company, years = self.company, self.years
+        positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+        window = []
+        for position in positions:
+            row = rows[position]
+            if (code is None or company[row] == code) and low <= years[row] <= high:
+                window.append(row)
+                if len(window) == limit:
+                    break
+        return window
+
+    # ── Aggregates ───────────────────────────────────────────────────────────
+
+    def experience_by_company(self):
+        """``{company name: Counter(years -> students)}`` over the live rows, counted column-wise."""
+        if numpy is not None and self.count:
+            live = numpy.frombuffer(self.alive, dtype=numpy.uint8).astype(bool)
+            codes = numpy.frombuffer(self.company, dtype=numpy.uint32)[live].astype(numpy.int64)
+            years = numpy.frombuffer(self.years, dtype=self.years.typecode)[live].astype(numpy.int64)
+            low = int(years.min())
+            span = int(years.max()) - low + 1
+            keys, counts = numpy.unique(codes * span + (years - low), return_counts=True)
+            pairs = zip((keys // span).tolist(), (keys % span + low).tolist(), counts.tolist())
+        else:
+            pairs = ((code, years, n) for (code, years), n in
+                     Counter(zip(compress(self.company, self.alive), compress(self.years, self.alive))).items())
+        grouped = {}
+        for code, years, n in pairs:
+            grouped.setdefault(self.companies[code], Counter())[years] = n
+        return grouped
+
+    def memory_usage(self):
+        """Bytes held by each column and in total (the company table's strings included)."""
+        columns = {
+            "student_id": self.ids.nbytes(),
+            "student_name": self.names.nbytes(),
+            "company_name": self.company.itemsize * len(self.company) + sys.getsizeof(self.companies)
+            + sys.getsizeof(self._company_codes) + sum(map(sys.getsizeof, self.companies)),
+            "years_of_experience": self.years.itemsize * len(self.years),
+            "row_flags": len(self.alive),
+            "sort_orders": sum(rows.itemsize * len(rows) for rows in (self.by_id, *self._orders.values())),
+        }
+        total = sum(columns.values())
+        return {
+            "students": self.count,
+            "rows": len(self.alive),
+            "columns": columns,
+            "total_bytes": total,
+            "bytes_per_student": round(total / self.count, 1) if self.count else None,
+        }
+
+
+class ColumnSnapshot:
+    """Frozen copy of a store's columns, iterated as :class:`StudentRow` views."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return self.columns.count
+
+    def __iter__(self):
+        columns = self.columns
+        return (StudentRow(columns, row) for row in compress(range(len(columns.alive)), columns.alive))
+
+    def experience_by_company(self):
+        return self.columns.experience_by_company()
+
+
+class ColumnarStudentStore(JSONStudentStore):
+    """:class:`JSONStudentStore` whose records live in a :class:`StudentColumns`.
+
+    Files, versions, locking and change events are unchanged; only the
+    in-memory layout and the read paths differ. :meth:`snapshot` returns a
+    :class:`ColumnSnapshot` instead of a list of dicts, so building the
+    search index or the statistics never materialises the whole roster.
+    """
+
+    def _read_snapshot(self, snapshot_signature):
+        """Columns copied from the binary snapshot (``.snap``) while it is fresh, else parsed from the JSON."""
+        if snapshot_signature is not None:
+            from binary_snapshot import open_fresh  # binary_snapshot imports this module
+            binary = open_fresh(self.binary_path, snapshot_signature[1:])
+            if binary is not None:
+                with binary:
+                    return binary.columns()
+        return super()._read_snapshot(snapshot_signature)
+
+    def _records(self, students):
+        return StudentColumns(students)
+
+    # StudentColumns keeps its own sort orders.
+    def _rebuild_indexes(self):
+        pass
+
+    def _index(self, student):
+        pass
+
+    def _unindex(self, student):
+        pass
+
+    def snapshot(self):
+        self.refresh()
+        with self._rwlock.read():
+            return self.version, ColumnSnapshot(self._students.copy())
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        self.refresh()
+        with self._rwlock.read():  # readers may race to build a sort order, as in the JSON store
+            return self._students.query(company_name, min_experience, max_experience, after, limit,
+                                        sort, descending)
+
+    def memory_usage(self):
+        """Footprint of the in-memory columns; see :meth:`StudentColumns.memory_usage`."""
+        self.refresh()
+        with self._rwlock.read():
+            return self._students.memory_usage()
@@ -3,108 +3,661 @@ Flask REST API — Student Database
 Supports: GET (all & by ID), POST, PUT, DELETE
 """
 
-from flask import Flask, jsonify, request, abort
+from flask import Flask, Response, jsonify, request, abort, g
+import base64
+import csv
+import io
 import json
+import math
 import os
+import time
+import zlib
+
+import metrics
+from admission import (Admission, DEFAULT_RATE_LIMITS, MemoryBuckets, SQLiteBuckets, WRITE_METHODS, WriteGate,
+                       client_key, parse_limits, retry_after)
+from change_feed import ChangeFeed
+from response_cache import ResponseCache
+from roster_stats import RosterStats
+from search_index import SearchIndex
+from student_schema import STUDENT_FIELDS, ValidationError, validate_operation, validate_student, validate_update
+from student_store import open_store, sort_key, PreconditionFailed, SORT_FIELDS, StudentExists, StudentNotFound
 
 app = Flask(__name__)
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "students.json")
+# ── Config ───────────────────────────────────────────────────────────────────
+# STUDENT_STORAGE picks the backend: "json" (students.json + write-ahead log),
+# "sqlite" (students.db, seeded from students.json on first run),
+# "columnar" (the JSON backend's files, with a compact in-memory layout) or
+# "shared" (the JSON backend's files, reading one mmapped students.snap that
+# every worker process shares).
+STORAGE_BACKEND = os.environ.get("STUDENT_STORAGE", "json")
+DATA_FILE = os.environ.get("STUDENT_DATA_FILE", os.path.join(os.path.dirname(__file__), "students.json"))
+DB_FILE = os.environ.get("STUDENT_DB_FILE", os.path.join(os.path.dirname(__file__), "students.db"))
+
+store = metrics.TimedStore(open_store(STORAGE_BACKEND, DATA_FILE, DB_FILE))
+# Encoded GET bodies keyed by URL + ETag; see response_cache.py.
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_ENTRIES", 4096)),
+    max_bytes=int(os.environ.get("RESPONSE_CACHE_MB", 64)) * 1024 * 1024,
+)
+# Token index for GET /students/search and running aggregates for GET
+# /students/stats; each is built on first use, then follows the store's writes.
+search_index = SearchIndex(store)
+roster_stats = RosterStats(store)
+# Recent writes for GET /students/changes (SSE or long-poll).
+change_feed = ChangeFeed(store, capacity=int(os.environ.get("CHANGE_FEED_SIZE", 10000)))
+
+# Admission control (see admission.py). RATE_LIMITS sets per-client token
+# buckets per route ("off" turns them off). They are kept per process unless
+# RATE_LIMIT_DB names an SQLite file for all workers to share. At most
+# WRITE_CONCURRENCY writes run at once per process; the next writer waits
+# WRITE_QUEUE_TIMEOUT seconds for a slot, then gets a 503. TRUST_PROXY_HEADERS=1
+# identifies clients by X-Forwarded-For (only behind a proxy that sets it).
+RATE_LIMIT_DB = os.environ.get("RATE_LIMIT_DB")
+admission = Admission(
+    parse_limits(os.environ.get("RATE_LIMITS", DEFAULT_RATE_LIMITS)),
+    SQLiteBuckets(RATE_LIMIT_DB) if RATE_LIMIT_DB else MemoryBuckets(),
+    WriteGate(int(os.environ.get("WRITE_CONCURRENCY", 32)), float(os.environ.get("WRITE_QUEUE_TIMEOUT", 1.0))),
+    trust_proxy=os.environ.get("TRUST_PROXY_HEADERS") == "1",
+)
+
+MAX_PAGE_SIZE = 1000
+MAX_BULK_ITEMS = 10000
+EXPORT_PAGE_SIZE = 500
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DEFAULT_SEARCH_RESULTS = 10
+MAX_SEARCH_RESULTS = 50
+DEFAULT_STATS_COMPANIES = 20
+MAX_STATS_COMPANIES = 1000
+DEFAULT_LONG_POLL = 25   # seconds a long-poll waits for changes
+MAX_LONG_POLL = 60
+SSE_HEARTBEAT = 15       # seconds between keep-alive comments on an idle stream
+
+# SLOW_REQUEST_PROFILE_MS=250 samples the stacks of requests slower than 250 ms
+# and logs where they spent their time (see metrics.SlowRequestProfiler).
+SLOW_REQUEST_PROFILE_MS = os.environ.get("SLOW_REQUEST_PROFILE_MS")
+profiler = metrics.SlowRequestProfiler(int(SLOW_REQUEST_PROFILE_MS) / 1000) if SLOW_REQUEST_PROFILE_MS else None
+
+metrics.registry.register(metrics.Callback(
+    "student_api_students", "Students currently stored.", lambda: len(store)))
+metrics.registry.register(metrics.Callback(
+    "student_api_data_version", "Data version, bumped by every write.", lambda: store.version))
+metrics.registry.register(metrics.Callback(
+    "student_api_response_cache_hits_total", "GET responses served from the response cache.",
+    lambda: response_cache.hits, kind="counter"))
+metrics.registry.register(metrics.Callback(
+    "student_api_response_cache_misses_total", "GET responses that had to be encoded.",
+    lambda: response_cache.misses, kind="counter"))
+metrics.registry.register(metrics.Callback(
+    "student_api_search_tokens", "Distinct tokens in the search index.", lambda: len(search_index)))
+metrics.registry.register(metrics.Callback(
+    "student_api_writes_in_flight", "Write requests holding a write-gate slot.", lambda: admission.gate.in_flight))
+if hasattr(store, "memory_usage"):
+    metrics.registry.register(metrics.Callback(
+        "student_api_store_memory_bytes", "Bytes held by the store's in-memory columns.",
+        lambda: store.memory_usage()["total_bytes"]))
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
-def load_students():
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
-
+def encode_cursor(after, sort="student_id", descending=False):
+    """Opaque pagination cursor pointing just past the record whose sort key is ``after``."""
+    payload = {"after": after}
+    if sort != "student_id":
+        payload["sort"] = sort
+    if descending:
+        payload["desc"] = True
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor, sort="student_id", descending=False):
+    """The ``after`` key of a cursor; it must come from a listing with the same sort and order."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = payload["after"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor") from None
+    if payload.get("sort", "student_id") != sort or payload.get("desc", False) != descending:
+        raise ValueError("Cursor was issued for a different sort order")
+    if sort == "student_id":
+        if not isinstance(after, str):
+            raise ValueError("Invalid cursor")
+        return after
+    value_type = int if sort == "years_of_experience" else str
+    if (not isinstance(after, list) or len(after) != 2 or not isinstance(after[0], value_type)
+            or not isinstance(after[1], str)):
+        raise ValueError("Invalid cursor")
+    return tuple(after)
+
+
+def _int_arg(args, name, minimum=None, maximum=None):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer") from None
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"'{name}' must be between {minimum} and {maximum}")
+    return value
+
+
+def parse_list_args(args):
+    """Turn GET /students query parameters into ``store.query()`` arguments.
+
+    Returns ``(query, limit, fields)``; raises ValueError with a message fit
+    for a 400 response.
+    """
+    sort = args.get("sort") or "student_id"
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"'sort' must be one of {list(SORT_FIELDS)}")
+    order = args.get("order") or "asc"
+    if order not in ("asc", "desc"):
+        raise ValueError("'order' must be 'asc' or 'desc'")
+    descending = order == "desc"
+    query = {
+        "company_name":   args.get("company_name") or None,
+        "min_experience": _int_arg(args, "min_experience"),
+        "max_experience": _int_arg(args, "max_experience"),
+        "after":          decode_cursor(args["cursor"], sort, descending) if args.get("cursor") else None,
+        "sort":           sort,
+        "descending":     descending,
+    }
+    limit = _int_arg(args, "limit", minimum=1, maximum=MAX_PAGE_SIZE)
+    fields = None
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in STUDENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}")
+    return query, limit, fields
+
+
+def parse_search_args(args):
+    """``(query text, limit)`` from GET /students/search parameters; ValueError for a 400."""
+    text = (args.get("q") or "").strip()
+    if not text:
+        raise ValueError("'q' is required")
+    limit = _int_arg(args, "limit", minimum=1, maximum=MAX_SEARCH_RESULTS)
+    return text, limit or DEFAULT_SEARCH_RESULTS
+
+
+def run_search(text, limit):
+    """Ranked matches for ``text``, each student with its ``score``."""
+    with metrics.phase("search"):
+        hits = search_index.search(text, limit)
+    results = []
+    for student_id, score in hits:
+        student = store.get(student_id)
+        if student:  # deleted since the lookup
+            results.append({**student, "score": score})
+    return results
+
+
+def parse_stats_args(args):
+    """``roster_stats.stats()`` arguments from GET /students/stats parameters; ValueError for a 400."""
+    top = _int_arg(args, "top", minimum=1, maximum=MAX_STATS_COMPANIES)
+    return {"company_name": args.get("company_name") or None, "top": top or DEFAULT_STATS_COMPANIES}
+
+
+def parse_changes_args(args, last_event_id=None):
+    """``(since, timeout)`` from GET /students/changes parameters; ValueError for a 400.
+
+    An SSE client reconnecting sends ``Last-Event-ID``, which stands in for ``since``.
+    """
+    since = _int_arg(args, "since", minimum=0)
+    if since is None and last_event_id:
+        since = _int_arg({"Last-Event-ID": last_event_id}, "Last-Event-ID", minimum=0)
+    timeout = _int_arg(args, "timeout", minimum=0, maximum=MAX_LONG_POLL)
+    return since, DEFAULT_LONG_POLL if timeout is None else timeout
+
+
+def rate_limited_payload(method, route, wait):
+    return {"status": "error",
+            "message": f"Rate limit for {method} {route} exceeded; retry in {retry_after(wait)} s"}
+
+
+OVERLOADED_PAYLOAD = {"status": "error", "message": "Too many writes in progress; try again shortly"}
+
+
+def changes_payload(events, version, reset):
+    return {"status": "success", "version": version, "reset": reset, "count": len(events), "events": events}
+
+
+def read_ndjson(lines, limit=None):
+    """Decode an NDJSON stream; undecodable lines become ValidationError items.
+
+    Stops reading after ``limit + 1`` items, enough to tell the body is too long.
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(ValidationError(message=f"Invalid JSON on line {number}"))
+        if limit is not None and len(items) > limit:
+            break
+    return items
+
+
+def run_bulk(items):
+    """Validate every item, apply the valid ones in one storage commit, and report per item."""
+    results, operations, positions = [], [], []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, ValidationError):
+                raise item
+            operation = validate_operation(item)
+        except ValidationError as e:
+            results.append({"index": index, "status": 400, "message": str(e), "errors": e.errors})
+        else:
+            results.append(None)
+            operations.append(operation)
+            positions.append(index)
+
+    outcomes = store.apply(operations) if operations else []
+    messages = {"create": "Student created", "update": "Student updated", "delete": "Student deleted"}
+    for index, operation, outcome in zip(positions, operations, outcomes):
+        op = operation["op"]
+        student_id = operation["data"]["student_id"] if op == "create" else operation["student_id"]
+        result = {"index": index, "op": op, "student_id": student_id}
+        if isinstance(outcome, StudentExists):
+            result.update(status=409, message=str(outcome))
+        elif isinstance(outcome, StudentNotFound):
+            result.update(status=404, message=str(outcome))
+        else:
+            result.update(status=201 if op == "create" else 200, message=messages[op])
+        results[index] = result
+    return results
+
+
+def list_students(query, limit, fields):
+    """One page of students plus the cursor for the next page (None at the end)."""
+    students = store.query(**query, limit=None if limit is None else limit + 1)
+    next_cursor = None
+    if limit is not None and len(students) > limit:
+        students = students[:limit]
+        next_cursor = encode_cursor(sort_key(students[-1], query["sort"]), query["sort"], query["descending"])
+    if fields:
+        students = [{f: s[f] for f in fields} for s in students]
+    return students, next_cursor
+
+
+def iter_students(query, fields=None, page_size=EXPORT_PAGE_SIZE):
+    """Yield matching students page by page, so memory stays flat for any roster size."""
+    query = dict(query)
+    while True:
+        page = store.query(**query, limit=page_size)
+        for student in page:
+            yield {f: student[f] for f in fields} if fields else student
+        if len(page) < page_size:
+            return
+        query["after"] = sort_key(page[-1], query["sort"])
+
+
+def export_chunks(students, fmt, fields=None, chunk_size=EXPORT_PAGE_SIZE):
+    """Encode students as NDJSON or CSV, yielding one chunk per ``chunk_size`` records."""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=fields or STUDENT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(student):
+            buffer.write(json.dumps(student) + "\n")
+    for n, student in enumerate(students, start=1):
+        write(student)
+        if n % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# ── Conditional requests ─────────────────────────────────────────────────────
+# Validators are read after catching up with other workers' writes and *before*
+# the data, so a concurrent write can only make an ETag look older than its body
+# (a harmless extra 200), never newer (a stale 304). Without the refresh the
+# in-memory version lags the files until something else reads the store, and an
+# old If-None-Match would still match after another worker's write.
+
+def collection_etag(query_string):
+    """Strong ETag for one GET /students URL: data generation, data version and the query."""
+    store.refresh()
+    return f"c{store.generation:x}.{store.version}.{zlib.crc32(query_string):x}"
+
+
+def record_validators(student_id):
+    """``(generation, version)`` of one record, current with every worker's writes; version is None if absent."""
+    store.refresh()
+    return store.generation, store.record_version(student_id)
+
+
+def record_etag(generation, version):
+    return f"r{generation:x}.{version}"
+
+
+def http_last_modified():
+    """Last-Modified in whole seconds, or None while a write could still land in the same second.
+
+    Read it after :func:`collection_etag` or :func:`record_validators`, which refresh the store.
+    """
+    seconds = math.ceil(store.last_modified)
+    return seconds if 0 < seconds <= time.time() else None
+
+
+def is_not_modified(etag, last_modified):
+    """True if the client's If-None-Match / If-Modified-Since still matches."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since.timestamp()
+
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def if_match_version(student_id):
+    """Translate If-Match into a store ``if_version``.
+
+    Returns ``(if_version, matched)``; ``matched`` is False when the header names
+    a different version of the record. A missing record is left to the store.
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return None, True
+    generation, version = record_validators(student_id)
+    if version is None:
+        return None, True
+    return version, request.if_match.contains(record_etag(generation, version))
+
+
+def cached_json(etag, last_modified, build):
+    """200 response for the current URL from the response cache, encoding ``build()`` on a miss.
+
+    The key holds the ETag, so entries for older data versions are never served.
+    Returns None if ``build()`` does.
+    """
+    key = (request.path, request.query_string, etag)
+    entry = response_cache.get(key)
+    if entry is None:
+        payload = build()
+        if payload is None:
+            return None
+        with metrics.phase("serialize"):
+            entry = response_cache.put(key, payload)
+    body, encoding = entry.encoded(request.accept_encodings)
+    response = Response(body, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+    return with_validators(response, etag, last_modified)
+
+
+# ── Instrumentation ──────────────────────────────────────────────────────────
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    metrics.current_route.set(request.url_rule.rule if request.url_rule else "unmatched")
+    if profiler:
+        profiler.start(f"{request.method} {request.full_path}")
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.record_request(request.method, route, response.status_code,
+                           time.perf_counter() - g.started, request.content_length,
+                           None if response.is_streamed else response.content_length)
+    return response
+
+
+@app.teardown_request
+def finish_request_profile(exc):
+    if profiler:
+        profiler.finish()
 
-def save_students(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
 
+# ── Admission control ────────────────────────────────────────────────────────
 
-def find_student(students, student_id):
-    return next((s for s in students if s["student_id"] == student_id), None)
+@app.before_request
+def admit_request():
+    """429 if the client is over this route's rate limit; for writes, wait for a write-gate slot or 503."""
+    if request.url_rule is None:
+        return None
+    route = request.url_rule.rule
+    client = client_key(request.remote_addr, request.headers.get("X-Forwarded-For"), admission.trust_proxy)
+    wait = admission.rate_wait(request.method, route, client)
+    if wait:
+        return jsonify(rate_limited_payload(request.method, route, wait)), 429, {"Retry-After": retry_after(wait)}
+    if request.method in WRITE_METHODS:
+        if not admission.gate.enter():
+            return jsonify(OVERLOADED_PAYLOAD), 503, {"Retry-After": retry_after(admission.gate.max_wait)}
+        g.write_slot = True
+    return None
+
+
+@app.teardown_request
+def release_write_slot(exc):
+    if g.pop("write_slot", False):
+        admission.gate.leave()
 
 
 # ── Routes ───────────────────────────────────────────────────────────────────
 
 @app.route("/students", methods=["GET"])
 def get_all_students():
-    """GET /students — Return all students."""
-    students = load_students()
-    return jsonify({"status": "success", "count": len(students), "data": students}), 200
+    """GET /students — Return students, optionally filtered, projected and paged.
+
+    Query parameters: limit, cursor, fields, sort, order, company_name, min_experience, max_experience.
+    """
+    try:
+        query, limit, fields = parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    etag, last_modified = collection_etag(request.query_string), http_last_modified()
+    if is_not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    def build():
+        students, next_cursor = list_students(query, limit, fields)
+        return {"status": "success", "count": len(students), "data": students, "next_cursor": next_cursor}
+    return cached_json(etag, last_modified, build), 200
+
+
+@app.route("/students/search", methods=["GET"])
+def search_students():
+    """GET /students/search?q=<text> — Rank students whose ID, name or company match.
+
+    Every word must match the start of a word in the record; limit= caps the results.
+    """
+    try:
+        text, limit = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    etag, last_modified = collection_etag(request.query_string), http_last_modified()
+    if is_not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    def build():
+        results = run_search(text, limit)
+        return {"status": "success", "count": len(results), "data": results}
+    return cached_json(etag, last_modified, build), 200
+
+
+@app.route("/students/stats", methods=["GET"])
+def get_stats():
+    """GET /students/stats — Headcount per company and the experience distribution.
+
+    Query parameters: top (companies listed, default 20), company_name (experience for one company).
+    """
+    try:
+        options = parse_stats_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    etag, last_modified = collection_etag(request.query_string), http_last_modified()
+    if is_not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    def build():
+        with metrics.phase("aggregate"):
+            return {"status": "success", "data": roster_stats.stats(**options)}
+    return cached_json(etag, last_modified, build), 200
+
+
+@app.route("/students/changes", methods=["GET"])
+def get_changes():
+    """GET /students/changes — Follow creates, updates and deletes instead of polling.
+
+    With ``Accept: text/event-stream`` this is an SSE stream. Otherwise it is a
+    long-poll: answers as soon as there are changes after ``since`` (or after
+    ``timeout`` seconds with none). Without ``since`` it returns the current
+    version to start from.
+    """
+    try:
+        since, timeout = parse_changes_args(request.args, request.headers.get("Last-Event-ID"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if request.accept_mimetypes.best == "text/event-stream":
+        return Response(change_feed.sse_messages(since, SSE_HEARTBEAT), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    if since is None:
+        return jsonify(changes_payload([], change_feed.version, False)), 200
+    return jsonify(changes_payload(*change_feed.wait(since, timeout))), 200
+
+
+@app.route("/students/export", methods=["GET"])
+def export_students():
+    """GET /students/export?format=ndjson|csv — Stream the roster as a download.
+
+    Accepts the same filters and fields= projection as GET /students.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": f"'format' must be one of {list(EXPORT_FORMATS)}"}), 400
+    try:
+        query, _, fields = parse_list_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return Response(
+        export_chunks(iter_students(query, fields), fmt, fields),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=students.{fmt}"},
+    )
 
 
 @app.route("/students/<student_id>", methods=["GET"])
 def get_student(student_id):
     """GET /students/<id> — Return a single student."""
-    students = load_students()
-    student = find_student(students, student_id)
-    if not student:
+    generation, version = record_validators(student_id)
+    if version is None:
         return jsonify({"status": "error", "message": f"Student '{student_id}' not found"}), 404
-    return jsonify({"status": "success", "data": student}), 200
+    etag, last_modified = record_etag(generation, version), http_last_modified()
+    if is_not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    def build():
+        student = store.get(student_id)
+        return {"status": "success", "data": student} if student else None
+    response = cached_json(etag, last_modified, build)
+    if response is None:  # deleted since we read its version
+        return jsonify({"status": "error", "message": f"Student '{student_id}' not found"}), 404
+    return response, 200
 
 
 @app.route("/students", methods=["POST"])
 def create_student():
     """POST /students — Create a new student."""
-    students = load_students()
-    body = request.get_json(silent=True)
+    try:
+        new_student = validate_student(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify({"status": "error", "message": str(e), "errors": e.errors}), 400
+
+    try:
+        store.create(new_student)
+    except StudentExists as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    return jsonify({"status": "success", "message": "Student created", "data": new_student}), 201
 
-    if not body:
-        return jsonify({"status": "error", "message": "Request body must be JSON"}), 400
 
-    required = ["student_id", "student_name", "years_of_experience", "company_name"]
-    missing = [f for f in required if f not in body]
-    if missing:
-        return jsonify({"status": "error", "message": f"Missing fields: {missing}"}), 400
+@app.route("/students/_bulk", methods=["POST"])
+def bulk_students():
+    """POST /students/_bulk — Apply many creates/updates/deletes in one commit.
 
-    if find_student(students, body["student_id"]):
-        return jsonify({"status": "error", "message": f"Student ID '{body['student_id']}' already exists"}), 409
+    Body: a JSON array of operations, or NDJSON (Content-Type: application/x-ndjson)
+    with one operation per line, e.g. {"op": "update", "student_id": "STU001", "data": {...}}.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        items = read_ndjson(request.stream, MAX_BULK_ITEMS)
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({"status": "error", "message": "Request body must be a JSON array or NDJSON"}), 400
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({"status": "error", "message": f"At most {MAX_BULK_ITEMS} operations per request"}), 413
 
-    new_student = {
-        "student_id":          body["student_id"],
-        "student_name":        body["student_name"],
-        "years_of_experience": int(body["years_of_experience"]),
-        "company_name":        body["company_name"],
-    }
-    students.append(new_student)
-    save_students(students)
-    return jsonify({"status": "success", "message": "Student created", "data": new_student}), 201
+    results = run_bulk(items)
+    succeeded = sum(1 for r in results if r["status"] < 300)
+    return jsonify({
+        "status": "success", "count": len(results),
+        "succeeded": succeeded, "failed": len(results) - succeeded,
+        "results": results,
+    }), 200
 
 
 @app.route("/students/<student_id>", methods=["PUT"])
 def update_student(student_id):
-    """PUT /students/<id> — Update an existing student (full replace)."""
-    students = load_students()
-    student = find_student(students, student_id)
-    if not student:
-        return jsonify({"status": "error", "message": f"Student '{student_id}' not found"}), 404
-
-    body = request.get_json(silent=True)
-    if not body:
-        return jsonify({"status": "error", "message": "Request body must be JSON"}), 400
+    """PUT /students/<id> — Update an existing student (full replace).
 
-    student["student_name"]        = body.get("student_name",        student["student_name"])
-    student["years_of_experience"] = int(body.get("years_of_experience", student["years_of_experience"]))
-    student["company_name"]        = body.get("company_name",        student["company_name"])
+    Send If-Match with the record's ETag to update only if nobody changed it since.
+    """
+    if not store.get(student_id):
+        return jsonify({"status": "error", "message": f"Student '{student_id}' not found"}), 404
 
-    save_students(students)
+    try:
+        fields = validate_update(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify({"status": "error", "message": str(e), "errors": e.errors}), 400
+
+    if_version, matched = if_match_version(student_id)
+    if not matched:
+        return jsonify({"status": "error", "message": f"Student '{student_id}' was modified by someone else"}), 412
+    try:
+        student = store.update(student_id, fields, if_version=if_version)
+    except StudentNotFound as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except PreconditionFailed as e:
+        return jsonify({"status": "error", "message": str(e)}), 412
     return jsonify({"status": "success", "message": "Student updated", "data": student}), 200
 
 
 @app.route("/students/<student_id>", methods=["DELETE"])
 def delete_student(student_id):
-    """DELETE /students/<id> — Delete a student."""
-    students = load_students()
-    student = find_student(students, student_id)
-    if not student:
-        return jsonify({"status": "error", "message": f"Student '{student_id}' not found"}), 404
-
-    students.remove(student)
-    save_students(students)
+    """DELETE /students/<id> — Delete a student (honours If-Match like PUT)."""
+    if_version, matched = if_match_version(student_id)
+    if not matched:
+        return jsonify({"status": "error", "message": f"Student '{student_id}' was modified by someone else"}), 412
+    try:
+        store.delete(student_id, if_version=if_version)
+    except StudentNotFound as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except PreconditionFailed as e:
+        return jsonify({"status": "error", "message": str(e)}), 412
     return jsonify({"status": "success", "message": f"Student '{student_id}' deleted"}), 200
 
 
@@ -115,5 +668,19 @@ def health():
     return jsonify({"status": "ok", "message": "Flask API is running"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """GET /metrics — Request and storage timings in the Prometheus text format."""
+    return Response(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.route("/metrics/slow", methods=["GET"])
+def get_slow_requests():
+    """GET /metrics/slow — Stack samples of recent slow requests (needs SLOW_REQUEST_PROFILE_MS)."""
+    if not profiler:
+        return jsonify({"status": "error", "message": "Slow-request profiler is off; set SLOW_REQUEST_PROFILE_MS"}), 404
+    return jsonify({"status": "success", "data": list(profiler.profiles)}), 200
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,290 @@
+"""
+Metrics — in-process request instrumentation for the Student API
+Histograms and counters rendered in the Prometheus text format, a per-phase
+timer (storage read / storage write / serialization) keyed by the route being
+served, a store wrapper that times every storage call, and an opt-in sampling
+profiler that captures stacks of requests running longer than a threshold.
+
+Recording is a perf_counter pair, a bisect and a short lock hold, so it is
+cheap enough to leave on all the time.
+"""
+
+import bisect
+import contextvars
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as _StackCounter, deque
+from contextlib import contextmanager
+
+# Seconds; roughly ×2.5 steps from 0.5 ms to 10 s.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route of the request being served on this thread / task, for phase labels.
+current_route = contextvars.ContextVar("current_route", default="-")
+
+log = logging.getLogger("student_api.metrics")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Callback:
+    """Single value read from ``fn()`` at scrape time, e.g. a count the app already keeps."""
+
+    def __init__(self, name, help, fn, kind="gauge"):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {self.fn()}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition (format 0.0.4) of every registered metric."""
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_seconds = registry.register(Histogram(
+    "student_api_request_duration_seconds", "Time to handle a request.", ("method", "route")))
+phase_seconds = registry.register(Histogram(
+    "student_api_phase_duration_seconds", "Time spent in one phase of a request.", ("route", "phase")))
+responses_total = registry.register(Counter(
+    "student_api_responses_total", "Responses sent, by status code.", ("method", "route", "status")))
+request_bytes_total = registry.register(Counter(
+    "student_api_request_bytes_total", "Request body bytes received.", ("method", "route")))
+response_bytes_total = registry.register(Counter(
+    "student_api_response_bytes_total", "Response body bytes sent (streamed bodies excluded).", ("method", "route")))
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as phase ``name`` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_seconds.observe((current_route.get(), name), time.perf_counter() - start)
+
+
+def record_request(method, route, status, seconds, request_bytes, response_bytes):
+    request_seconds.observe((method, route), seconds)
+    responses_total.inc((method, route, str(status)))
+    if request_bytes:
+        request_bytes_total.inc((method, route), request_bytes)
+    if response_bytes is not None:
+        response_bytes_total.inc((method, route), response_bytes)
+
+
+# ── Timed store ──────────────────────────────────────────────────────────────
+
+class TimedStore:
+    """Wraps a student store so each call is recorded as a storage_read or storage_write phase.
+
+    Everything not listed here (version, compact(), …) passes straight through.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def __len__(self):
+        with phase("storage_read"):
+            return len(self.store)
+
+    def refresh(self):
+        # Replaying other workers' log entries, or reloading after their compaction.
+        with phase("storage_read"):
+            return self.store.refresh()
+
+    def snapshot(self):
+        with phase("storage_read"):
+            return self.store.snapshot()
+
+    def all(self):
+        with phase("storage_read"):
+            return self.store.all()
+
+    def get(self, student_id):
+        with phase("storage_read"):
+            return self.store.get(student_id)
+
+    def record_version(self, student_id):
+        with phase("storage_read"):
+            return self.store.record_version(student_id)
+
+    def query(self, **kwargs):
+        with phase("storage_read"):
+            return self.store.query(**kwargs)
+
+    def apply(self, operations):
+        with phase("storage_write"):
+            return self.store.apply(operations)
+
+    def create(self, student):
+        with phase("storage_write"):
+            return self.store.create(student)
+
+    def update(self, student_id, fields, if_version=None):
+        with phase("storage_write"):
+            return self.store.update(student_id, fields, if_version=if_version)
+
+    def delete(self, student_id, if_version=None):
+        with phase("storage_write"):
+            return self.store.delete(student_id, if_version=if_version)
+
+
+# ── Slow-request profiler ────────────────────────────────────────────────────
+
+class SlowRequestProfiler:
+    """Samples the stacks of requests that run past ``threshold`` seconds.
+
+    A daemon thread wakes every ``interval`` seconds and, for each in-flight
+    request older than the threshold, records its thread's current stack via
+    ``sys._current_frames()``. Fast requests are never sampled, so the cost is
+    one dict insert and delete per request. When a sampled request finishes its
+    most frequent stacks are logged and kept in :attr:`profiles`.
+
+    A request is sampled in the thread that started it, unless it is started
+    with a ``key``: then only threads that :meth:`attach` to that key are
+    sampled, which lets an async server follow a request into its worker threads.
+    """
+
+    def __init__(self, threshold, interval=0.005, keep=20, depth=12):
+        self.threshold = threshold
+        self.interval = interval
+        self.depth = depth
+        self.profiles = deque(maxlen=keep)
+        self._active = {}  # thread id or key -> [start, label, stack counter, thread ids sampled]
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="slow-request-profiler", daemon=True).start()
+
+    def start(self, label, key=None):
+        threads = set()
+        if key is None:
+            key = threading.get_ident()
+            threads.add(key)
+        with self._lock:
+            self._active[key] = [time.perf_counter(), label, None, threads]
+
+    def attach(self, key):
+        """Sample the calling thread as part of request ``key`` until :meth:`detach`."""
+        with self._lock:
+            entry = self._active.get(key)
+            if entry is not None:
+                entry[3].add(threading.get_ident())
+
+    def detach(self, key):
+        with self._lock:
+            entry = self._active.get(key)
+            if entry is not None:
+                entry[3].discard(threading.get_ident())
+
+    def finish(self, key=None):
+        with self._lock:
+            started, label, stacks, _ = self._active.pop(threading.get_ident() if key is None else key,
+                                                         (0, None, None, None))
+        if not stacks:
+            return
+        elapsed = time.perf_counter() - started
+        top = stacks.most_common(5)
+        profile = {"request": label, "seconds": round(elapsed, 4), "samples": sum(stacks.values()),
+                   "stacks": [{"count": n, "stack": list(stack)} for stack, n in top]}
+        self.profiles.append(profile)
+        log.warning("slow request %s took %.3fs; hottest stack (%d/%d samples):\n  %s", label, elapsed,
+                    top[0][1], profile["samples"], "\n  ".join(top[0][0]))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [(key, tid) for key, (started, _, _, threads) in self._active.items()
+                        if now - started >= self.threshold for tid in threads]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for key, tid in slow:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = tuple(f"{fs.filename}:{fs.lineno} {fs.name}"
+                              for fs in traceback.extract_stack(frame, limit=self.depth))
+                with self._lock:
+                    entry = self._active.get(key)
+                    if entry is not None:
+                        if entry[2] is None:
+                            entry[2] = _StackCounter()
+                        entry[2][stack] += 1
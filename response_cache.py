@@ -0,0 +1,109 @@
+"""
+Response Cache — ready-encoded JSON response bodies for the read endpoints
+Keys include the response's ETag, so a write (which changes the data version)
+simply makes old entries unreachable; they age out of the LRU. Compressed
+variants are built on first demand and stored next to the plain bytes.
+
+Uses orjson for encoding when it is installed, the standard library otherwise.
+"""
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024  # smaller bodies aren't worth the CPU or the header
+
+
+def dumps(obj):
+    """Encode ``obj`` as compact JSON bytes with sorted keys, like ``jsonify``."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+class CachedBody:
+    """One encoded response body and its compressed variants."""
+
+    __slots__ = ("identity", "gzip", "br")
+
+    def __init__(self, identity):
+        self.identity = identity
+        self.gzip = None
+        self.br = None
+
+    def encoded(self, accept_encodings):
+        """Return ``(body bytes, content-encoding or None)`` for the client's Accept-Encoding."""
+        if len(self.identity) < MIN_COMPRESS_SIZE:
+            return self.identity, None
+        if brotli is not None and accept_encodings["br"]:
+            if self.br is None:
+                self.br = brotli.compress(self.identity, quality=5)
+            return self.br, "br"
+        if accept_encodings["gzip"]:
+            if self.gzip is None:
+                self.gzip = gzip.compress(self.identity, compresslevel=6)
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+class ResponseCache:
+    """Thread-safe LRU of :class:`CachedBody`, bounded by entry count and bytes.
+
+    Byte accounting counts the plain body only; compressed variants are a
+    fraction of it.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, payload):
+        """Encode ``payload`` and cache it under ``key``; returns the :class:`CachedBody`."""
+        entry = CachedBody(dumps(payload))
+        size = len(entry.identity)
+        if size > self.max_bytes // 4:  # e.g. an unpaged listing of a huge roster
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.identity)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.identity)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
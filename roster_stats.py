@@ -0,0 +1,124 @@
+"""
+Roster Stats — running aggregates behind GET /students/stats
+Headcount per company and the distribution of years_of_experience, overall
+and per company, kept as counters that each create, update or delete adjusts
+by one student. Summaries (mean, min/max, percentiles) are read off the
+histogram, whose size is the number of distinct experience values, never the
+number of students.
+"""
+
+import math
+from collections import Counter
+
+from student_store import StoreView
+
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def _percentile(histogram, total, p):
+    """Nearest-rank percentile of a ``value -> count`` histogram holding ``total`` values."""
+    rank = max(1, math.ceil(p / 100 * total))
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return None
+
+
+def summarize(histogram):
+    """Count, min/max, mean, percentiles and the histogram itself, for one experience histogram."""
+    total = sum(histogram.values())
+    if not total:
+        return {"count": 0, "min": None, "max": None, "mean": None,
+                "percentiles": {f"p{p}": None for p in PERCENTILES}, "histogram": []}
+    return {
+        "count": total,
+        "min": min(histogram),
+        "max": max(histogram),
+        "mean": round(sum(value * n for value, n in histogram.items()) / total, 3),
+        "percentiles": {f"p{p}": _percentile(histogram, total, p) for p in PERCENTILES},
+        "histogram": [{"years": value, "count": histogram[value]} for value in sorted(histogram)],
+    }
+
+
+class RosterStats(StoreView):
+    """Incrementally maintained headcounts and experience histograms for a store."""
+
+    def __init__(self, store):
+        self._experience = Counter()  # years -> students
+        self._by_company = {}  # company -> [students, sum of years, Counter(years -> students)]
+        super().__init__(store)
+
+    # ── Maintenance (StoreView) ──────────────────────────────────────────────
+
+    def _clear(self):
+        self._experience = Counter()
+        self._by_company = {}
+
+    def _load(self, records):
+        grouped = getattr(records, "experience_by_company", None)
+        if grouped is None:
+            super()._load(records)
+            return
+        # Columnar snapshot: the store histograms its columns in one pass.
+        self._clear()
+        for company_name, histogram in grouped().items():
+            self._by_company[company_name] = [sum(histogram.values()),
+                                              sum(years * n for years, n in histogram.items()), histogram]
+            self._experience.update(histogram)
+
+    def _add(self, student):
+        years = student["years_of_experience"]
+        self._experience[years] += 1
+        company = self._by_company.get(student["company_name"])
+        if company is None:
+            company = self._by_company[student["company_name"]] = [0, 0, Counter()]
+        company[0] += 1
+        company[1] += years
+        company[2][years] += 1
+
+    def _remove(self, student):
+        years = student["years_of_experience"]
+        self._decrement(self._experience, years)
+        company = self._by_company.get(student["company_name"])
+        if company is None:
+            return
+        company[0] -= 1
+        company[1] -= years
+        self._decrement(company[2], years)
+        if company[0] <= 0:
+            del self._by_company[student["company_name"]]
+
+    @staticmethod
+    def _decrement(histogram, years):
+        histogram[years] -= 1
+        if histogram[years] <= 0:
+            del histogram[years]
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def stats(self, company_name=None, top=None):
+        """Roster summary: headcount per company (largest first) and the experience distribution.
+
+        With ``company_name`` the experience section covers that company only;
+        ``top`` keeps the largest companies and folds the rest into
+        ``other_students``.
+        """
+        self.sync()
+        with self.lock:
+            if company_name is None:
+                experience = Counter(self._experience)
+            else:
+                experience = Counter(self._by_company.get(company_name, (0, 0, ()))[2])
+            companies = [(name, count, years) for name, (count, years, _) in self._by_company.items()]
+        companies.sort(key=lambda c: (-c[1], c[0]))
+        shown = companies if top is None else companies[:top]
+        return {
+            "count": sum(c[1] for c in companies),
+            "company_count": len(companies),
+            "companies": [{"company_name": name, "count": count, "mean_experience": round(years / count, 3)}
+                          for name, count, years in shown],
+            "other_students": sum(c[1] for c in companies[len(shown):]),
+            "experience": {"company_name": company_name, **summarize(experience)},
+        }
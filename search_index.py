@@ -0,0 +1,164 @@
+"""
+Search Index — typeahead search over student IDs, names and companies
+An inverted index from each token to the students containing it, plus the
+sorted vocabulary of tokens, which serves as the prefix trie: every token
+starting with a prefix sits in one contiguous run found with a bisect. The
+index follows the store's change events, so each create, update or delete
+touches only that student's tokens.
+
+    index = SearchIndex(store)
+    index.search("asha inf")   # [("STU104", 5), ("STU017", 3), ...]
+"""
+
+import bisect
+import heapq
+import itertools
+import re
+import unicodedata
+
+from student_store import StoreView
+
+# A match in the ID outranks one in the name, which outranks one in the company.
+FIELD_WEIGHTS = (("student_id", 3), ("student_name", 2), ("company_name", 1))
+EXACT_MATCH_BONUS = 2  # a term equal to a token scores this many times a prefix match
+MAX_CANDIDATES = 1000  # matches gathered per term before a broad prefix stops expanding
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Case- and accent-folded alphanumeric runs: ``"José D'Souza"`` -> ``["jose", "d", "souza"]``."""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    return _TOKEN.findall("".join(c for c in text if not unicodedata.combining(c)))
+
+
+def _weighted_tokens(student):
+    """Token -> weight of the best field it appears in."""
+    weights = {}
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(student.get(field, "")):
+            if weights.get(token, 0) < weight:
+                weights[token] = weight
+    return weights
+
+
+class SearchIndex(StoreView):
+    """Ranked prefix search over a store's students, kept current incrementally."""
+
+    def __init__(self, store, max_candidates=MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        self._postings = {}  # token -> {field weight: {student_id, ...}}
+        self._vocabulary = []  # sorted tokens
+        super().__init__(store)
+
+    def __len__(self):
+        """Distinct tokens indexed."""
+        return len(self._vocabulary)
+
+    # ── Maintenance (StoreView) ──────────────────────────────────────────────
+
+    def _clear(self):
+        self._postings = {}
+        self._vocabulary = []
+
+    def _load(self, records):
+        postings = {}
+        for student in records:
+            student_id = student["student_id"]
+            for token, weight in _weighted_tokens(student).items():
+                postings.setdefault(token, {}).setdefault(weight, set()).add(student_id)
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+
+    def _add(self, student):
+        student_id = student["student_id"]
+        for token, weight in _weighted_tokens(student).items():
+            by_weight = self._postings.get(token)
+            if by_weight is None:
+                by_weight = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            by_weight.setdefault(weight, set()).add(student_id)
+
+    def _remove(self, student):
+        student_id = student["student_id"]
+        for token, weight in _weighted_tokens(student).items():
+            by_weight = self._postings.get(token, {})
+            ids = by_weight.get(weight)
+            if ids is None:
+                continue
+            ids.discard(student_id)
+            if not ids:
+                del by_weight[weight]
+            if not by_weight:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def search(self, query, limit=10):
+        """Best ``limit`` matches for ``query`` as ``[(student_id, score)]``, best first.
+
+        Every term of the query must match (AND); a term matches the tokens it
+        equals or prefixes. A student scores, per term, the weight of the best
+        field it matched in, times :data:`EXACT_MATCH_BONUS` for a whole-token
+        match. Ties go to the lower ID.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        self.sync()
+        with self.lock:  # tiers share the live posting sets
+            per_term = [self._tiers(term) for term in terms]
+            if not all(per_term):
+                return []
+
+            # Every combination of one score tier per term, grouped by total
+            # score; only the groups needed to fill ``limit`` are intersected.
+            groups = {}
+            for combination in itertools.product(*per_term):
+                groups.setdefault(sum(score for score, _ in combination), []).append(combination)
+            results = []
+            for total in sorted(groups, reverse=True):
+                matches = []
+                for combination in groups[total]:
+                    sets = sorted((members for _, members in combination), key=len)
+                    matches.append(sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0])
+                ids = matches[0] if len(matches) == 1 else set().union(*matches)
+                results += [(student_id, total) for student_id in heapq.nsmallest(limit - len(results), ids)]
+                if len(results) >= limit:
+                    break
+            return results
+
+    def _tiers(self, term):
+        """``[(score, ids)]`` for one term, best score first; each student in its best tier only.
+
+        A prefix shared by very many tokens stops expanding after
+        ``max_candidates`` matches, so one- or two-letter fragments may not
+        list every student they prefix.
+        """
+        by_score = {}
+        matched = 0
+        vocabulary = self._vocabulary
+        for position in range(bisect.bisect_left(vocabulary, term), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(term):
+                break
+            bonus = EXACT_MATCH_BONUS if token == term else 1
+            for weight, ids in self._postings[token].items():
+                by_score.setdefault(weight * bonus, []).append(ids)
+                matched += len(ids)
+            if matched >= self.max_candidates:
+                break
+        tiers, seen = [], set()
+        scores = sorted(by_score, reverse=True)
+        for score in scores:
+            sources = by_score[score]
+            # Posting sets are shared, read-only, unless a union or difference copies them.
+            ids = sources[0] if len(sources) == 1 else set().union(*sources)
+            if seen:
+                ids = ids - seen
+            if ids:
+                tiers.append((score, ids))
+                if score != scores[-1]:
+                    seen |= ids
+        return tiers
@@ -0,0 +1,82 @@
+"""
+Production launcher for the Student API
+Runs the async app (asgi_app.py) under uvicorn, or the Flask app
+(flask_api.py) under gunicorn with threaded workers, with the worker count,
+keep-alive and listen backlog set for many concurrent connections. Both
+storage backends are safe with several worker processes.
+
+Usage:
+    python serve.py [--mode asgi|wsgi] [--host 0.0.0.0] [--port 5000] [--workers N]
+                    [--keep-alive 5] [--backlog 2048] [--limit-concurrency N] [--threads 8]
+
+Needs `pip install uvicorn starlette` (asgi) or `pip install gunicorn` (wsgi).
+"""
+
+import argparse
+import os
+import sys
+
+
+def serve_asgi(args):
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("asgi mode needs uvicorn and starlette: pip install uvicorn starlette")
+    uvicorn.run(
+        "asgi_app:app",
+        host=args.host, port=args.port,
+        workers=args.workers,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        access_log=args.access_log,
+    )
+
+
+def serve_wsgi(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("wsgi mode needs gunicorn: pip install gunicorn")
+
+    class FlaskApplication(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "worker_class": "gthread",
+                "threads": args.threads,
+                "keepalive": args.keep_alive,
+                "backlog": args.backlog,
+                "worker_connections": args.limit_concurrency or 1000,
+                "accesslog": "-" if args.access_log else None,
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from flask_api import app
+            return app
+
+    FlaskApplication().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker (wsgi mode)")
+    parser.add_argument("--keep-alive", type=int, default=5, help="seconds to hold idle connections open")
+    parser.add_argument("--backlog", type=int, default=2048, help="pending connections the socket queues")
+    parser.add_argument("--limit-concurrency", type=int, default=None,
+                        help="max open connections per worker before new ones get 503")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    (serve_asgi if args.mode == "asgi" else serve_wsgi)(args)
+
+
+if __name__ == "__main__":
+    main()
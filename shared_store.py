@@ -0,0 +1,371 @@
+"""
+Shared Snapshot Store — one copy of the roster for every worker process
+The JSON backend (same students.json snapshot, write-ahead log, locking and
+group commit) with the records read from the binary snapshot, students.snap,
+memory-mapped read-only instead of loaded into each process. The mapping is
+backed by the page cache, so every gunicorn/uvicorn worker on the host reads
+the same physical pages: adding workers adds read throughput, not copies of
+the roster.
+
+A process holds only what changed since the snapshot was written, as an
+overlay of records on top of the mapping (at most ``compact_every`` writes).
+Compaction publishes the next snapshot with an atomic rename; each worker
+maps the new file on its next read and swaps it in under its write lock, and
+the old mapping goes away once nothing refers to it. Snapshots are never
+written in place, so a reader never sees one half-written.
+
+Queries walk the sort orders stored in the snapshot and merge in the overlay;
+filters run over the mapped columns with NumPy when it is installed.
+
+    STUDENT_STORAGE=shared python serve.py --workers 8
+"""
+
+import heapq
+import json
+import os
+import sys
+from collections import Counter
+from itertools import islice
+
+from binary_snapshot import encode, open_fresh
+from student_store import JSONStudentStore, replace_file, sort_key
+
+try:
+    import numpy
+except ImportError:  # optional: the pure-Python scans give the same answers
+    numpy = None
+
+
+class SnapshotOverlay:
+    """A :class:`BinarySnapshot` (or nothing) plus the records changed since, behind a dict's interface.
+
+    :attr:`changes` maps IDs to their current record, or to None for a
+    snapshot record that has been deleted; :attr:`rows` maps the IDs in it
+    that the snapshot has to their snapshot row. The snapshot is never
+    modified, so :meth:`copy` only copies the changes.
+    """
+
+    def __init__(self, base=None, changes=None, rows=None):
+        self.base = base
+        self.changes = changes or {}
+        self.rows = rows or {}
+        self.count = len(base) if base is not None else 0
+        for student_id, student in self.changes.items():
+            if student is None:
+                self.count -= 1
+            elif student_id not in self.rows:
+                self.count += 1
+
+    def _base_row(self, student_id):
+        return None if self.base is None else self.base.find(student_id)
+
+    # ── Mapping interface (used by JSONStudentStore) ─────────────────────────
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, student_id):
+        return self.get(student_id) is not None
+
+    def get(self, student_id, default=None):
+        if student_id in self.changes:
+            student = self.changes[student_id]
+            return default if student is None else student
+        row = self._base_row(student_id)
+        return default if row is None else self.base.record(row)
+
+    def __setitem__(self, student_id, student):
+        if student_id in self.changes:
+            if self.changes[student_id] is None:
+                self.count += 1
+        else:
+            row = self._base_row(student_id)
+            if row is None:
+                self.count += 1
+            else:
+                self.rows[student_id] = row
+        self.changes[student_id] = student
+
+    def pop(self, student_id, default=None):
+        student = self.get(student_id)
+        if student is None:
+            return default
+        if student_id not in self.changes:
+            self.rows[student_id] = self._base_row(student_id)
+        if student_id in self.rows:
+            self.changes[student_id] = None
+        else:
+            del self.changes[student_id]
+        self.count -= 1
+        return student
+
+    def values(self):
+        """Every record: the snapshot's in ``student_id`` order, then those created since."""
+        changes = self.changes
+        if self.base is not None:
+            for student in self.base:
+                if student["student_id"] in changes:
+                    student = changes[student["student_id"]]
+                    if student is None:
+                        continue
+                yield student
+        for student_id, student in changes.items():
+            if student is not None and student_id not in self.rows:
+                yield student
+
+    def __iter__(self):
+        return (student["student_id"] for student in self.values())
+
+    def items(self):
+        return ((student["student_id"], student) for student in self.values())
+
+    def copy(self):
+        """Point-in-time copy; it shares the snapshot."""
+        return SnapshotOverlay(self.base, dict(self.changes), dict(self.rows))
+
+    def rebased(self, base):
+        """The same records over ``base``, the snapshot compacted from this one: only what differs stays in memory.
+
+        A record can differ from ``base`` only if it changed since this
+        overlay's snapshot (a record created and deleted since is no longer in
+        :attr:`changes`, but is among the snapshot's changed IDs).
+        """
+        changes, rows = {}, {}
+        for student_id in set(self.changes).union(base.changed_ids()):
+            student, row = self.get(student_id), base.find(student_id)
+            if student == (None if row is None else base.record(row)):
+                continue
+            changes[student_id] = student
+            if row is not None:
+                rows[student_id] = row
+        return SnapshotOverlay(base, changes, rows)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        """:meth:`BaseStudentStore.query`: the snapshot's matches merged with the overlay's."""
+        def key(student):
+            return sort_key(student, sort)
+
+        def wanted(student):
+            return (student is not None
+                    and (company_name is None or student["company_name"] == company_name)
+                    and (min_experience is None or student["years_of_experience"] >= min_experience)
+                    and (max_experience is None or student["years_of_experience"] <= max_experience)
+                    and (after is None or (key(student) < after if descending else key(student) > after)))
+
+        changed = sorted(filter(wanted, self.changes.values()), key=key, reverse=descending)
+        window = []
+        if self.base is not None:
+            window = [self.base.record(row) for row in self._base_window(
+                company_name, min_experience, max_experience, after, limit, sort, descending)]
+        merged = heapq.merge(window, changed, key=key, reverse=descending)
+        return list(merged if limit is None else islice(merged, limit))
+
+    def _base_window(self, company_name, min_experience, max_experience, after, limit, sort, descending):
+        """Up to ``limit`` snapshot rows past ``after`` that pass the filters and were not changed since."""
+        base = self.base
+        if not len(base):
+            return []
+        rows = base.order(sort)
+        if after is None:
+            start, end = 0, len(rows)
+        elif descending:
+            start, end = 0, base.position(sort, after)
+        else:
+            start, end = base.position(sort, after, right=True), len(rows)
+        shadowed = set(self.rows.values())
+        filtered = company_name is not None or min_experience is not None or max_experience is not None
+        code = None
+        if company_name is not None:
+            code = base.company_codes.get(company_name)
+            if code is None:
+                return []
+
+        if filtered and numpy is not None:
+            mask = numpy.ones(len(base), dtype=bool)
+            if code is not None:
+                mask &= numpy.frombuffer(base.company, dtype=numpy.uint32) == code
+            years = numpy.frombuffer(base.years, dtype=base.years_typecode)
+            if min_experience is not None:
+                mask &= years >= min_experience
+            if max_experience is not None:
+                mask &= years <= max_experience
+            if shadowed:
+                mask[list(shadowed)] = False
+            if sort == "student_id":
+                candidates = numpy.arange(start, end, dtype=numpy.uint32)
+            else:
+                candidates = numpy.frombuffer(rows, dtype=numpy.uint32)[start:end]
+            matched = candidates[mask[candidates]]
+            if descending:
+                matched = matched[::-1]
+            return (matched if limit is None else matched[:limit]).tolist()
+
+        low = float("-inf") if min_experience is None else min_experience
+        high = float("inf") if max_experience is None else max_experience
+        company, years = base.company, base.years
+        positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+        window = []
+        for position in positions:
+            row = rows[position]
+            if row in shadowed or (filtered and not ((code is None or company[row] == code)
+                                                     and low <= years[row] <= high)):
+                continue
+            window.append(row)
+            if len(window) == limit:
+                break
+        return window
+
+    # ── Aggregates ───────────────────────────────────────────────────────────
+
+    def experience_by_company(self):
+        """``{company name: Counter(years -> students)}``, counted over the mapped columns plus the overlay."""
+        counts = Counter()  # (company code, years) -> students, snapshot only
+        base = self.base
+        if base is not None and len(base):
+            if numpy is not None:
+                codes = numpy.frombuffer(base.company, dtype=numpy.uint32).astype(numpy.int64)
+                years = numpy.frombuffer(base.years, dtype=base.years_typecode).astype(numpy.int64)
+                low = int(years.min())
+                span = int(years.max()) - low + 1
+                keys, totals = numpy.unique(codes * span + (years - low), return_counts=True)
+                for key, n in zip(keys.tolist(), totals.tolist()):
+                    code, offset = divmod(key, span)
+                    counts[code, offset + low] = n
+            else:
+                counts.update(zip(base.company, base.years))
+            counts.subtract((base.company[row], base.years[row]) for row in self.rows.values())
+        grouped = {}
+        for (code, years), n in counts.items():
+            if n > 0:
+                grouped.setdefault(base.companies[code], Counter())[years] = n
+        for student in self.changes.values():
+            if student is not None:
+                grouped.setdefault(student["company_name"], Counter())[student["years_of_experience"]] += 1
+        return grouped
+
+
+class OverlaySnapshot:
+    """Frozen copy of a store's records, as returned by :meth:`SharedSnapshotStore.snapshot`."""
+
+    def __init__(self, overlay):
+        self.overlay = overlay
+
+    def __len__(self):
+        return len(self.overlay)
+
+    def __iter__(self):
+        return self.overlay.values()
+
+    def experience_by_company(self):
+        return self.overlay.experience_by_company()
+
+
+class SharedSnapshotStore(JSONStudentStore):
+    """:class:`JSONStudentStore` whose records are a :class:`SnapshotOverlay` over the mapped students.snap.
+
+    Files, versions, locking and change events are unchanged. The ``.snap``
+    is written whenever the JSON snapshot is, with the sort orders and the
+    IDs that changed since the previous one, and is created from the JSON on
+    first load. The search index and statistics stay per process (they are
+    derived views, see :class:`StoreView`).
+    """
+
+    def _read_snapshot(self, snapshot_signature):
+        """The mapped ``.snap`` while it is fresh; otherwise the JSON, published as a new ``.snap`` first."""
+        if snapshot_signature is None:
+            return SnapshotOverlay()
+        source = snapshot_signature[1:]
+        base = open_fresh(self.binary_path, source)
+        if base is not None and base.orders:
+            return SnapshotOverlay(base)
+        if base is not None:
+            base.close()
+        with open(self.path, "r") as f:
+            students = json.load(f)
+        try:
+            # Other workers may be publishing the same file: each writes its own temp file.
+            replace_file(self.binary_path, encode(students, source, sort_orders=True),
+                         tmp=f"{self.binary_path}.{os.getpid()}.tmp")
+            base = open_fresh(self.binary_path, source)
+        except OSError:
+            base = None
+        if base is not None:
+            return SnapshotOverlay(base)
+        # Could not publish (e.g. a read-only directory): hold the records privately, like the JSON backend.
+        overlay = SnapshotOverlay()
+        for student in students:
+            overlay[student["student_id"]] = student
+        return overlay
+
+    def _diff(self, previous):
+        """Only the records that can differ: those changed in either overlay or between the two snapshots."""
+        current = self._students
+        if not isinstance(previous, SnapshotOverlay) or previous.base is None or current.base is None:
+            return super()._diff(previous)
+        if current.base.source == previous.base.source:
+            candidates = set(previous.changes) | set(current.changes)
+        elif current.base.previous == previous.base.source:
+            candidates = set(current.base.changed_ids()) | set(previous.changes) | set(current.changes)
+        else:  # a snapshot written some other way; compare everything
+            return super()._diff(previous)
+        changes = []
+        for student_id in sorted(candidates):
+            old, new = previous.get(student_id), current.get(student_id)
+            if old != new:
+                changes.append(("create" if old is None else "delete" if new is None else "update",
+                                student_id, old, new))
+        return changes
+
+    # The snapshot's stored sort orders replace the JSON store's indexes.
+    def _rebuild_indexes(self):
+        pass
+
+    def _index(self, student):
+        pass
+
+    def _unindex(self, student):
+        pass
+
+    # ── Compaction ───────────────────────────────────────────────────────────
+
+    def _encode_binary(self, students):
+        previous = students.base.source if students.base is not None else None
+        return encode(students, previous=previous, changed=students.changes, sort_orders=True)
+
+    def _snapshot_replaced(self):
+        base = open_fresh(self.binary_path, self._snapshot_signature[1:])
+        if base is not None:
+            self._students = self._students.rebased(base)
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def snapshot(self):
+        self.refresh()
+        with self._rwlock.read():
+            return self.version, OverlaySnapshot(self._students.copy())
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        self.refresh()
+        with self._rwlock.read():
+            return self._students.query(company_name, min_experience, max_experience, after, limit,
+                                        sort, descending)
+
+    def memory_usage(self):
+        """Bytes this process holds privately (``total_bytes``) and the size of the shared mapping."""
+        self.refresh()
+        with self._rwlock.read():
+            overlay = self._students
+            private = sys.getsizeof(overlay.changes) + sys.getsizeof(overlay.rows) + sum(
+                sys.getsizeof(student) + sum(map(sys.getsizeof, student.values()))
+                for student in overlay.changes.values() if student is not None)
+            shared = overlay.base.nbytes if overlay.base is not None else 0
+            return {
+                "students": len(overlay),
+                "changed_since_snapshot": len(overlay.changes),
+                "shared_bytes": shared,
+                "total_bytes": private,
+            }
@@ -0,0 +1,278 @@
+"""
+SQLite Store — indexed SQLite backend for the student database
+Select it with STUDENT_STORAGE=sqlite. Runs in WAL mode so readers never block
+the writer, keeps one connection per thread, and indexes the columns the API
+looks students up by.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from student_store import (BaseStudentStore, PreconditionFailed, SORT_FIELDS, StoreError, StudentExists,
+                           StudentNotFound)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id          TEXT PRIMARY KEY,
+    student_name        TEXT NOT NULL,
+    years_of_experience INTEGER NOT NULL,
+    company_name        TEXT NOT NULL,
+    version             INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_company    ON students (company_name, student_id);
+CREATE INDEX IF NOT EXISTS idx_students_experience ON students (years_of_experience, student_id);
+CREATE INDEX IF NOT EXISTS idx_students_name       ON students (student_name, student_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    version    INTEGER PRIMARY KEY,
+    op         TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    old        TEXT,
+    new        TEXT
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('modified_at_ms', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', random() & 9223372036854775807);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement cache
+# compiles each one once per thread and reuses it.
+COLUMNS        = "student_id, student_name, years_of_experience, company_name"
+SELECT_ALL     = f"SELECT {COLUMNS} FROM students ORDER BY rowid"
+SELECT_ONE     = f"SELECT {COLUMNS}, version FROM students WHERE student_id = ?"
+ROW_VERSION    = "SELECT version FROM students WHERE student_id = ?"
+COUNT          = "SELECT COUNT(*) FROM students"
+INSERT         = f"INSERT INTO students ({COLUMNS}, version) VALUES (?, ?, ?, ?, ?)"
+UPDATE         = ("UPDATE students SET student_name = ?, years_of_experience = ?, company_name = ?, version = ? "
+                  "WHERE student_id = ?")
+DELETE         = "DELETE FROM students WHERE student_id = ?"
+SELECT_VERSION = "SELECT value FROM meta WHERE key = 'version'"
+BUMP_VERSION   = "UPDATE meta SET value = value + 1 WHERE key = 'version'"
+GET_MODIFIED   = "SELECT value FROM meta WHERE key = 'modified_at_ms'"
+SET_MODIFIED   = "UPDATE meta SET value = ? WHERE key = 'modified_at_ms'"
+GET_GENERATION = "SELECT value FROM meta WHERE key = 'generation'"
+LOG_CHANGE     = "INSERT INTO changes (version, op, student_id, old, new) VALUES (?, ?, ?, ?, ?)"
+CHANGES_SINCE  = "SELECT version, op, student_id, old, new FROM changes WHERE version > ? ORDER BY version"
+TRIM_CHANGES   = "DELETE FROM changes WHERE version <= ?"
+
+
+def _row_to_student(row):
+    return {
+        "student_id":          row[0],
+        "student_name":        row[1],
+        "years_of_experience": row[2],
+        "company_name":        row[3],
+    }
+
+
+class SQLiteStudentStore(BaseStudentStore):
+    """Students in an SQLite database, one connection per thread.
+
+    Every :meth:`apply` batch runs in one ``BEGIN IMMEDIATE`` transaction,
+    which takes SQLite's write lock up front, so check-then-write is atomic
+    across threads and processes. ``version`` lives in the ``meta`` table and is bumped in the
+    same transaction as the change; each row records the version that last
+    wrote it. The ``changes`` table keeps the last ``changes_kept`` writes
+    (old and new record) so every process can turn them into change events.
+
+    If the database is new and ``seed_file`` (a students.json array) exists,
+    its records are imported, so switching backends keeps the data. A new
+    database also draws a random ``generation``, so one recreated from scratch
+    never reissues the ETags of the one it replaced.
+    """
+
+    def __init__(self, path, seed_file=None, timeout=30.0, changes_kept=10000):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+        self.changes_kept = changes_kept
+        self._local = threading.local()
+        self._events_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self.generation = conn.execute(GET_GENERATION).fetchone()[0]
+        if seed_file and os.path.exists(seed_file) and not self._count(conn):
+            self._seed(conn, seed_file)
+        self._delivered_version = self.version
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=64)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _seed(self, conn, seed_file):
+        with open(seed_file, "r") as f:
+            students = json.load(f)
+        with _Transaction(conn):
+            if self._count(conn):  # another worker seeded it first
+                return
+            version = self._bump_version(conn)
+            conn.executemany(INSERT, [
+                (s["student_id"], s["student_name"], s["years_of_experience"], s["company_name"], version)
+                for s in students
+            ])
+            conn.execute(SET_MODIFIED, (int(time.time() * 1000),))
+
+    @staticmethod
+    def _count(conn):
+        return conn.execute(COUNT).fetchone()[0]
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    @property
+    def version(self):
+        return self._conn().execute(SELECT_VERSION).fetchone()[0]
+
+    @property
+    def last_modified(self):
+        return self._conn().execute(GET_MODIFIED).fetchone()[0] / 1000
+
+    def record_version(self, student_id):
+        row = self._conn().execute(ROW_VERSION, (student_id,)).fetchone()
+        return row[0] if row else None
+
+    def all(self):
+        return [_row_to_student(row) for row in self._conn().execute(SELECT_ALL)]
+
+    def snapshot(self):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            return conn.execute(SELECT_VERSION).fetchone()[0], self.all()
+        finally:
+            conn.execute("COMMIT")
+
+    def get(self, student_id):
+        row = self._conn().execute(SELECT_ONE, (student_id,)).fetchone()
+        return _row_to_student(row) if row else None
+
+    def __len__(self):
+        return self._count(self._conn())
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        where, params = [], []
+        for clause, value in (("company_name = ?", company_name),
+                              ("years_of_experience >= ?", min_experience),
+                              ("years_of_experience <= ?", max_experience)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        if after is not None:
+            if sort == "student_id":
+                where.append(f"student_id {op} ?")
+                params.append(after)
+            else:
+                where.append(f"({sort}, student_id) {op} (?, ?)")
+                params.extend(after)
+        sql = f"SELECT {COLUMNS} FROM students"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if sort == "student_id":
+            sql += f" ORDER BY student_id {direction}"
+        else:
+            sql += f" ORDER BY {sort} {direction}, student_id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_row_to_student(row) for row in self._conn().execute(sql, params)]
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _bump_version(conn):
+        conn.execute(BUMP_VERSION)
+        return conn.execute(SELECT_VERSION).fetchone()[0]
+
+    def apply(self, operations):
+        conn = self._conn()
+        results = []
+        with _Transaction(conn):
+            for operation in operations:
+                try:
+                    results.append(self._apply_operation(conn, operation))
+                except StoreError as e:
+                    results.append(e)
+            if any(not isinstance(r, StoreError) for r in results):
+                conn.execute(SET_MODIFIED, (int(time.time() * 1000),))
+                conn.execute(TRIM_CHANGES, (conn.execute(SELECT_VERSION).fetchone()[0] - self.changes_kept,))
+        self.refresh()
+        return results
+
+    def refresh(self):
+        if not self._listeners:
+            return
+        with self._events_lock:
+            conn = self._conn()
+            rows = conn.execute(CHANGES_SINCE, (self._delivered_version,)).fetchall()
+            if rows and rows[0][0] == self._delivered_version + 1:
+                for version, op, student_id, old, new in rows:
+                    self._emit({"op": op, "student_id": student_id, "old": old and json.loads(old),
+                                "new": new and json.loads(new), "version": version})
+                self._delivered_version = rows[-1][0]
+                return
+            version = conn.execute(SELECT_VERSION).fetchone()[0]
+            if version != self._delivered_version:
+                # Trimmed past what this process saw, or a write that logs no changes (seeding).
+                self._emit({"op": "reset", "version": version})
+                self._delivered_version = version
+
+    def _apply_operation(self, conn, operation):
+        op = operation["op"]
+        if op == "create":
+            student = operation["data"]
+            if conn.execute(SELECT_ONE, (student["student_id"],)).fetchone():
+                raise StudentExists(student["student_id"])
+            version = self._bump_version(conn)
+            conn.execute(INSERT, (student["student_id"], student["student_name"],
+                                  student["years_of_experience"], student["company_name"], version))
+            conn.execute(LOG_CHANGE, (version, "create", student["student_id"], None, json.dumps(student)))
+            return student
+
+        student_id = operation["student_id"]
+        row = conn.execute(SELECT_ONE, (student_id,)).fetchone()
+        if row is None:
+            raise StudentNotFound(student_id)
+        current = _row_to_student(row)
+        if_version = operation.get("if_version")
+        if if_version is not None and row[4] != if_version:
+            raise PreconditionFailed(student_id)
+        version = self._bump_version(conn)
+        if op == "update":
+            student = {**current, **operation["data"], "student_id": student_id}
+            conn.execute(UPDATE, (student["student_name"], student["years_of_experience"],
+                                  student["company_name"], version, student_id))
+            conn.execute(LOG_CHANGE, (version, op, student_id, json.dumps(current), json.dumps(student)))
+            return student
+        conn.execute(DELETE, (student_id,))
+        conn.execute(LOG_CHANGE, (version, op, student_id, json.dumps(current), None))
+        return current
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` … ``COMMIT``, rolled back if the block raises."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
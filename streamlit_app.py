@@ -5,10 +5,19 @@ Make sure flask_api.py is running on port 5000 before using this app.
 
 import streamlit as st
 import requests
+import io
 import json
+import re
+import threading
+import time
 import pandas as pd
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlencode
 from datetime import datetime
 
+from student_client import BULK_CHUNK, StudentClient
+from student_schema import MAX_EXPERIENCE, MIN_EXPERIENCE, UPDATABLE_FIELDS
+
 # ── Page Config ───────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Student API Tester",
@@ -53,6 +62,9 @@ html, body, [class*="css"] {
 .badge-post   { background:#3b82f6; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
 .badge-put    { background:#f59e0b; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
 .badge-delete { background:#ef4444; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
+.badge-stats  { background:#06b6d4; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
+.badge-bulk   { background:#8b5cf6; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
+.badge-batch  { background:#f97316; color:#fff; padding:4px 12px; border-radius:20px; font-family:'JetBrains Mono',monospace; font-size:0.75rem; font-weight:700; }
 
 /* Response panel */
 .response-box {
@@ -118,28 +130,314 @@ h2, h3 { color: #a78bfa !important; }
 
 # ── Config ────────────────────────────────────────────────────────────────────
 BASE_URL = "http://127.0.0.1:5000"
+CACHE_TTL = 10           # seconds a GET response is reused without asking the API
+CACHE_MAX_ENTRIES = 256
+STUDENT_COLUMNS = ["student_id", "student_name", "years_of_experience", "company_name"]
+PAGE_SIZES = [25, 50, 100, 250, 500]
+SEARCH_MIN_CHARS = 2     # typeahead starts suggesting after this many characters
+SEARCH_SUGGESTIONS = 8
+COLLECTION_PATHS = ("/students", "/students/search", "/students/stats")  # responses any write may change
+LIVE_REFRESH = 2         # seconds between redraws of the roster table from the (live) cache
+WATCH_RETRY = 3          # seconds before reconnecting a dropped change feed
+BATCH_WORKERS = 8        # concurrent requests in the BATCH tab (the client pools 10 connections)
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def make_request(method, endpoint, payload=None):
+@st.cache_resource
+def get_client():
+    """One pooled, retrying API client per Streamlit server, shared by all sessions."""
+    return StudentClient(BASE_URL, timeout=(3.05, 10), retries=2)
+
+
+def in_view(params, student):
+    """Whether ``student`` passes the filters of a GET /students query (parsed with parse_qs)."""
+    company = params.get("company_name", [None])[0]
+    low, high = params.get("min_experience", [None])[0], params.get("max_experience", [None])[0]
+    years = student["years_of_experience"]
+    return ((company is None or student["company_name"] == company)
+            and (low is None or years >= int(low)) and (high is None or years <= int(high)))
+
+
+class ReadCache:
+    """GET responses by endpoint, shared by every session on this Streamlit server.
+
+    Entries younger than ``ttl`` are served without a request; older ones are
+    revalidated with their ETag (a 304 renews them). Entries stored while the
+    change feed is connected are kept current by :meth:`apply_change` and
+    served without a request for as long as it stays connected. At most
+    ``max_entries`` are kept, least recently used evicted first.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # endpoint -> [etag, body, fetched_at, kept current by the feed]
+        self._lock = threading.Lock()
+
+    def lookup(self, endpoint, live=False):
+        """``(etag, body, fresh)`` for a cached endpoint, else None. ``live``: the change feed is connected."""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if entry is None:
+                return None
+            self._entries.move_to_end(endpoint)
+            return entry[0], entry[1], (live and entry[3]) or time.monotonic() - entry[2] < self.ttl
+
+    def etag(self, endpoint):
+        entry = self.lookup(endpoint)
+        return entry[0] if entry else None
+
+    def store(self, endpoint, etag, body, followed=False):
+        with self._lock:
+            self._entries[endpoint] = [etag, body, time.monotonic(), followed]
+            self._entries.move_to_end(endpoint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def renew(self, endpoint):
+        with self._lock:
+            if endpoint in self._entries:
+                self._entries[endpoint][2] = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, paths):
+        """Drop entries for ``paths`` and every response derived from the whole roster."""
+        with self._lock:
+            for endpoint in list(self._entries):
+                path = endpoint.split("?")[0]
+                if path in paths or path in COLLECTION_PATHS:
+                    del self._entries[endpoint]
+
+    def apply_change(self, change):
+        """Patch cached roster pages for one change from the feed; drop the responses it cannot patch.
+
+        The changed record itself is dropped, not patched: its ETag is sent back
+        in If-Match, and only the API can issue the new one.
+        """
+        with self._lock:
+            for endpoint, entry in list(self._entries.items()):
+                path, _, query = endpoint.partition("?")
+                if path == f"/students/{change['student_id']}":
+                    del self._entries[endpoint]
+                elif path == "/students":
+                    page = self._patch_page(entry[1], parse_qs(query), change)
+                    if page is None:
+                        del self._entries[endpoint]
+                    else:
+                        entry[1] = page
+                elif path in COLLECTION_PATHS:
+                    del self._entries[endpoint]
+
+    @staticmethod
+    def _patch_page(body, params, change):
+        """A cached roster page with ``change`` applied, or None if the page must be refetched.
+
+        Pages are keyset-paged, so removing or editing a row never shifts the
+        pages after it. A row that may have joined the page, or moved within it,
+        cannot be placed without the server.
+        """
+        if "fields" in params:
+            return None  # a projection may leave out the ID or sort field
+        rows, new = body["data"], change["data"]
+        position = next((i for i, row in enumerate(rows) if row["student_id"] == change["student_id"]), None)
+        if position is None:
+            return body if new is None or not in_view(params, new) else None
+        rows = list(rows)  # bodies already handed out stay as they were
+        if new is None:
+            del rows[position]
+        else:
+            sort = params.get("sort", ["student_id"])[0]
+            if new[sort] != rows[position][sort] or not in_view(params, new):
+                return None
+            rows[position] = {field: new[field] for field in rows[position]}
+        return {**body, "count": len(rows), "data": rows}
+
+
+@st.cache_resource
+def get_read_cache():
+    return ReadCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+
+
+class ChangeWatcher:
+    """Follows GET /students/changes (SSE) in a background thread and feeds it to the read cache.
+
+    Reconnects after ``WATCH_RETRY`` seconds if the stream drops, resuming from
+    the last version seen; a ``reset`` from the API empties the cache.
+    """
+
+    def __init__(self, client, cache):
+        self.client, self.cache = client, cache
+        self.version = None
+        self.connected = False
+        threading.Thread(target=self._run, name="change-watcher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                for event, data in self.client.follow_changes(self.version):
+                    if event == "reset":
+                        self.cache.clear()
+                    elif event == "change":
+                        self.cache.apply_change(data)
+                    self.version = data["version"]
+                    self.connected = True
+            except (requests.RequestException, ValueError):
+                pass
+            self.connected = False
+            time.sleep(WATCH_RETRY)
+
+    def position(self):
+        """Version the cache is current to, or None while not following."""
+        return self.version if self.connected else None
+
+
+@st.cache_resource
+def get_change_watcher():
+    """One change-feed subscription per Streamlit server, shared by all sessions."""
+    return ChangeWatcher(get_client(), get_read_cache())
+
+
+def affected_paths(endpoint, payload):
+    """Record paths a write to ``endpoint`` may change (bulk writes list theirs in the payload)."""
+    if endpoint != "/students/_bulk":
+        return {endpoint}
+    paths = set()
+    for op in payload or []:
+        student_id = op.get("student_id") or (op.get("data") or {}).get("student_id")
+        if student_id:
+            paths.add(f"/students/{student_id}")
+    return paths
+
+
+def prefetch(endpoint):
+    """Warm the read cache with ``endpoint`` in the background, e.g. the next table page."""
+    cache, client, watcher = get_read_cache(), get_client(), get_change_watcher()
+    if cache.lookup(endpoint):
+        return
+
+    def run():
+        position = watcher.position()
+        try:
+            r = client.request("GET", endpoint)
+        except requests.RequestException:
+            return
+        if r.status == 200 and r.etag:
+            cache.store(endpoint, r.etag, r.data, followed=position is not None and position == watcher.position())
+    threading.Thread(target=run, daemon=True).start()
+
+
+def make_request(method, endpoint, payload=None, if_match=None):
     url = BASE_URL + endpoint
     ts  = datetime.now().strftime("%H:%M:%S")
+    cache, watcher = get_read_cache(), get_change_watcher()
+    position = watcher.position()
+    headers = {}
+    cached = cache.lookup(endpoint, live=position is not None) if method == "GET" else None
+    if cached:
+        etag, body, fresh = cached
+        if fresh:
+            return 200, body, url, f"{ts} (cached)"
+        headers["If-None-Match"] = etag
+    if if_match:
+        headers["If-Match"] = if_match
     try:
+        r = get_client().request(method, endpoint, json=payload, headers=headers)
         if method == "GET":
-            r = requests.get(url, timeout=5)
-        elif method == "POST":
-            r = requests.post(url, json=payload, timeout=5)
-        elif method == "PUT":
-            r = requests.put(url, json=payload, timeout=5)
-        elif method == "DELETE":
-            r = requests.delete(url, timeout=5)
-        return r.status_code, r.json(), url, ts
+            if r.status == 304 and cached:
+                cache.renew(endpoint)
+                return 200, cached[1], url, f"{ts} (revalidated)"
+            if r.status == 200 and r.etag:
+                # Only trust the feed to keep this current if no change arrived while it was in flight.
+                cache.store(endpoint, r.etag, r.data, followed=position is not None and position == watcher.position())
+        else:
+            # Even a failed write (404, 412, ...) means our copy may be out of date.
+            cache.invalidate(affected_paths(endpoint, payload))
+        return r.status, r.data, url, ts
     except requests.exceptions.ConnectionError:
         return 0, {"error": "❌ Cannot connect to Flask API. Is flask_api.py running on port 5000?"}, url, ts
     except Exception as e:
         return 0, {"error": str(e)}, url, ts
 
 
+def student_id_input(label, key, placeholder):
+    """Student ID box with typeahead from GET /students/search.
+
+    Once a few characters are typed, students whose ID, name or company match
+    are offered in a picker underneath; picking one fills in its ID.
+    """
+    typed = st.text_input(label, key=key, placeholder=placeholder).strip()
+    if len(typed) < SEARCH_MIN_CHARS:
+        return typed
+    code, data, _, _ = make_request("GET", "/students/search?" + urlencode({"q": typed, "limit": SEARCH_SUGGESTIONS}))
+    matches = {m["student_id"]: m for m in data.get("data", [])} if code == 200 else {}
+    if matches and typed not in matches:
+        def pick():
+            choice = st.session_state[f"{key}_pick"]
+            if choice:
+                st.session_state[key] = choice
+
+        st.selectbox(
+            f"{len(matches)} matching student(s)", [""] + list(matches), key=f"{key}_pick", on_change=pick,
+            format_func=lambda sid: (f"{sid} · {matches[sid]['student_name']} ({matches[sid]['company_name']})"
+                                     if sid else "— pick a match —"),
+        )
+    return typed
+
+
+def parse_bulk_upload(filename, content):
+    """Turn an uploaded CSV or JSON file into a list of bulk operations.
+
+    CSV columns: op (optional, defaults to create), student_id, student_name,
+    years_of_experience, company_name. JSON: an array of operations or of
+    plain student records (treated as creates).
+    """
+    if filename.lower().endswith(".json"):
+        items = json.loads(content)
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise ValueError("JSON file must contain an array of objects")
+        return [item if "op" in item else {"op": "create", "data": item} for item in items]
+
+    rows = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False).to_dict("records")
+    ops = []
+    for row in rows:
+        op = (row.pop("op", "") or "create").strip().lower()
+        sid = row.pop("student_id", "").strip()
+        fields = {k: v.strip() for k, v in row.items() if v.strip()}
+        if op == "create":
+            ops.append({"op": "create", "data": {"student_id": sid, **fields}})
+        elif op == "update":
+            ops.append({"op": "update", "student_id": sid, "data": fields})
+        else:
+            ops.append({"op": op, "student_id": sid})
+    return ops
+
+
+def parse_batch_targets(text, csv_content=None):
+    """Student IDs pasted as text and/or uploaded as a CSV, in order and without repeats.
+
+    Returns ``{student_id: fields}``. Pasted IDs may be separated by commas,
+    semicolons, spaces or new lines and get no fields; a CSV needs a
+    ``student_id`` column, and its non-blank student_name,
+    years_of_experience and company_name cells become that student's fields.
+    """
+    targets = {}
+    for sid in re.split(r"[\s,;]+", text or ""):
+        if sid:
+            targets.setdefault(sid, {})
+    if csv_content:
+        table = pd.read_csv(io.BytesIO(csv_content), dtype=str, keep_default_na=False)
+        if "student_id" not in table.columns:
+            raise ValueError("CSV needs a student_id column")
+        for row in table.to_dict("records"):
+            sid = row.pop("student_id").strip()
+            if sid:
+                targets[sid] = {k: v.strip() for k, v in row.items() if k in UPDATABLE_FIELDS and v.strip()}
+    return targets
+
+
 def status_color(code):
     if 200 <= code < 300: return "status-2xx"
     if 400 <= code < 500: return "status-4xx"
@@ -205,9 +503,11 @@ with st.sidebar:
     st.markdown("### 🌐 API Endpoints")
     st.code("""GET    /students
 GET    /students/<id>
+GET    /students/export
 POST   /students
 PUT    /students/<id>
 DELETE /students/<id>
+POST   /students/_bulk
 GET    /health""", language="text")
 
     # Health check in sidebar
@@ -226,8 +526,8 @@ st.markdown("*A hands-on tool to explore GET, POST, PUT and DELETE operations*")
 st.markdown("---")
 
 # ── Tabs ──────────────────────────────────────────────────────────────────────
-tab_get, tab_post, tab_put, tab_delete, tab_guide = st.tabs([
-    "🟢  GET", "🔵  POST", "🟡  PUT", "🔴  DELETE", "📘  How to Use"
+tab_get, tab_post, tab_put, tab_delete, tab_bulk, tab_batch, tab_stats, tab_guide = st.tabs([
+    "🟢  GET", "🔵  POST", "🟡  PUT", "🔴  DELETE", "🟣  BULK", "🟠  BATCH", "📊  ANALYTICS", "📘  How to Use"
 ])
 
 # ════════════════════════════════════════════════════════════════════════════════
@@ -238,22 +538,85 @@ with tab_get:
     st.markdown('<span class="badge-get">GET</span> &nbsp; Retrieve student records', unsafe_allow_html=True)
     st.markdown("")
 
-    mode = st.radio("Fetch", ["All Students", "Single Student by ID"], horizontal=True)
+    mode = st.radio("Fetch", ["All Students", "Single Student by ID", "Export (download)"], horizontal=True)
 
     if mode == "All Students":
-        st.markdown("**Endpoint:** `GET /students`")
-        if st.button("▶ Fetch All Students"):
-            code, data, url, ts = make_request("GET", "/students")
-            render_response(code, data, url, ts)
+        st.markdown("**Endpoint:** `GET /students?limit=…&sort=…&cursor=…`")
+        st.caption("Only the visible page is fetched. Sorting and filtering run on the API, so the table stays fast for any roster size.")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            sort_field = st.selectbox("Sort by", STUDENT_COLUMNS)
+        with col2:
+            sort_order = st.radio("Order", ["asc", "desc"], horizontal=True)
+        with col3:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+        with col4:
+            filter_company = st.text_input("Company (exact)", placeholder="e.g. Infosys")
+        col1, col2 = st.columns(2)
+        with col1:
+            filter_min = st.number_input("Min Years of Experience", min_value=MIN_EXPERIENCE, max_value=MAX_EXPERIENCE, value=MIN_EXPERIENCE)
+        with col2:
+            filter_max = st.number_input("Max Years of Experience", min_value=MIN_EXPERIENCE, max_value=MAX_EXPERIENCE, value=MAX_EXPERIENCE)
+
+        params = {"limit": page_size, "sort": sort_field, "order": sort_order}
+        if filter_company.strip():
+            params["company_name"] = filter_company.strip()
+        if filter_min > MIN_EXPERIENCE:
+            params["min_experience"] = filter_min
+        if filter_max < MAX_EXPERIENCE:
+            params["max_experience"] = filter_max
+
+        # Cursors of the pages visited so far; changing the view starts over at page 1.
+        view = urlencode(params)
+        if st.session_state.get("roster_view") != view:
+            st.session_state["roster_view"] = view
+            st.session_state["roster_cursors"] = [None]
+        cursors = st.session_state["roster_cursors"]
+
+        def page_endpoint(cursor):
+            return "/students?" + urlencode({**params, "cursor": cursor} if cursor else params)
+
+        # Redrawn on its own every LIVE_REFRESH s; while the change feed is connected the
+        # cached page is patched in place, so a redraw costs no request.
+        @st.fragment(run_every=LIVE_REFRESH)
+        def roster_table():
+            code, data, url, ts = make_request("GET", page_endpoint(cursors[-1]))
+            if code != 200 or "data" not in data:
+                render_response(code, data, url, ts)
+                return
+            next_cursor = data.get("next_cursor")
+            live = get_change_watcher().connected
+            st.markdown("#### 📊 Table View")
+            st.caption("🟢 Live — changes from any client appear here as they happen" if live
+                       else f"⚪ Not live — change feed unavailable, refreshing every {CACHE_TTL} s")
+            st.dataframe(pd.DataFrame(data["data"], columns=STUDENT_COLUMNS), use_container_width=True, hide_index=True)
+
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                st.button("◀ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+            with col2:
+                first_row = (len(cursors) - 1) * page_size + 1
+                st.markdown(f"Rows {first_row}–{first_row + data['count'] - 1} · page {len(cursors)}"
+                            if data["count"] else "No matching students")
+            with col3:
+                st.button("Next ▶", disabled=not next_cursor, on_click=cursors.append, args=(next_cursor,))
+            if next_cursor:
+                prefetch(page_endpoint(next_cursor))  # so "Next" is instant
+            with st.expander("Raw response"):
+                render_response(code, data, url, ts)
+
+        roster_table()
 
-            if code == 200 and "data" in data:
-                st.markdown("#### 📊 Table View")
-                df = pd.DataFrame(data["data"])
-                st.dataframe(df, use_container_width=True, hide_index=True)
+    elif mode == "Export (download)":
+        st.markdown("**Endpoint:** `GET /students/export?format=ndjson|csv`")
+        st.markdown("Streams the full roster straight from the API to your browser — nothing is rendered here, so it works for any roster size.")
+        export_fmt = st.radio("Format", ["csv", "ndjson"], horizontal=True)
+        st.link_button(f"⬇ Download students.{export_fmt}", f"{BASE_URL}/students/export?format={export_fmt}")
 
     else:
         st.markdown("**Endpoint:** `GET /students/{student_id}`")
-        sid = st.text_input("Student ID", placeholder="e.g. STU001")
+        sid = student_id_input("Student ID", "get_id", placeholder="e.g. STU001 or a name")
         if st.button("▶ Fetch Student"):
             if sid.strip():
                 code, data, url, ts = make_request("GET", f"/students/{sid.strip()}")
@@ -276,7 +639,7 @@ with tab_post:
         new_id   = st.text_input("Student ID *", placeholder="e.g. STU011")
         new_name = st.text_input("Student Name *", placeholder="e.g. Rahul Verma")
     with col2:
-        new_exp  = st.number_input("Years of Experience *", min_value=0, max_value=50, value=0)
+        new_exp  = st.number_input("Years of Experience *", min_value=MIN_EXPERIENCE, max_value=MAX_EXPERIENCE, value=MIN_EXPERIENCE)
         new_comp = st.text_input("Company Name *", placeholder="e.g. Google India")
 
     # Live JSON preview
@@ -306,7 +669,7 @@ with tab_put:
     st.markdown("**Endpoint:** `PUT /students/{student_id}`")
     st.markdown("")
 
-    put_id = st.text_input("Student ID to Update *", placeholder="e.g. STU003")
+    put_id = student_id_input("Student ID to Update *", "put_id", placeholder="e.g. STU003 or a name")
 
     # Optionally auto-load current values
     if st.button("🔍 Load Current Data"):
@@ -316,6 +679,7 @@ with tab_put:
                 st.session_state["put_name"] = data["data"]["student_name"]
                 st.session_state["put_exp"]  = data["data"]["years_of_experience"]
                 st.session_state["put_comp"] = data["data"]["company_name"]
+                st.session_state["put_etag"] = (put_id.strip(), get_read_cache().etag(f"/students/{put_id.strip()}"))
                 st.success("✅ Current data loaded into fields below.")
             else:
                 st.error(f"Student '{put_id}' not found.")
@@ -325,22 +689,30 @@ with tab_put:
     col1, col2 = st.columns(2)
     with col1:
         put_name = st.text_input("New Student Name", value=st.session_state.get("put_name", ""), placeholder="Updated name")
-        put_exp  = st.number_input("New Years of Experience", min_value=0, max_value=50, value=st.session_state.get("put_exp", 0))
+        put_exp  = st.number_input("New Years of Experience", min_value=MIN_EXPERIENCE, max_value=MAX_EXPERIENCE,
+                                   value=st.session_state.get("put_exp", MIN_EXPERIENCE))
     with col2:
         put_comp = st.text_input("New Company Name", value=st.session_state.get("put_comp", ""), placeholder="Updated company")
 
+    # Blank text fields are left out, so they keep their current values.
     put_payload = {
-        "student_name":        put_name,
+        "student_name":        put_name.strip(),
         "years_of_experience": put_exp,
-        "company_name":        put_comp,
+        "company_name":        put_comp.strip(),
     }
+    put_payload = {k: v for k, v in put_payload.items() if v != ""}
     with st.expander("📋 Request Body Preview (JSON)"):
         st.code(json.dumps(put_payload, indent=2), language="json")
 
     if st.button("▶ Update Student"):
         if put_id.strip():
-            code, data, url, ts = make_request("PUT", f"/students/{put_id.strip()}", put_payload)
+            # If the fields were loaded above, only update if nobody changed the record since.
+            loaded_id, etag = st.session_state.pop("put_etag", (None, None))
+            code, data, url, ts = make_request("PUT", f"/students/{put_id.strip()}", put_payload,
+                                               if_match=etag if loaded_id == put_id.strip() else None)
             render_response(code, data, url, ts)
+            if code == 412:
+                st.warning("Someone else changed this student after you loaded it — load the current data and try again.")
         else:
             st.warning("Please enter the Student ID to update.")
     st.markdown("</div>", unsafe_allow_html=True)
@@ -354,7 +726,7 @@ with tab_delete:
     st.markdown("**Endpoint:** `DELETE /students/{student_id}`")
     st.markdown("")
 
-    del_id = st.text_input("Student ID to Delete *", placeholder="e.g. STU005")
+    del_id = student_id_input("Student ID to Delete *", "del_id", placeholder="e.g. STU005 or a name")
 
     # Preview the student before deleting
     if st.button("🔍 Preview Student"):
@@ -379,6 +751,174 @@ with tab_delete:
             st.warning("Please enter a Student ID to delete.")
     st.markdown("</div>", unsafe_allow_html=True)
 
+# ════════════════════════════════════════════════════════════════════════════════
+# BULK TAB
+# ════════════════════════════════════════════════════════════════════════════════
+with tab_bulk:
+    st.markdown('<div class="api-card">', unsafe_allow_html=True)
+    st.markdown('<span class="badge-bulk">BULK</span> &nbsp; Create, update or delete many students at once', unsafe_allow_html=True)
+    st.markdown("**Endpoint:** `POST /students/_bulk`")
+    st.markdown("")
+
+    st.markdown("""
+Upload a **CSV** with columns `op, student_id, student_name, years_of_experience, company_name`
+(`op` is `create`, `update` or `delete`; rows without it are creates), or a **JSON** file with an
+array of operations or plain student records. All operations are applied in a single commit.
+    """)
+    uploaded = st.file_uploader("Upload CSV or JSON", type=["csv", "json"])
+
+    if uploaded is not None:
+        try:
+            bulk_ops = parse_bulk_upload(uploaded.name, uploaded.getvalue())
+        except ValueError as e:
+            st.error(f"Could not read {uploaded.name}: {e}")
+            bulk_ops = []
+
+        if bulk_ops:
+            st.markdown(f"**{len(bulk_ops)} operation(s) ready.**")
+            with st.expander("📋 Request Body Preview (JSON, first 20)"):
+                st.code(json.dumps(bulk_ops[:20], indent=2), language="json")
+
+            if st.button("▶ Run Bulk Operations"):
+                code, data, url, ts = make_request("POST", "/students/_bulk", bulk_ops)
+                if code == 200:
+                    st.success(f"✅ {data['succeeded']} succeeded   ❌ {data['failed']} failed")
+                    st.dataframe(pd.DataFrame(data["results"]), use_container_width=True, hide_index=True)
+                else:
+                    render_response(code, data, url, ts)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# ════════════════════════════════════════════════════════════════════════════════
+# BATCH TAB
+# ════════════════════════════════════════════════════════════════════════════════
+with tab_batch:
+    st.markdown('<div class="api-card">', unsafe_allow_html=True)
+    st.markdown('<span class="badge-batch">BATCH</span> &nbsp; Fetch, update or delete many students by ID', unsafe_allow_html=True)
+    st.markdown("**Endpoints:** `GET /students/{student_id}` per ID · `POST /students/_bulk` for updates and deletes")
+    st.caption(f"Fetches run {BATCH_WORKERS} at a time. Updates and deletes go to the bulk endpoint, "
+               f"{BULK_CHUNK:,} per request, or one by one, {BATCH_WORKERS} at a time, if the API has none.")
+    st.markdown("")
+
+    batch_action = st.radio("Action", ["Fetch", "Update", "Delete"], horizontal=True, key="batch_action")
+    col1, col2 = st.columns(2)
+    with col1:
+        batch_text = st.text_area("Student IDs", key="batch_ids", height=150, placeholder="STU001, STU002\nSTU003",
+                                  help="Separate IDs with commas, spaces or new lines.")
+    with col2:
+        batch_file = st.file_uploader("…or upload a CSV with a student_id column", type=["csv"], key="batch_file")
+        if batch_action == "Update":
+            st.caption("Other CSV columns (student_name, years_of_experience, company_name) set that "
+                       "student's fields, over the values below.")
+    try:
+        targets = parse_batch_targets(batch_text, batch_file.getvalue() if batch_file is not None else None)
+    except ValueError as e:
+        st.error(f"Could not read {batch_file.name}: {e}")
+        targets = {}
+
+    if batch_action == "Update":
+        st.markdown("**Set on every student** — blank fields keep their current values")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            batch_name = st.text_input("New Student Name", key="batch_name", placeholder="Updated name")
+        with col2:
+            batch_comp = st.text_input("New Company Name", key="batch_comp", placeholder="Updated company")
+        with col3:
+            batch_set_exp = st.checkbox("Set years of experience", key="batch_set_exp")
+            batch_exp = st.number_input("New Years of Experience", min_value=MIN_EXPERIENCE, max_value=MAX_EXPERIENCE,
+                                        value=MIN_EXPERIENCE, disabled=not batch_set_exp, key="batch_exp")
+        common = {k: v for k, v in (("student_name", batch_name.strip()), ("company_name", batch_comp.strip())) if v}
+        if batch_set_exp:
+            common["years_of_experience"] = batch_exp
+        operations = [{"op": "update", "student_id": sid, "data": {**common, **fields}} for sid, fields in targets.items()]
+        unchanged = [op["student_id"] for op in operations if not op["data"]]
+        if unchanged:
+            st.warning(f"{len(unchanged)} student(s) have no fields to set and will be rejected, e.g. {unchanged[0]}.")
+    elif batch_action == "Delete":
+        operations = [{"op": "delete", "student_id": sid} for sid in targets]
+    else:
+        operations = [{"op": "get", "student_id": sid} for sid in targets]
+
+    st.markdown(f"**{len(operations):,} student(s) selected.**")
+    if operations:
+        with st.expander("📋 Operations Preview (JSON, first 20)"):
+            st.code(json.dumps(operations[:20], indent=2), language="json")
+    confirmed = True
+    if batch_action == "Delete":
+        st.warning("⚠️ Deletion is permanent and cannot be undone.")
+        confirmed = st.checkbox(f"I confirm I want to delete these **{len(operations):,}** student(s)", key="batch_confirm")
+
+    if st.button(f"▶ {batch_action} Students", disabled=not operations or not confirmed, key="batch_run"):
+        progress = st.progress(0.0, text="Starting…")
+        results, started = [], time.perf_counter()
+        for finished in get_client().batch(operations, workers=BATCH_WORKERS):
+            results += finished
+            progress.progress(len(results) / len(operations), text=f"{len(results):,} / {len(operations):,} done")
+        elapsed = time.perf_counter() - started
+        if batch_action != "Fetch":
+            # Bulk writes bypass make_request, so drop what they may have changed from the read cache here.
+            get_read_cache().invalidate({f"/students/{sid}" for sid in targets})
+        results.sort(key=lambda r: r["index"])
+        succeeded = sum(1 for r in results if 200 <= r["status"] < 300)
+        st.success(f"✅ {succeeded:,} succeeded   ❌ {len(results) - succeeded:,} failed   ⏱ {elapsed:.1f} s")
+        table = pd.DataFrame([{"student_id": r["student_id"], "status": r["status"],
+                               "message": r["message"], **(r.get("data") or {})} for r in results])
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.download_button("⬇ Download results (CSV)", table.to_csv(index=False),
+                           file_name=f"batch_{batch_action.lower()}_results.csv", mime="text/csv")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# ════════════════════════════════════════════════════════════════════════════════
+# ANALYTICS TAB
+# ════════════════════════════════════════════════════════════════════════════════
+with tab_stats:
+    st.markdown('<div class="api-card">', unsafe_allow_html=True)
+    st.markdown('<span class="badge-stats">STATS</span> &nbsp; Roster analytics', unsafe_allow_html=True)
+    st.markdown("**Endpoint:** `GET /students/stats?top=…&company_name=…`")
+    st.caption("Aggregates are kept up to date by the API on every write; no student rows are downloaded.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        top_n = st.slider("Companies to chart", min_value=5, max_value=100, value=20, step=5)
+    with col2:
+        stats_company = st.text_input("Experience for one company (exact, optional)", placeholder="e.g. Infosys")
+
+    params = {"top": top_n}
+    if stats_company.strip():
+        params["company_name"] = stats_company.strip()
+    code, data, url, ts = make_request("GET", "/students/stats?" + urlencode(params))
+    if code != 200:
+        render_response(code, data, url, ts)
+    else:
+        stats = data["data"]
+        experience = stats["experience"]
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Students", f"{stats['count']:,}")
+        m2.metric("Companies", f"{stats['company_count']:,}")
+        m3.metric("Mean experience", "—" if experience["mean"] is None else f"{experience['mean']:.1f} yrs")
+        m4.metric("Median experience", "—" if experience["percentiles"]["p50"] is None
+                  else f"{experience['percentiles']['p50']} yrs")
+        m5.metric("Range", "—" if experience["min"] is None else f"{experience['min']}–{experience['max']} yrs")
+
+        st.markdown("#### 🏢 Headcount by company")
+        if stats["companies"]:
+            companies = pd.DataFrame(stats["companies"]).set_index("company_name")
+            st.bar_chart(companies["count"])
+            if stats["other_students"]:
+                st.caption(f"{stats['other_students']:,} more students work at the "
+                           f"{stats['company_count'] - len(stats['companies']):,} companies not shown.")
+        else:
+            st.info("No students yet.")
+
+        scope = experience["company_name"] or "all companies"
+        st.markdown(f"#### 📈 Years of experience — {scope}")
+        if experience["histogram"]:
+            st.bar_chart(pd.DataFrame(experience["histogram"]).set_index("years")["count"])
+            st.dataframe(pd.DataFrame([experience["percentiles"]]), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"No students at '{scope}'.")
+        st.caption(f"Fetched {ts}")
+    st.markdown("</div>", unsafe_allow_html=True)
+
 # ════════════════════════════════════════════════════════════════════════════════
 # HOW TO USE TAB
 # ════════════════════════════════════════════════════════════════════════════════
@@ -433,7 +973,7 @@ You should see ✅ Flask API is online!
 
         st.markdown("""
 **🟢 GET — Read Data**  
-- *All students*: Click the `🟢 GET` tab → select "All Students" → click **Fetch All Students**  
+- *All students*: Click the `🟢 GET` tab → select "All Students" → sort, filter and page through the table  
 - *Single student*: Select "Single Student by ID" → type `STU001` → click **Fetch Student**
 
 ---
@@ -464,6 +1004,23 @@ You should see ✅ Flask API is online!
 - Check the confirmation checkbox  
 - Click **Delete Student**  
 - ✅ Expect `HTTP 200 OK` + 🎈 balloons animation
+
+---
+
+**🟣 BULK — Many Changes at Once**  
+- Go to `🟣 BULK` tab  
+- Upload a CSV or JSON file of operations  
+- Check the preview, then click **Run Bulk Operations**  
+- ✅ A result row per operation (201/200, or 400/404/409 for rejected ones)
+
+---
+
+**🟠 BATCH — Many Students by ID**  
+- Go to `🟠 BATCH` tab and pick **Fetch**, **Update** or **Delete**  
+- Paste IDs (e.g. `STU001, STU002, STU003`) or upload a CSV with a `student_id` column  
+- For updates, fill in the fields to set on every student  
+- Click the run button and watch the progress bar  
+- ✅ A result row per student, downloadable as CSV
         """)
 
     st.markdown("---")
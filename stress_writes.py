@@ -0,0 +1,175 @@
+"""
+Concurrency stress test — hammers the Student API with parallel writes
+Runs several worker processes (like gunicorn workers), each with many threads
+issuing POST/PUT/DELETE plus concurrent GETs against its own copy of the app,
+all sharing one data directory. Afterwards it reloads the data from disk and
+checks that no write was lost, then checks that once another worker has
+written, both the Flask and the ASGI app serve the new data: no cached body
+from before the write, and no 304 to an old ETag.
+
+Usage:
+    python stress_writes.py [--processes 4] [--threads 16] [--writes 100] [--backend json|sqlite|columnar|shared]
+
+Exits with status 1 if any record is missing, stale or unexpectedly present.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _worker(proc_no, threads, writes, failures):
+    # Imported here so every process builds its own store on the shared files.
+    import flask_api
+    import metrics
+    from columnar_store import ColumnarStudentStore
+    from shared_store import SharedSnapshotStore
+    from student_store import JSONStudentStore
+
+    store_classes = {"json": JSONStudentStore, "columnar": ColumnarStudentStore, "shared": SharedSnapshotStore}
+    if flask_api.STORAGE_BACKEND in store_classes:
+        # Compact often so log swaps race with the writers too.
+        store_class = store_classes[flask_api.STORAGE_BACKEND]
+        flask_api.store = metrics.TimedStore(store_class(flask_api.DATA_FILE, compact_every=200))
+
+    def hammer(thread_no):
+        client = flask_api.app.test_client()
+        prefix = f"P{proc_no}T{thread_no}N"
+        for n in range(writes):
+            sid = f"{prefix}{n}"
+            r = client.post("/students", json={
+                "student_id": sid, "student_name": f"Student {sid}",
+                "years_of_experience": n % 40, "company_name": "Stress Inc",
+            })
+            if r.status_code != 201:
+                failures.put(f"POST {sid} -> {r.status_code}")
+            if n % 3 == 0:
+                r = client.put(f"/students/{sid}", json={"company_name": "Updated Inc"})
+                if r.status_code != 200:
+                    failures.put(f"PUT {sid} -> {r.status_code}")
+            if n % 5 == 0:
+                r = client.delete(f"/students/{sid}")
+                if r.status_code != 200:
+                    failures.put(f"DELETE {sid} -> {r.status_code}")
+            if client.get("/students/STU001").status_code != 200 or client.get("/students").status_code != 200:
+                failures.put(f"GET failed during {sid}")
+
+    pool = [threading.Thread(target=hammer, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def check_freshness(backend, data_file, db_file):
+    """Problems seen when a write by another worker's store is read through each app."""
+    import flask_api
+    from starlette.testclient import TestClient
+
+    import asgi_app
+    from student_store import open_store
+
+    other = open_store(backend, data_file, db_file)  # stands in for another worker process
+    errors = []
+    for name, client in (("flask", flask_api.app.test_client()), ("asgi", TestClient(asgi_app.app))):
+        sid, company = f"FRESH{name.upper()}", f"Fresh {name}"
+        other.create({"student_id": sid, "student_name": f"Student {sid}",
+                      "years_of_experience": 1, "company_name": company})
+        urls = [f"/students?company_name={company}", f"/students/search?q={sid}",
+                f"/students/stats?company_name={company}", f"/students/{sid}"]
+        for url in urls:
+            client.get(url)  # the first read catches up; the ETag of the next one is what a client holds
+        etags = {url: client.get(url).headers.get("ETag") for url in urls}
+        other.update(sid, {"years_of_experience": 2})
+        other.create({"student_id": f"{sid}2", "student_name": f"Student {sid}",
+                      "years_of_experience": 3, "company_name": company})
+        bodies = {url: json.loads(client.get(url).text) for url in urls}
+        seen = {urls[0]: bodies[urls[0]]["count"], urls[1]: bodies[urls[1]]["count"],
+                urls[2]: bodies[urls[2]]["data"]["experience"]["count"],
+                urls[3]: bodies[urls[3]]["data"]["years_of_experience"]}
+        for url, value in seen.items():
+            if value != 2:
+                errors.append(f"{name}: GET {url} served a cached body from before the writes ({value} != 2)")
+        for url, etag in etags.items():
+            r = client.get(url, headers={"If-None-Match": etag})
+            if r.status_code != 200:
+                errors.append(f"{name}: GET {url} with a pre-write ETag -> {r.status_code}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=100, help="POSTs per thread")
+    parser.add_argument("--backend", choices=["json", "sqlite", "columnar", "shared"], default="json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="student-stress-")
+    data_file = os.path.join(workdir, "students.json")
+    db_file = os.path.join(workdir, "students.db")
+    shutil.copy(os.path.join(HERE, "students.json"), data_file)
+    os.environ["STUDENT_STORAGE"] = args.backend
+    os.environ["STUDENT_DATA_FILE"] = data_file
+    os.environ["STUDENT_DB_FILE"] = db_file
+    os.environ["RATE_LIMITS"] = "off"   # every writer is the same client
+    sys.path.insert(0, HERE)
+
+    try:
+        from student_store import open_store
+        initial = {s["student_id"]: s for s in open_store(args.backend, data_file, db_file).all()}
+
+        failures = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_worker, args=(p, args.threads, args.writes, failures))
+                 for p in range(args.processes)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+
+        errors = []
+        while not failures.empty():
+            errors.append(failures.get())
+        errors += [f"worker {p.pid} exited with {p.exitcode}" for p in procs if p.exitcode]
+
+        final = {s["student_id"]: s for s in open_store(args.backend, data_file, db_file).all()}
+        expected = dict(initial)
+        for p in range(args.processes):
+            for t in range(args.threads):
+                for n in range(args.writes):
+                    sid = f"P{p}T{t}N{n}"
+                    if n % 5 == 0:
+                        continue
+                    expected[sid] = "Updated Inc" if n % 3 == 0 else "Stress Inc"
+
+        for sid, company in expected.items():
+            record = final.get(sid)
+            if record is None:
+                errors.append(f"lost write: {sid} missing")
+            elif isinstance(company, str) and record["company_name"] != company:
+                errors.append(f"lost update: {sid} has company {record['company_name']!r}")
+        errors += [f"unexpected record: {sid}" for sid in final.keys() - expected.keys()]
+        errors += check_freshness(args.backend, data_file, db_file)
+
+        total = args.processes * args.threads * args.writes
+        print(f"{total} creates from {args.processes} processes x {args.threads} threads; "
+              f"{len(final)} records on disk, {len(expected)} expected")
+        if errors:
+            print(f"FAILED — {len(errors)} problem(s):")
+            for e in errors[:20]:
+                print("  " + e)
+            sys.exit(1)
+        print("OK — no lost writes")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Student Client — Python client for the Student API
+One pooled, keep-alive ``requests.Session`` per client, (connect, read)
+timeouts, and automatic retries with exponential backoff for idempotent verbs
+(GET, PUT, DELETE) on connection failures, 429 and 502/503/504, waiting as
+long as the server's Retry-After asks. :meth:`StudentClient.batch` runs
+many fetches, updates and deletes at once: writes go through the bulk
+endpoint, a chunk per request, or fan out over a thread pool against servers
+without one. Used by streamlit_app.py and bench_api.py; usable from any
+script:
+
+    from student_client import StudentClient
+
+    with StudentClient("http://127.0.0.1:5000") as api:
+        api.create_student({"student_id": "STU100", "student_name": "Asha",
+                            "years_of_experience": 2, "company_name": "Zoho"})
+        for student in api.iter_students(company_name="Zoho"):
+            print(student["student_name"])
+"""
+
+import json as jsonlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = "http://127.0.0.1:5000"
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = (429, 502, 503, 504)
+ADMISSION_STATUSES = (429, 503)  # refused by admission control, before the request ran
+BULK_CHUNK = 2000  # operations per bulk request in batch(); the API accepts up to 10,000
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class ApiResponse(NamedTuple):
+    """Status code, decoded JSON body (``None`` for 304) and response headers of one call."""
+    status: int
+    data: Optional[Dict[str, Any]]
+    url: str
+    headers: Mapping[str, str]
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("ETag")
+
+
+class StudentClient:
+    """Typed access to every Student API endpoint.
+
+    Safe to share between threads: the session's connection pool holds up to
+    ``pool_size`` keep-alive connections. Errors the server answers (404, 409,
+    412, …) come back as an :class:`ApiResponse`; network failures that outlast
+    the retries raise ``requests.RequestException``.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: Timeout = (3.05, 10.0),
+                 retries: int = 3, backoff: float = 0.3, pool_size: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.bulk_supported: Optional[bool] = None  # learned on the first batch() write
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "StudentClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── Transport ────────────────────────────────────────────────────────────
+
+    def request(self, method: str, path: str, json: Any = None, params: Optional[Mapping[str, Any]] = None,
+                headers: Optional[Mapping[str, str]] = None, data: Optional[bytes] = None,
+                timeout: Optional[Timeout] = None) -> ApiResponse:
+        """Send one request to ``path`` (e.g. ``/students/STU001``) and decode the JSON reply."""
+        url = self.base_url + path
+        r = self.session.request(method, url, json=json, params=params, headers=headers, data=data,
+                                 timeout=timeout or self.timeout)
+        if r.status_code == 304 or not r.content:
+            body = None
+        else:
+            try:
+                body = r.json()
+            except ValueError:
+                body = {"status": "error", "message": r.text[:500]}
+        return ApiResponse(r.status_code, body, r.url, r.headers)
+
+    @staticmethod
+    def _conditional(etag: Optional[str] = None, if_match: Optional[str] = None) -> Dict[str, str]:
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if if_match:
+            headers["If-Match"] = if_match
+        return headers
+
+    # ── Endpoints ────────────────────────────────────────────────────────────
+
+    def health(self) -> ApiResponse:
+        return self.request("GET", "/health")
+
+    def list_students(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      fields: Optional[List[str]] = None, company_name: Optional[str] = None,
+                      min_experience: Optional[int] = None, max_experience: Optional[int] = None,
+                      etag: Optional[str] = None) -> ApiResponse:
+        """GET /students. Pass a previous response's ``etag`` to get a 304 if nothing changed."""
+        params = {
+            "limit": limit, "cursor": cursor, "fields": ",".join(fields) if fields else None,
+            "company_name": company_name, "min_experience": min_experience, "max_experience": max_experience,
+        }
+        return self.request("GET", "/students", params={k: v for k, v in params.items() if v is not None},
+                            headers=self._conditional(etag))
+
+    def iter_students(self, page_size: int = 500, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Yield every matching student, following ``next_cursor`` page by page."""
+        cursor = None
+        while True:
+            response = self.list_students(limit=page_size, cursor=cursor, **filters)
+            if not response.ok:
+                raise requests.HTTPError(f"GET /students returned {response.status}: {response.data}")
+            yield from response.data["data"]
+            cursor = response.data.get("next_cursor")
+            if not cursor:
+                return
+
+    def search(self, q: str, limit: Optional[int] = None, etag: Optional[str] = None) -> ApiResponse:
+        """GET /students/search: students whose ID, name or company match ``q``, best first."""
+        params = {"q": q} if limit is None else {"q": q, "limit": limit}
+        return self.request("GET", "/students/search", params=params, headers=self._conditional(etag))
+
+    def stats(self, top: Optional[int] = None, company_name: Optional[str] = None,
+              etag: Optional[str] = None) -> ApiResponse:
+        """GET /students/stats: headcount per company and the years_of_experience distribution."""
+        params = {k: v for k, v in (("top", top), ("company_name", company_name)) if v is not None}
+        return self.request("GET", "/students/stats", params=params, headers=self._conditional(etag))
+
+    def changes(self, since: Optional[int] = None, timeout: Optional[int] = None) -> ApiResponse:
+        """Long-poll GET /students/changes: waits up to ``timeout`` s for changes after version ``since``."""
+        params = {k: v for k, v in (("since", since), ("timeout", timeout)) if v is not None}
+        read_timeout = (timeout if timeout is not None else 25) + 10
+        connect = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+        return self.request("GET", "/students/changes", params=params, timeout=(connect, read_timeout))
+
+    def follow_changes(self, since: Optional[int] = None,
+                       read_timeout: float = 60.0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream GET /students/changes (SSE) as ``(event, data)`` pairs.
+
+        Events are ``ready`` (``{"version"}``), ``change`` (one create/update/
+        delete) and ``reset`` (reload everything). Runs until the connection
+        drops; resume by passing the last ``version`` seen as ``since``.
+        """
+        params = {} if since is None else {"since": since}
+        connect = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+        with self.session.get(self.base_url + "/students/changes", params=params,
+                              headers={"Accept": "text/event-stream"}, stream=True,
+                              timeout=(connect, read_timeout)) as r:
+            r.raise_for_status()
+            event, data = "message", []
+            for line in r.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line:
+                    if data:
+                        yield event, jsonlib.loads("\n".join(data))
+                    event, data = "message", []
+                elif line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+
+    def get_student(self, student_id: str, etag: Optional[str] = None) -> ApiResponse:
+        return self.request("GET", f"/students/{student_id}", headers=self._conditional(etag))
+
+    def create_student(self, student: Mapping[str, Any]) -> ApiResponse:
+        return self.request("POST", "/students", json=dict(student))
+
+    def update_student(self, student_id: str, fields: Mapping[str, Any],
+                       if_match: Optional[str] = None) -> ApiResponse:
+        """PUT /students/<id>. With ``if_match`` (an ETag) the server answers 412 if the record changed."""
+        return self.request("PUT", f"/students/{student_id}", json=dict(fields),
+                            headers=self._conditional(if_match=if_match))
+
+    def delete_student(self, student_id: str, if_match: Optional[str] = None) -> ApiResponse:
+        return self.request("DELETE", f"/students/{student_id}", headers=self._conditional(if_match=if_match))
+
+    def bulk(self, operations: List[Mapping[str, Any]]) -> ApiResponse:
+        """POST /students/_bulk. Not retried automatically, since creates are not idempotent."""
+        return self.request("POST", "/students/_bulk", json=list(operations))
+
+    def export(self, fmt: str = "ndjson", **filters: Any) -> Iterator[bytes]:
+        """Stream GET /students/export line by line without holding the whole roster in memory."""
+        params = {"format": fmt, **{k: v for k, v in filters.items() if v is not None}}
+        with self.session.get(self.base_url + "/students/export", params=params,
+                              timeout=self.timeout, stream=True) as r:
+            r.raise_for_status()
+            yield from r.iter_lines()
+
+    def metrics(self) -> str:
+        """GET /metrics as Prometheus text."""
+        r = self.session.get(self.base_url + "/metrics", timeout=self.timeout)
+        r.raise_for_status()
+        return r.text
+
+    # ── Batches ──────────────────────────────────────────────────────────────
+
+    def batch(self, operations: List[Mapping[str, Any]], workers: Optional[int] = None,
+              chunk_size: int = BULK_CHUNK) -> Iterator[List[Dict[str, Any]]]:
+        """Run many operations at once, yielding lists of per-item results as they finish.
+
+        Operations are bulk operations (``create`` / ``update`` / ``delete``,
+        see :meth:`bulk`) or ``{"op": "get", "student_id": ...}``. Each result
+        is ``{"index", "op", "student_id", "status", "message"}`` like a bulk
+        result, plus ``data`` for a fetched student. Gets fan out over
+        ``workers`` threads (the connection pool size by default). Writes go
+        to the bulk endpoint ``chunk_size`` at a time, or fan out like gets
+        if the server has no bulk endpoint. Results come back in completion
+        order; a network failure is reported as status 0.
+        """
+        workers = workers or self.pool_size
+        indexed = list(enumerate(operations))
+        reads = [(i, op) for i, op in indexed if op["op"] == "get"]
+        writes = [(i, op) for i, op in indexed if op["op"] != "get"]
+        while writes and self.bulk_supported is not False:
+            chunk, writes = writes[:chunk_size], writes[chunk_size:]
+            results = self._bulk_chunk(chunk)
+            if results is None:  # no bulk endpoint: run this chunk and the rest one by one
+                writes = chunk + writes
+                break
+            yield results
+        yield from self._fan_out(reads + writes, workers)
+
+    def _bulk_chunk(self, chunk: List[Tuple[int, Mapping[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """One bulk request for ``chunk``; None if the server has no bulk endpoint."""
+        for attempt in range(self.retries + 1):
+            try:
+                r = self.bulk([op for _, op in chunk])
+            except requests.RequestException as e:
+                return [self._failed(i, op, e) for i, op in chunk]
+            # Admission control turns requests away before they run, so a refused chunk is safe to resend.
+            if r.status not in ADMISSION_STATUSES or attempt == self.retries:
+                break
+            time.sleep(float(r.headers.get("Retry-After", 1)))
+        if r.status in (404, 405):
+            self.bulk_supported = False
+            return None
+        if r.status != 200:
+            message = (r.data or {}).get("message", f"HTTP {r.status}")
+            return [{"index": i, "op": op["op"], "student_id": _target(op), "status": r.status, "message": message}
+                    for i, op in chunk]
+        self.bulk_supported = True
+        return [{**result, "index": chunk[result["index"]][0], "op": chunk[result["index"]][1]["op"],
+                 "student_id": _target(chunk[result["index"]][1])} for result in r.data["results"]]
+
+    def _fan_out(self, items: List[Tuple[int, Mapping[str, Any]]], workers: int) -> Iterator[List[Dict[str, Any]]]:
+        if not items:
+            return
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="student-batch")
+        try:
+            futures = {pool.submit(self._one, op): (i, op) for i, op in items}
+            for future in as_completed(futures):
+                i, op = futures[future]
+                try:
+                    r = future.result()
+                except requests.RequestException as e:
+                    yield [self._failed(i, op, e)]
+                    continue
+                body = r.data or {}
+                result = {"index": i, "op": op["op"], "student_id": _target(op), "status": r.status,
+                          "message": body.get("message", "Student found" if r.ok else f"HTTP {r.status}")}
+                if body.get("errors"):
+                    result["errors"] = body["errors"]
+                if op["op"] == "get" and r.ok:
+                    result["data"] = body.get("data")
+                yield [result]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _one(self, op: Mapping[str, Any]) -> ApiResponse:
+        if op["op"] == "get":
+            return self.get_student(op["student_id"])
+        if op["op"] == "create":
+            return self.create_student(op["data"])
+        if op["op"] == "update":
+            return self.update_student(op["student_id"], op["data"])
+        return self.delete_student(op["student_id"])
+
+    @staticmethod
+    def _failed(index: int, op: Mapping[str, Any], error: Exception) -> Dict[str, Any]:
+        return {"index": index, "op": op["op"], "student_id": _target(op), "status": 0, "message": str(error)}
+
+
+def _target(op: Mapping[str, Any]) -> Optional[str]:
+    """The student an operation names."""
+    return op.get("student_id") or (op.get("data") or {}).get("student_id")
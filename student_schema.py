@@ -0,0 +1,177 @@
+"""
+Student Schema — one declarative definition of a valid student
+Every write path validates against the schema below: POST and PUT, each item
+of POST /students/_bulk, and each line of an NDJSON upload. The field
+definitions are compiled once, at import, into plain functions, so checking
+a record is a handful of type checks and comparisons with no per-call
+interpretation of the schema.
+
+Invalid input raises :class:`ValidationError`, a ``ValueError`` whose
+``errors`` maps each bad field to what is wrong with it:
+
+    try:
+        student = validate_student(body)
+    except ValidationError as e:
+        e.errors   # {"years_of_experience": "must be an integer"}
+"""
+
+import re
+
+MIN_EXPERIENCE = 0
+MAX_EXPERIENCE = 50
+MAX_ID_LENGTH = 64
+MAX_TEXT_LENGTH = 100
+# GET /students/<name> routes; a student with one of these IDs could never be read.
+RESERVED_IDS = ("changes", "export", "search", "stats")
+BULK_OPS = ["create", "update", "delete"]
+
+
+class Invalid(ValueError):
+    """Raised by a compiled field check; the message completes "'<field>' ..."."""
+
+
+class ValidationError(ValueError):
+    """A rejected payload. ``errors`` maps field names to problems (empty if the body itself is wrong)."""
+
+    def __init__(self, errors=None, message=None):
+        self.errors = errors or {}
+        super().__init__(message or "; ".join(f"'{name}' {problem}" for name, problem in self.errors.items()))
+
+
+# ── Field types ──────────────────────────────────────────────────────────────
+
+class Text:
+    """A string, stripped of surrounding whitespace, 1 to ``max_length`` characters long and not ``reserved``."""
+
+    def __init__(self, max_length=MAX_TEXT_LENGTH, pattern=None, describe=None, reserved=()):
+        self.max_length = max_length
+        self.pattern = re.compile(pattern) if pattern else None
+        self.describe = describe
+        self.reserved = frozenset(reserved)
+
+    def compile(self):
+        max_length, fullmatch, describe = self.max_length, self.pattern and self.pattern.fullmatch, self.describe
+        reserved, taken = self.reserved, f"must not be one of {sorted(self.reserved)}"
+
+        def check(value):
+            if type(value) is not str:
+                raise Invalid("must be a string")
+            value = value.strip()
+            if not value:
+                raise Invalid("must not be empty")
+            if len(value) > max_length:
+                raise Invalid(f"must be at most {max_length} characters")
+            if fullmatch and not fullmatch(value):
+                raise Invalid(describe)
+            if value in reserved:
+                raise Invalid(taken)
+            return value
+        return check
+
+
+class Integer:
+    """A whole number between ``minimum`` and ``maximum``; integral floats and digit strings are converted."""
+
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def compile(self):
+        minimum, maximum = self.minimum, self.maximum
+        out_of_range = f"must be between {minimum} and {maximum}"
+
+        def check(value):
+            if type(value) is not int:
+                value = _to_int(value)
+            if value < minimum or value > maximum:
+                raise Invalid(out_of_range)
+            return value
+        return check
+
+
+def _to_int(value):
+    if type(value) is float and value.is_integer():   # False for inf and nan
+        return int(value)
+    if type(value) is str:
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise Invalid("must be an integer")
+
+
+# ── Schema ───────────────────────────────────────────────────────────────────
+
+class Schema:
+    """Named field types, compiled into validators for whole payloads."""
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def validator(self, required=(), optional=(), at_least_one=False):
+        """A function ``validate(body) -> record`` that keeps only ``required`` and ``optional`` fields.
+
+        Unknown keys are ignored. With ``at_least_one`` a body carrying none
+        of the fields is rejected. Raises :class:`ValidationError`.
+        """
+        checks = tuple((name, self.fields[name].compile(), name in required) for name in (*required, *optional))
+        nothing = f"Send at least one of {list(optional)}"
+
+        def validate(body):
+            if type(body) is not dict:
+                raise ValidationError(message="Request body must be JSON")
+            record, errors = {}, None
+            for name, check, needed in checks:
+                if name in body:
+                    try:
+                        record[name] = check(body[name])
+                    except Invalid as e:
+                        errors = errors or {}
+                        errors[name] = str(e)
+                elif needed:
+                    errors = errors or {}
+                    errors[name] = "is required"
+            if errors:
+                raise ValidationError(errors)
+            if at_least_one and not record:
+                raise ValidationError(message=nothing)
+            return record
+        return validate
+
+
+STUDENT = Schema(
+    student_id=Text(MAX_ID_LENGTH, pattern=r"[A-Za-z0-9][A-Za-z0-9_.-]*",
+                    describe="may only contain letters, digits, '_', '.' and '-', starting with a letter or digit",
+                    reserved=RESERVED_IDS),
+    student_name=Text(),
+    years_of_experience=Integer(MIN_EXPERIENCE, MAX_EXPERIENCE),
+    company_name=Text(),
+)
+STUDENT_FIELDS = list(STUDENT.fields)
+UPDATABLE_FIELDS = [f for f in STUDENT_FIELDS if f != "student_id"]
+
+validate_student = STUDENT.validator(required=STUDENT_FIELDS)
+validate_update = STUDENT.validator(optional=UPDATABLE_FIELDS, at_least_one=True)
+
+
+def validate_operation(item):
+    """Validate one bulk item into a store operation (see ``StudentStore.apply``).
+
+    Updates and deletes name an existing student, so their ``student_id`` is
+    only checked for being a string; the ID format applies to creates.
+    """
+    if type(item) is not dict:
+        raise ValidationError(message="Item must be a JSON object")
+    op = item.get("op")
+    if op not in BULK_OPS:
+        raise ValidationError({"op": f"must be one of {BULK_OPS}"})
+    if op != "delete" and type(item.get("data")) is not dict:
+        raise ValidationError({"data": "must be a JSON object"})
+    if op == "create":
+        return {"op": "create", "data": validate_student(item["data"])}
+    student_id = item.get("student_id")
+    if type(student_id) is not str or not student_id:
+        raise ValidationError({"student_id": "is required"})
+    if op == "delete":
+        return {"op": "delete", "student_id": student_id}
+    return {"op": "update", "student_id": student_id, "data": validate_update(item["data"])}
@@ -0,0 +1,948 @@
+"""
+Student Store — storage backends for the student database
+Defines the storage interface used by flask_api.py and its default backend:
+a resident, indexed copy of students.json that appends every mutation to a
+write-ahead log and compacts the log in the background.
+
+Safe to share between threads and between worker processes (gunicorn etc.):
+readers run in parallel, writers are serialized by an fcntl file lock and
+committed in groups.
+
+Other backends: sqlite_store.py (SQLite, for datasets that outgrow memory),
+columnar_store.py (this backend with a compact in-memory layout) and
+shared_store.py (this backend reading one memory-mapped snapshot shared by
+every worker process). Pick one with open_store().
+"""
+
+import bisect
+import heapq
+import json
+import os
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process only
+    fcntl = None
+
+
+class StoreError(Exception):
+    """Base class for errors raised by the student store."""
+
+
+class StudentNotFound(StoreError):
+    def __init__(self, student_id):
+        super().__init__(f"Student '{student_id}' not found")
+        self.student_id = student_id
+
+
+class StudentExists(StoreError):
+    def __init__(self, student_id):
+        super().__init__(f"Student ID '{student_id}' already exists")
+        self.student_id = student_id
+
+
+class PreconditionFailed(StoreError):
+    def __init__(self, student_id):
+        super().__init__(f"Student '{student_id}' was modified by someone else")
+        self.student_id = student_id
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _new_generation():
+    """A random generation for a new store lineage."""
+    return int.from_bytes(os.urandom(8), "big") >> 1
+
+
+def encode_snapshot(records, chunk_size=10000):
+    """``json.dumps(list(records), indent=2)`` as bytes, without building the whole list at once."""
+    records, parts = iter(records), []
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        parts.append(json.dumps(chunk, indent=2)[2:-2])  # without the enclosing "[\n" and "\n]"
+    return ("[\n" + ",\n".join(parts) + "\n]").encode() if parts else b"[]"
+
+
+def replace_file(path, data, tmp=None):
+    """Write ``data`` to ``path`` atomically: temp file (``<path>.tmp`` by default), fsync, rename."""
+    tmp = tmp or path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ── Locks ────────────────────────────────────────────────────────────────────
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer. Waiting writers hold off new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+@contextmanager
+def file_lock(path, exclusive):
+    """Advisory ``flock`` on ``path``, shared or exclusive, across processes.
+
+    Each call opens its own descriptor: flock locks belong to the open file,
+    so reusing one descriptor would silently convert shared into exclusive.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class _PendingWrite:
+    __slots__ = ("prepare", "result", "error", "done")
+
+    def __init__(self, prepare):
+        self.prepare = prepare
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+# ── Interface ────────────────────────────────────────────────────────────────
+
+class BaseStudentStore:
+    """Storage interface the API routes are written against.
+
+    Records are plain dicts with the four student fields. Write methods raise
+    :class:`StudentExists` / :class:`StudentNotFound` / :class:`PreconditionFailed`.
+
+    Change tracking, used for HTTP validators:
+
+    * ``version`` — data version, increases with every mutation.
+    * ``generation`` — identifies the data's lineage: it changes only when
+      versions could restart (a new store, or the JSON snapshot replaced
+      behind the store's back), never on compaction; validators must include it.
+    * ``last_modified`` — Unix time of the last mutation.
+    * :meth:`record_version` — the ``version`` that last wrote a record.
+
+    Change events, used by in-memory views such as the search index: see
+    :meth:`subscribe` and :class:`StoreView`.
+    """
+
+    version = 0
+    generation = 0
+    last_modified = 0.0
+
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Call ``listener(event)`` for every change this process sees, in version order.
+
+        ``event`` is ``{"op": "create" | "update" | "delete", "student_id",
+        "old", "new", "version"}``, with ``old`` / ``new`` ``None`` where the
+        record did not / does not exist, or ``{"op": "reset", "version"}`` when
+        the changes in between are unknown and listeners must rebuild from
+        :meth:`snapshot`. Writes by other processes arrive on :meth:`refresh`.
+        Listeners may run under the store's write lock: they must be quick and
+        must not call back into the store.
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, event):
+        for listener in self._listeners:
+            listener(event)
+
+    def refresh(self):
+        """Pick up writes made by other processes, delivering their change events."""
+
+    def snapshot(self):
+        """``(version, every student)``, read atomically."""
+        raise NotImplementedError
+
+    def all(self):
+        """Every student, in insertion order."""
+        raise NotImplementedError
+
+    def get(self, student_id):
+        """The student with ``student_id``, or ``None``."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def record_version(self, student_id):
+        """Version of the write that produced the current record, or ``None`` if absent."""
+        raise NotImplementedError
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        """Students matching the filters, ordered by ``sort`` then ``student_id``.
+
+        Returns at most ``limit`` records that come after ``after`` in that
+        order (keyset pagination); ``after`` is the :func:`sort_key` of the
+        last record already seen. Filters and sorts must be answered from
+        indexes, not by scanning every record.
+        """
+        raise NotImplementedError
+
+    def apply(self, operations):
+        """Apply a batch of writes in one storage commit.
+
+        Each operation is one of::
+
+            {"op": "create", "data": {...full record...}}
+            {"op": "update", "student_id": "STU001", "data": {...fields to merge...}}
+            {"op": "delete", "student_id": "STU001"}
+
+        Updates and deletes may carry ``"if_version": n`` to apply only if
+        :meth:`record_version` is still ``n`` (optimistic concurrency).
+
+        Operations run in order, each seeing the ones before it. Returns one
+        entry per operation: the resulting record (the deleted one for a
+        delete) or the :class:`StoreError` that rejected it. A rejected
+        operation does not stop the rest of the batch.
+        """
+        raise NotImplementedError
+
+    def _apply_one(self, operation):
+        result = self.apply([operation])[0]
+        if isinstance(result, StoreError):
+            raise result
+        return result
+
+    def create(self, student):
+        """Insert ``student`` and return it."""
+        return self._apply_one({"op": "create", "data": student})
+
+    def update(self, student_id, fields, if_version=None):
+        """Merge ``fields`` into an existing student and return the new record."""
+        return self._apply_one({"op": "update", "student_id": student_id, "data": fields,
+                                "if_version": if_version})
+
+    def delete(self, student_id, if_version=None):
+        """Remove a student and return the deleted record."""
+        return self._apply_one({"op": "delete", "student_id": student_id, "if_version": if_version})
+
+
+BACKENDS = ("json", "sqlite", "columnar", "shared")
+SORT_FIELDS = ("student_id", "student_name", "years_of_experience", "company_name")
+
+
+def sort_key(student, sort="student_id"):
+    """Keyset position of ``student`` in ``sort`` order: the id, or ``(value, id)``."""
+    if sort == "student_id":
+        return student["student_id"]
+    return (student[sort], student["student_id"])
+
+
+def open_store(backend, data_file, db_file):
+    """Open the configured backend.
+
+    ``data_file`` is the students.json snapshot; the SQLite backend imports it
+    into ``db_file`` the first time the database is created.
+    """
+    if backend == "json":
+        return JSONStudentStore(data_file)
+    if backend == "sqlite":
+        from sqlite_store import SQLiteStudentStore
+        return SQLiteStudentStore(db_file, seed_file=data_file)
+    if backend == "columnar":
+        from columnar_store import ColumnarStudentStore
+        return ColumnarStudentStore(data_file)
+    if backend == "shared":
+        from shared_store import SharedSnapshotStore
+        return SharedSnapshotStore(data_file)
+    raise ValueError(f"Unknown storage backend {backend!r}; expected one of {BACKENDS}")
+
+
+# ── Derived views ────────────────────────────────────────────────────────────
+
+class StoreView:
+    """In-memory structure derived from a store's records, kept current by its change events.
+
+    Subclasses implement :meth:`_clear`, :meth:`_add` and :meth:`_remove`
+    (and may override :meth:`_load` for a faster bulk build); they run under
+    :attr:`lock`, which readers of the structure must hold too. The view is
+    built from :meth:`BaseStudentStore.snapshot` on first :meth:`sync` and
+    rebuilt after a ``reset`` event; events that arrive mid-build are queued
+    and replayed past the snapshot's version.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.RLock()
+        self.version = None  # None until built
+        self._pending = None  # events queued while building
+        self._build_mutex = threading.Lock()
+        store.subscribe(self._on_change)
+
+    def sync(self):
+        """Bring the view up to date with every write, including other processes'."""
+        self.store.refresh()
+        if self.version is None:
+            self._build()
+
+    def _build(self):
+        with self._build_mutex:
+            if self.version is not None:
+                return
+            with self.lock:
+                self._pending = []
+            version, records = self.store.snapshot()
+            with self.lock:
+                self._load(records)
+                pending, self._pending = self._pending, None
+                self.version = version
+                for event in pending:
+                    if event["version"] > self.version or event["op"] == "reset":
+                        self._on_change(event)
+
+    def _on_change(self, event):
+        with self.lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            elif self.version is None:
+                return
+            elif event["op"] == "reset":
+                self.version = None
+                self._clear()
+            else:
+                if event["old"] is not None:
+                    self._remove(event["old"])
+                if event["new"] is not None:
+                    self._add(event["new"])
+                self.version = event["version"]
+
+    def _load(self, records):
+        self._clear()
+        for student in records:
+            self._add(student)
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, student):
+        raise NotImplementedError
+
+    def _remove(self, student):
+        raise NotImplementedError
+
+
+# ── JSON backend ─────────────────────────────────────────────────────────────
+
+class JSONStudentStore(BaseStudentStore):
+    """Students keyed by ``student_id``, persisted as snapshot + write-ahead log.
+
+    The snapshot is the familiar ``students.json`` array. Every create, update
+    and delete is appended to ``<name>.wal.jsonl`` as one JSON line carrying the
+    full record, so a write costs O(record) bytes instead of a full rewrite, and
+    a crash can at worst leave a torn final line, which replay ignores.
+
+    Log lines look like::
+
+        {"op": "checkpoint", "version": 120, "base": 0, "generation": 8613..., "snapshot": [mtime_ns, size],
+         "versions": {"STU004": 97, ...}}
+        {"op": "create", "student_id": "STU011", "data": {...}, "version": 121}
+        {"op": "update", "student_id": "STU011", "data": {...}, "version": 122}
+        {"op": "delete", "student_id": "STU011", "version": 123}
+
+    Each entry sets a record to its final value, so replaying a log over a
+    snapshot that already contains some of its entries is harmless. Once the
+    log holds ``compact_every`` entries a background thread writes a fresh
+    snapshot and swaps both files in with atomic renames.
+
+    ``version`` increases by one per mutation and survives compaction through
+    the checkpoint line, as do ``generation`` and each record's version, so
+    compaction leaves every ETag as it was. A writer that starts a log from
+    nothing heads it with a checkpoint carrying a new random ``generation``.
+    The checkpoint names the snapshot it was written with; over any other
+    snapshot it only sets ``version``, and ``generation`` falls back to the
+    snapshot's mtime.
+
+    Concurrency: in-memory state is guarded by a :class:`ReadWriteLock`, and
+    everything that touches the files on behalf of a writer runs under an
+    exclusive :func:`file_lock` on ``<name>.lock``. Concurrent writers in one
+    process queue up; whichever thread finds the queue idle commits the whole
+    queue under one lock acquisition, one log write and one fsync (group
+    commit). Readers keep serving the previous state until the batch is
+    durable, then it is applied under a short write lock. Other processes pick
+    the new entries up from the log tail on their next read.
+    """
+
+    def __init__(self, path, log_path=None, compact_every=1000, fsync=True):
+        super().__init__()
+        self.path = path
+        base = os.path.splitext(path)[0]
+        self.log_path = log_path or base + ".wal.jsonl"
+        self.lock_path = base + ".lock"
+        self.binary_path = base + ".snap"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.version = 0
+        self.last_modified = 0.0
+        self._base_version = 0  # version of the records missing from _record_versions
+        self._record_versions = {}
+        self._generation = 0
+        self._rwlock = ReadWriteLock()
+        self._write_mutex = threading.Lock()
+        self._queue_cond = threading.Condition()
+        self._queue = []
+        self._committing = False
+        self._overlay = {}
+        self._students = {}
+        self._sorted_ids = []
+        self._sort_indexes = {}  # field -> sorted [(value, id)], built on first use
+        self._groups = {}  # (filter field, sort) -> {value: sorted sort keys}, built on first use
+        self._snapshot_signature = None
+        self._log_inode = None
+        self._log_offset = 0
+        self._log_size = 0
+        self._log_entries = 0
+        self._compacting = False
+        self.refresh()
+
+    # ── Disk sync ────────────────────────────────────────────────────────────
+
+    def _log_state(self):
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    def _is_stale(self):
+        if _file_signature(self.path) != self._snapshot_signature:
+            return True
+        inode, size = self._log_state()
+        return inode != self._log_inode or size != self._log_size
+
+    @contextmanager
+    def _exclusive(self):
+        """Sole writer across threads and processes."""
+        with self._write_mutex, file_lock(self.lock_path, exclusive=True):
+            yield
+
+    def refresh(self):
+        """Catch up with the files on disk if they changed since the last read."""
+        if not self._is_stale():
+            return
+        with file_lock(self.lock_path, exclusive=False), self._rwlock.write():
+            self._catch_up()
+
+    def _catch_up(self):
+        """Reload or replay the log tail. Caller holds the write lock and a file lock."""
+        snapshot_signature = _file_signature(self.path)
+        inode, _ = self._log_state()
+        if snapshot_signature == self._snapshot_signature and self._log_inode is None and inode is not None:
+            # First log since the snapshot we hold: replay it from the start.
+            self._log_inode, self._log_offset, self._log_size = inode, 0, 0
+        if snapshot_signature != self._snapshot_signature or inode != self._log_inode:
+            self._load(snapshot_signature, inode)
+        else:
+            self._replay_log()
+        self.last_modified = self._files_mtime()
+
+    def _files_mtime(self):
+        mtimes = [0.0]
+        for path in (self.path, self.log_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                pass
+        return max(mtimes)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def _snapshot_stamp(self):
+        """How a checkpoint names the snapshot file loaded now: ``[mtime_ns, size]``, or None."""
+        return list(self._snapshot_signature[1:]) if self._snapshot_signature else None
+
+    def _load(self, snapshot_signature, log_inode):
+        previous, previous_version = self._students, self.version
+        self._students = self._read_snapshot(snapshot_signature)
+        self._rebuild_indexes()
+        self.version = 0
+        self._base_version = 0
+        self._record_versions = {}
+        self._snapshot_signature = snapshot_signature
+        # Every worker sees the same snapshot file, so its mtime is a shared epoch
+        # until a checkpoint written with this snapshot names the real lineage.
+        self._generation = snapshot_signature[1] if snapshot_signature else 0
+        self._log_inode = log_inode
+        self._log_offset = 0
+        self._log_size = 0
+        self._log_entries = 0
+        self._replay_log(notify=False)
+        if self._listeners:
+            self._emit_diff(previous, previous_version)
+
+    def _read_snapshot(self, snapshot_signature):
+        """The in-memory records of the snapshot file (``snapshot_signature`` None: no file yet)."""
+        if snapshot_signature is None:
+            return self._records([])
+        with open(self.path, "r") as f:
+            return self._records(json.load(f))
+
+    def _records(self, students):
+        """The in-memory record map for a freshly loaded snapshot: a dict keyed by ``student_id``."""
+        return {s["student_id"]: s for s in students}
+
+    def _emit_diff(self, previous, previous_version):
+        """Change events turning ``previous`` into the freshly loaded records.
+
+        Each write changes at most one record, so the differences fit in the
+        versions since ``previous_version`` and get the last of them, in
+        order. If they don't (versions restarted with a new snapshot), a
+        ``reset`` is sent instead.
+        """
+        changes = self._diff(previous)
+        if self.version - previous_version < len(changes):
+            self._emit({"op": "reset", "version": self.version})
+            return
+        first = self.version - len(changes) + 1
+        for version, (op, student_id, old, new) in enumerate(changes, start=first):
+            self._emit({"op": op, "student_id": student_id, "old": old, "new": new, "version": version})
+
+    def _diff(self, previous):
+        """``[(op, student_id, old, new)]`` for every record that differs between ``previous`` and now."""
+        changes = [("delete" if new is None else "update", student_id, old, new)
+                   for student_id, old in previous.items()
+                   for new in (self._students.get(student_id),) if new != old]
+        changes += [("create", student_id, None, new)
+                    for student_id, new in self._students.items() if student_id not in previous]
+        return changes
+
+    def _replay_log(self, notify=True):
+        """Apply complete log lines past the current offset."""
+        if self._log_inode is None:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_offset)
+            chunk = f.read()
+        self._log_size = self._log_offset + len(chunk)
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._apply_entry(entry, notify)
+        self._log_offset += end
+
+    def _apply_entry(self, entry, notify=True):
+        op = entry["op"]
+        if op == "checkpoint":
+            self.version = self._base_version = entry["version"]
+            self._log_entries = 0
+            if "generation" in entry and entry.get("snapshot") == self._snapshot_stamp():
+                self._generation = entry["generation"]
+                self._base_version = entry["base"]
+                self._record_versions = dict(entry["versions"])
+            return
+        student_id = entry["student_id"]
+        old = self._students.get(student_id)
+        if old is not None:
+            self._unindex(old)
+        if op == "delete":
+            self._students.pop(student_id, None)
+            self._record_versions.pop(student_id, None)
+        else:
+            self._students[student_id] = entry["data"]
+            self._record_versions[student_id] = entry["version"]
+            self._index(entry["data"])
+        self.version = entry["version"]
+        self._log_entries += 1
+        if notify and self._listeners:
+            self._emit({"op": op, "student_id": student_id, "old": old,
+                        "new": None if op == "delete" else entry["data"], "version": self.version})
+
+    # ── Secondary indexes ────────────────────────────────────────────────────
+
+    def _rebuild_indexes(self):
+        self._sorted_ids = sorted(self._students)
+        self._sort_indexes = {}
+        self._groups = {}
+
+    def _index(self, student):
+        student_id = student["student_id"]
+        pos = bisect.bisect_left(self._sorted_ids, student_id)
+        if pos == len(self._sorted_ids) or self._sorted_ids[pos] != student_id:
+            self._sorted_ids.insert(pos, student_id)
+        for field, keys in self._sort_indexes.items():
+            key = (student[field], student_id)
+            pos = bisect.bisect_left(keys, key)
+            if pos == len(keys) or keys[pos] != key:
+                keys.insert(pos, key)
+        for (field, sort), groups in self._groups.items():
+            keys = groups.setdefault(student[field], [])
+            key = sort_key(student, sort)
+            pos = bisect.bisect_left(keys, key)
+            if pos == len(keys) or keys[pos] != key:
+                keys.insert(pos, key)
+
+    def _unindex(self, student):
+        student_id = student["student_id"]
+        pos = bisect.bisect_left(self._sorted_ids, student_id)
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == student_id:
+            del self._sorted_ids[pos]
+        for field, keys in self._sort_indexes.items():
+            key = (student[field], student_id)
+            pos = bisect.bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                del keys[pos]
+        for (field, sort), groups in self._groups.items():
+            keys = groups.get(student[field])
+            if keys is None:
+                continue
+            key = sort_key(student, sort)
+            pos = bisect.bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                del keys[pos]
+            if not keys:
+                del groups[student[field]]
+
+    def _sort_index(self, field):
+        """Sorted ``(value, id)`` keys for ``field``. Caller holds the read or write lock."""
+        keys = self._sort_indexes.get(field)
+        if keys is None:
+            # Readers may race to build it; writers (exclusive) can't run meanwhile.
+            keys = sorted((s[field], i) for i, s in self._students.items())
+            self._sort_indexes[field] = keys
+        return keys
+
+    def _group_index(self, field, sort):
+        """``{value of field: its students' sort keys, sorted}``. Caller holds the read or write lock."""
+        groups = self._groups.get((field, sort))
+        if groups is None:
+            groups = {}
+            for student in self._students.values():
+                groups.setdefault(student[field], []).append(sort_key(student, sort))
+            for keys in groups.values():
+                keys.sort()
+            self._groups[(field, sort)] = groups
+        return groups
+
+    @staticmethod
+    def _span(keys, after, descending, bounds=None):
+        """``(start, end)`` of the sorted ``keys`` within ``bounds`` that come after ``after`` in page order."""
+        start, end = (0, len(keys)) if bounds is None else (bisect.bisect_left(keys, bounds[0]),
+                                                             bisect.bisect_left(keys, bounds[1]))
+        if after is not None:
+            if descending:
+                end = min(end, bisect.bisect_left(keys, after))
+            else:
+                start = max(start, bisect.bisect_right(keys, after))
+        return start, max(start, end)
+
+    def _checkpoint(self, version, generation, versions):
+        """Checkpoint entry for the snapshot file now on disk. Caller holds :meth:`_exclusive`."""
+        signature = _file_signature(self.path)
+        return {"op": "checkpoint", "version": version, "base": self._base_version, "generation": generation,
+                "snapshot": list(signature[1:]) if signature else None, "versions": versions}
+
+    def _write_log(self, entries):
+        """Durably append ``entries`` to the log. Caller holds :meth:`_exclusive`."""
+        if self._log_inode is None:  # a new log: it starts a new lineage
+            entries = [self._checkpoint(self.version, _new_generation(), dict(self._record_versions)), *entries]
+        data = b"".join(json.dumps(e).encode() + b"\n" for e in entries)
+        with open(self.log_path, "ab") as f:
+            # A torn line left by a crash would swallow the next entry; drop it.
+            if f.tell() > self._log_offset and os.fstat(f.fileno()).st_ino == self._log_inode:
+                f.truncate(self._log_offset)
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+            inode, offset = st.st_ino, f.tell()
+        with self._rwlock.write():
+            for entry in entries:
+                self._apply_entry(entry)
+            self.last_modified = st.st_mtime
+            self._log_inode = inode
+            self._log_offset = self._log_size = offset
+
+    # ── Group commit ─────────────────────────────────────────────────────────
+
+    def _submit(self, prepare):
+        """Run ``prepare`` inside the next group commit and return its result.
+
+        ``prepare(emit)`` is called with the store exclusively locked and up to
+        date. It passes each log entry it wants written to ``emit`` and returns
+        its result, or raises :class:`StoreError` before emitting anything. It
+        must look records up through :meth:`_peek` so that it sees earlier
+        writes in the same batch.
+        """
+        pending = _PendingWrite(prepare)
+        with self._queue_cond:
+            self._queue.append(pending)
+            while not pending.done and self._committing:
+                self._queue_cond.wait()
+            if not pending.done:
+                batch, self._queue = self._queue, []
+                self._committing = True
+        if not pending.done:
+            try:
+                self._commit(batch)
+            finally:
+                with self._queue_cond:
+                    self._committing = False
+                    self._queue_cond.notify_all()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _commit(self, batch):
+        entries = []
+
+        def emit(entry):
+            entry["version"] = self.version + len(entries) + 1
+            self._overlay[entry["student_id"]] = (entry.get("data"), entry["version"])
+            entries.append(entry)
+
+        try:
+            with self._exclusive():
+                with self._rwlock.write():
+                    self._catch_up()
+                self._overlay = {}
+                for pending in batch:
+                    try:
+                        pending.result = pending.prepare(emit)
+                    except StoreError as e:
+                        pending.error = e
+                if entries:
+                    self._write_log(entries)
+        except BaseException as e:
+            for pending in batch:
+                if pending.error is None:
+                    pending.error = e
+            raise
+        finally:
+            self._overlay = {}
+            for pending in batch:
+                pending.done = True
+        if self._log_entries >= self.compact_every and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="student-store-compactor", daemon=True).start()
+
+    def _peek(self, student_id):
+        """Current record as seen by a writer, including earlier writes in its batch."""
+        if student_id in self._overlay:
+            return self._overlay[student_id][0]
+        return self._students.get(student_id)
+
+    def _peek_version(self, student_id):
+        if student_id in self._overlay:
+            return self._overlay[student_id][1]
+        return self._record_versions.get(student_id, self._base_version)
+
+    # ── Compaction ───────────────────────────────────────────────────────────
+
+    def compact(self):
+        """Fold the log into a fresh snapshot and start a new log.
+
+        The snapshot is serialized outside any lock from a point-in-time copy;
+        entries appended meanwhile are carried over into the new log.
+        """
+        try:
+            self.refresh()
+            with self._rwlock.read():
+                students = self._students.copy()
+                versions = dict(self._record_versions)
+                version = self.version
+                log_inode, offset = self._log_inode, self._log_offset
+            snapshot = encode_snapshot(students.values())
+            binary = self._encode_binary(students)
+            with self._exclusive():
+                with self._rwlock.write():
+                    self._catch_up()
+                if self._log_inode != log_inode:
+                    return
+                tail = b""
+                if log_inode is not None:
+                    with open(self.log_path, "rb") as f:
+                        f.seek(offset)
+                        tail = f.read(self._log_offset - offset)
+                replace_file(self.path, snapshot)
+                if binary is not None:
+                    from binary_snapshot import restamp
+                    replace_file(self.binary_path, restamp(binary, _file_signature(self.path)[1:]))
+                generation = self._generation if log_inode is not None else _new_generation()
+                checkpoint = self._checkpoint(version, generation, {k: v for k, v in versions.items() if k in students})
+                replace_file(self.log_path, json.dumps(checkpoint).encode() + b"\n" + tail)
+                with self._rwlock.write():
+                    self._snapshot_signature = _file_signature(self.path)
+                    self._log_inode, self._log_offset = self._log_state()
+                    self._log_size = self._log_offset
+                    self._log_entries = tail.count(b"\n")
+                    self.last_modified = self._files_mtime()
+                    self._generation = generation
+                    self._snapshot_replaced()
+        finally:
+            self._compacting = False
+
+    def _encode_binary(self, students):
+        """The binary snapshot compaction writes next to the JSON one (``students`` as of the copy), or None."""
+        if not os.path.exists(self.binary_path):  # keep an existing binary snapshot fresh
+            return None
+        from binary_snapshot import encode
+        return encode(students)
+
+    def _snapshot_replaced(self):
+        """Called once compaction has swapped in new files, under the write lock."""
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def all(self):
+        self.refresh()
+        with self._rwlock.read():
+            return list(self._students.values())
+
+    def snapshot(self):
+        self.refresh()
+        with self._rwlock.read():
+            return self.version, list(self._students.values())
+
+    def get(self, student_id):
+        self.refresh()
+        with self._rwlock.read():
+            return self._students.get(student_id)
+
+    def record_version(self, student_id):
+        self.refresh()
+        with self._rwlock.read():
+            if student_id not in self._students:
+                return None
+            return self._record_versions.get(student_id, self._base_version)
+
+    def __len__(self):
+        self.refresh()
+        with self._rwlock.read():
+            return len(self._students)
+
+    def query(self, company_name=None, min_experience=None, max_experience=None, after=None, limit=None,
+              sort="student_id", descending=False):
+        self.refresh()
+        with self._rwlock.read():
+            # Every filter picks sorted key lists to start from at the cursor, so a
+            # page reads about ``limit`` keys however many students match.
+            by_id = sort == "student_id"
+            ranged = min_experience is not None or max_experience is not None
+            low = float("-inf") if min_experience is None else min_experience
+            high = float("inf") if max_experience is None else max_experience
+            bounds = None  # a range on the sort field is one run of each list
+            if ranged and sort == "years_of_experience":
+                bounds, ranged = ((low,), (high + 1,)), False
+            if company_name is not None:
+                lists = [self._group_index("company_name", sort).get(company_name, [])]
+            elif ranged:
+                # One list per experience value in range, merged in sort order.
+                lists = [keys for years, keys in self._group_index("years_of_experience", sort).items()
+                         if low <= years <= high]
+                ranged = False
+            else:
+                lists = [self._sorted_ids if by_id else self._sort_index(sort)]
+
+            spans = [(keys, *self._span(keys, after, descending, bounds)) for keys in lists]
+            if len(spans) == 1 and not ranged:
+                keys, start, end = spans[0]
+                if descending:
+                    window = keys[start if limit is None else max(start, end - limit):end][::-1]
+                else:
+                    window = keys[start:end if limit is None else min(end, start + limit)]
+            else:
+                walks = [map(keys.__getitem__, range(end - 1, start - 1, -1) if descending else range(start, end))
+                         for keys, start, end in spans]
+                found = walks[0] if len(walks) == 1 else heapq.merge(*walks, reverse=descending)
+                if ranged:  # a company's students, in an experience range, in another order
+                    found = (k for k in found
+                             if low <= self._students[k if by_id else k[1]]["years_of_experience"] <= high)
+                window = list(found if limit is None else islice(found, limit))
+            ids = window if by_id else [k[1] for k in window]
+            return [self._students[i] for i in ids]
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def apply(self, operations):
+        def prepare(emit):
+            results = []
+            for operation in operations:
+                try:
+                    results.append(self._prepare(operation, emit))
+                except StoreError as e:
+                    results.append(e)
+            return results
+
+        return self._submit(prepare)
+
+    def _prepare(self, operation, emit):
+        op = operation["op"]
+        if op == "create":
+            student = operation["data"]
+            student_id = student["student_id"]
+            if self._peek(student_id) is not None:
+                raise StudentExists(student_id)
+            emit({"op": "create", "student_id": student_id, "data": student})
+            return student
+
+        student_id = operation["student_id"]
+        current = self._peek(student_id)
+        if current is None:
+            raise StudentNotFound(student_id)
+        if_version = operation.get("if_version")
+        if if_version is not None and self._peek_version(student_id) != if_version:
+            raise PreconditionFailed(student_id)
+        if op == "update":
+            student = {**current, **operation["data"], "student_id": student_id}
+            emit({"op": "update", "student_id": student_id, "data": student})
+            return student
+        emit({"op": "delete", "student_id": student_id})
+        return current